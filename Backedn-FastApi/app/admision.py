@@ -0,0 +1,239 @@
+"""
+Control de admisión: rechazar pronto en lugar de encolar sin límite.
+
+Con el pool agotado, cada petición esperaba hasta DB_POOL_TIMEOUT (30 s)
+por una conexión; la latencia crecía sin techo y los reintentos de los
+clientes empeoraban la sobrecarga. Ahora, en cada worker:
+
+- Cada ruta admite un número de peticiones simultáneas; las siguientes
+  esperan en una cola acotada y con plazo, y si no entran a tiempo
+  reciben 503 con Retry-After.
+- Si el pool no tiene conexiones libres y la última espera de checkout
+  superó ADMISION_UMBRAL_POOL_MS, las peticiones nuevas reciben 503 sin
+  esperar.
+- Cada usuario (uid de Firebase) tiene un cubo de tokens: por encima de
+  su ritmo recibe 429 con Retry-After.
+"""
+
+import asyncio
+import math
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import JSONResponse
+from starlette.routing import BaseRoute
+
+from . import database, settings
+from .cache import LRUTTLBackend
+from .metrics import ADMISION_EN_COLA, ADMISION_RECHAZOS
+
+# Límites propios de rutas largas (exportaciones: cada una ocupa una conexión durante toda la descarga)
+LIMITES_POR_DEFECTO = {
+    "/api/asesorias/exportar": 2,
+    "/api/ausencias/exportar": 2,
+}
+
+
+def limites_de(texto: str) -> Dict[str, int]:
+    """Lee "ruta=limite,ruta=limite" (ADMISION_LIMITES) sobre los límites por defecto"""
+    limites = dict(LIMITES_POR_DEFECTO)
+    for par in filter(None, (p.strip() for p in texto.split(","))):
+        ruta, _, limite = par.rpartition("=")
+        limites[ruta.strip()] = int(limite)
+    return limites
+
+
+class ColaLlenaError(Exception):
+    """La cola de espera de la ruta está llena o el plazo venció."""
+
+    def __init__(self, motivo: str):
+        super().__init__(motivo)
+        self.motivo = motivo
+
+
+# ========== Concurrencia por ruta ==========
+
+class Limitador:
+    """Máximo de peticiones simultáneas de una ruta, con cola de espera acotada y con plazo."""
+
+    def __init__(self, limite: int, max_cola: int = settings.ADMISION_COLA,
+                 espera_max_s: float = settings.ADMISION_ESPERA_MAX_S):
+        self.limite = limite
+        self.max_cola = max_cola
+        self.espera_max_s = espera_max_s
+        self.esperando = 0
+        self._semaforo = asyncio.Semaphore(limite)
+
+    async def entrar(self):
+        """
+        Ocupa un lugar (esperando como mucho `espera_max_s`).
+
+        Raises:
+            ColaLlenaError: si la cola ya está llena o el plazo vence
+        """
+        if not self._semaforo.locked():
+            await self._semaforo.acquire()
+            return
+        if self.esperando >= self.max_cola:
+            raise ColaLlenaError("cola_llena")
+        self.esperando += 1
+        ADMISION_EN_COLA.inc()
+        try:
+            await asyncio.wait_for(self._semaforo.acquire(), self.espera_max_s)
+        except asyncio.TimeoutError:
+            raise ColaLlenaError("plazo")
+        finally:
+            self.esperando -= 1
+            ADMISION_EN_COLA.dec()
+
+    def salir(self):
+        self._semaforo.release()
+
+
+# ========== Saturación del pool ==========
+
+def _engine_de(metodo: str):
+    # Lecturas en la réplica si está configurada (como get_session), si no la primaria
+    if database.DB_ASYNC:
+        principal, replica = database.async_engine, database.async_replica_engine
+    else:
+        principal, replica = database.engine, database.replica_engine
+    if replica is not None and metodo in database.METODOS_LECTURA:
+        return replica
+    return principal
+
+
+def pool_saturado(pool, umbral_s: float) -> bool:
+    """Sin conexiones libres ni overflow disponible, y la última espera de checkout supera el umbral"""
+    if not hasattr(pool, "checkedin"):
+        return False
+    sin_overflow = pool.overflow() >= getattr(pool, "_max_overflow", 0)
+    return pool.checkedin() == 0 and sin_overflow and getattr(pool, "ultima_espera_s", 0.0) >= umbral_s
+
+
+# ========== Middleware ASGI ==========
+
+def _rechazo(detalle: str, retry_after: int) -> JSONResponse:
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content={"detail": detalle},
+                        headers={"Retry-After": str(retry_after)})
+
+
+class AdmisionMiddleware:
+    """
+    Aplica la concurrencia por ruta y el rechazo por saturación del pool.
+
+    `rutas` devuelve las rutas controladas (las de /api); el resto (salud,
+    métricas, eventos) pasa sin control. Se registra dentro de CORS para que
+    los 503 lleven sus headers y el navegador pueda leer Retry-After.
+    """
+
+    def __init__(self, app, rutas: Callable[[], Iterable[BaseRoute]], limite: int = settings.ADMISION_CONCURRENCIA,
+                 limites: Optional[Dict[str, int]] = None,
+                 umbral_pool_ms: float = settings.ADMISION_UMBRAL_POOL_MS,
+                 retry_after_s: int = settings.ADMISION_RETRY_AFTER_S):
+        self.app = app
+        self.rutas = rutas
+        self.limite = limite
+        self.limites = limites_de(settings.ADMISION_LIMITES) if limites is None else limites
+        self.umbral_pool_s = umbral_pool_ms / 1000
+        self.retry_after_s = retry_after_s
+        self.limitadores: Dict[str, Limitador] = {}
+
+    def _ruta(self, scope) -> Optional[str]:
+        # La ruta con parámetros (no la URL) que elegirá el router: misma expresión y método.
+        # Solo la expresión regular: Route.matches además convierte los parámetros
+        parcial = None
+        for route in self.rutas():
+            if route.path_regex.match(scope["path"]) is None:
+                continue
+            if route.methods is None or scope["method"] in route.methods:
+                return route.path
+            if parcial is None:
+                parcial = route.path
+        return parcial
+
+    def _limitador(self, ruta: str) -> Limitador:
+        limitador = self.limitadores.get(ruta)
+        if limitador is None:
+            limitador = self.limitadores[ruta] = Limitador(self.limites.get(ruta, self.limite))
+        return limitador
+
+    async def __call__(self, scope, receive, send):
+        ruta = self._ruta(scope) if scope["type"] == "http" and scope["method"] != "OPTIONS" else None
+        if ruta is None:
+            await self.app(scope, receive, send)
+            return
+
+        engine = _engine_de(scope["method"])
+        if engine is not None and pool_saturado(engine.pool, self.umbral_pool_s):
+            ADMISION_RECHAZOS.labels(ruta, "pool").inc()
+            await _rechazo("Servicio saturado, reintente más tarde", self.retry_after_s)(scope, receive, send)
+            return
+
+        limitador = self._limitador(ruta)
+        try:
+            await limitador.entrar()
+        except ColaLlenaError as e:
+            ADMISION_RECHAZOS.labels(ruta, e.motivo).inc()
+            await _rechazo("Servicio saturado, reintente más tarde", self.retry_after_s)(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limitador.salir()
+
+
+# ========== Límite por usuario ==========
+
+class CuboTokens:
+    """
+    Cubo de tokens por clave: `tasa` peticiones por segundo sostenidas y
+    ráfagas de hasta `rafaga`. En memoria del worker (LRU acotado); un cubo
+    que lleva tiempo sin usarse expira porque ya estaría lleno.
+    """
+
+    def __init__(self, tasa: float, rafaga: float, max_claves: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        self.clock = clock
+        self._cubos = LRUTTLBackend(max_entries=max_claves, clock=clock)
+
+    def consumir(self, clave: str) -> float:
+        """Consume un token; devuelve 0 si había o los segundos hasta que haya uno"""
+        ahora = self.clock()
+        tokens, ultimo = self._cubos.get(clave) or (self.rafaga, ahora)
+        tokens = min(self.rafaga, tokens + (ahora - ultimo) * self.tasa)
+        espera = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            espera = (1 - tokens) / self.tasa
+        self._cubos.set(clave, (tokens, ahora), self.rafaga / self.tasa)
+        return espera
+
+
+cubo_usuarios = CuboTokens(settings.ADMISION_TASA_UID, settings.ADMISION_RAFAGA_UID) \
+    if settings.ADMISION_TASA_UID > 0 else None
+
+
+async def limitar_tasa(request: Request):
+    """
+    Dependency (después de verify_firebase_token): 429 si el usuario supera su ritmo.
+
+    Raises:
+        HTTPException: 429 con Retry-After
+    """
+    uid = getattr(request.state, "uid", None)
+    if cubo_usuarios is None or uid is None:
+        return
+    espera = cubo_usuarios.consumir(uid)
+    if espera > 0:
+        route = request.scope.get("route")
+        ADMISION_RECHAZOS.labels(getattr(route, "path", ""), "tasa").inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Demasiadas peticiones",
+            headers={"Retry-After": str(math.ceil(espera))},
+        )
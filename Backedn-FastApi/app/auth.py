@@ -1,15 +1,64 @@
 """Módulo de autenticación con Firebase para FastAPI."""
 
-from fastapi import Header, HTTPException, status
-from firebase_admin import auth
+import time
+from fastapi import Header, HTTPException, Query, Request, WebSocket, WebSocketException, status
+from starlette.requests import HTTPConnection
 from typing import Optional
 
+from .firebase_config import get_project_id
+from .metrics import FIREBASE_VERIFICACION
+from .firebase_tokens import FirebaseTokenVerifier, InvalidTokenError
 
-async def verify_firebase_token(authorization: Optional[str] = Header(None)):
+# Verificador compartido (caché de tokens verificados y de claves públicas)
+token_verifier = FirebaseTokenVerifier(project_id=get_project_id)
+
+
+async def _verificar(conexion: HTTPConnection, token: str) -> dict:
+    """Verifica el ID token, registra el tiempo y guarda el uid en conexion.state.uid"""
+    inicio = time.perf_counter()
+    try:
+        # Verificar el token localmente (con caché por hash del token)
+        decoded_token = await token_verifier.verify(token)
+        FIREBASE_VERIFICACION.labels("ok").observe(time.perf_counter() - inicio)
+        # Lo usa el enrutado a la réplica para la lectura de las propias escrituras
+        conexion.state.uid = decoded_token["uid"]
+        return decoded_token
+    except InvalidTokenError:
+        FIREBASE_VERIFICACION.labels("invalid").observe(time.perf_counter() - inicio)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    except Exception as e:
+        FIREBASE_VERIFICACION.labels("error").observe(time.perf_counter() - inicio)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error verifying token: {str(e)}"
+        )
+
+
+def _token_de_header(authorization: Optional[str]) -> str:
+    if not authorization:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authorization header missing"
+        )
+    
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid authorization header format"
+        )
+    
+    return authorization.split("Bearer ")[1]
+
+
+async def verify_firebase_token(request: Request, authorization: Optional[str] = Header(None)):
     """
     Dependency para verificar el token de Firebase en los headers.
     
     Args:
+        request: Petición en curso (se guarda el uid en request.state.uid)
         authorization: Header Authorization con formato "Bearer <token>"
     
     Returns:
@@ -18,31 +67,27 @@ async def verify_firebase_token(authorization: Optional[str] = Header(None)):
     Raises:
         HTTPException: Si el token es inválido o no existe
     """
-    if not authorization:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Authorization header missing"
-        )
-    
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authorization header format"
-        )
+    return await _verificar(request, _token_de_header(authorization))
+
+
+async def verify_stream_token(
+    conexion: HTTPConnection,
+    authorization: Optional[str] = Header(None),
+    token: Optional[str] = Query(None),
+):
+    """
+    Dependency para los canales de eventos (SSE y WebSocket).
     
-    token = authorization.split("Bearer ")[1]
+    EventSource y WebSocket del navegador no pueden enviar el header
+    Authorization, así que también se acepta el token en ?token=.
     
+    Raises:
+        HTTPException: (SSE) si el token es inválido o no existe
+        WebSocketException: (WebSocket) se cierra con código 1008
+    """
     try:
-        # Verificar el token con Firebase
-        decoded_token = auth.verify_id_token(token)
-        return decoded_token
-    except auth.InvalidIdTokenError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired token"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error verifying token: {str(e)}"
-        )
+        return await _verificar(conexion, token or _token_de_header(authorization))
+    except HTTPException as e:
+        if isinstance(conexion, WebSocket):
+            raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+        raise
@@ -0,0 +1,90 @@
+"""
+Búsqueda de texto completo sobre tema, descripcion y respuesta de las asesorías.
+
+En PostgreSQL usa la columna generada `busqueda` (tsvector con la
+configuración ppw_es: español sin acentos, pesos A/B/C para tema,
+descripcion y respuesta) con índice GIN, más un índice de trigramas sobre
+`tema` para coincidencias aproximadas (errores de tipeo). Ver la migración
+004_busqueda.sql.
+
+En SQLite (pruebas y benchmarks locales) usa la tabla FTS5 asesorias_fts,
+que se crea junto con la tabla asesorias (ver FTS_SQLITE en models.py). Ahí la
+coincidencia aproximada se limita a prefijos de palabra y se ordenan todas
+las coincidencias (es un respaldo para pruebas, no para producción).
+"""
+
+import re
+from typing import Tuple
+
+from sqlalchemy import Float, cast, column, func, literal_column, or_, select, table, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Query, Session
+
+from . import models
+
+# Configuración de texto completo de PostgreSQL (creada en la migración 004)
+CONFIG_TS = "ppw_es"
+
+# En PostgreSQL solo se ordenan por relevancia las coincidencias más recientes hasta
+# este número: ts_rank_cd lee el tsvector de cada fila y una palabra presente en casi
+# todas las asesorías obligaría a puntuar la tabla entera
+MAX_CANDIDATOS = 5000
+
+# Pesos de bm25 en SQLite para (tema, descripcion, respuesta)
+PESOS_FTS5 = (10.0, 4.0, 1.0)
+
+# Palabras de la consulta que se usan en SQLite
+MAX_TERMINOS = 16
+
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+
+
+class ConsultaVaciaError(ValueError):
+    """La consulta no tiene ninguna palabra buscable."""
+
+
+def terminos_fts5(q: str) -> str:
+    """
+    Convierte texto libre en una consulta FTS5 segura: cada palabra entre
+    comillas y como prefijo, todas obligatorias ("clase"* "sql"*).
+    """
+    return " ".join(f'"{palabra}"*' for palabra in _PALABRA.findall(q)[:MAX_TERMINOS])
+
+
+def _postgres(query: Query, q: str, criterios) -> Tuple[Query, object]:
+    busqueda = literal_column("asesorias.busqueda", TSVECTOR)
+    consulta = func.websearch_to_tsquery(literal_column(f"'{CONFIG_TS}'::regconfig"), q)
+    # Relevancia del texto completo más el parecido del tema (trigramas)
+    rango = cast(func.ts_rank_cd(busqueda, consulta), Float) + cast(func.similarity(models.Asesoria.tema, q), Float)
+    # Cada rama usa su índice GIN (BitmapOr); el rango se calcula solo sobre los candidatos
+    candidatos = select(models.Asesoria.id).where(
+        or_(busqueda.op("@@")(consulta), models.Asesoria.tema.op("%")(q)), *criterios
+    ).order_by(models.Asesoria.id.desc()).limit(MAX_CANDIDATOS)
+    return query.filter(models.Asesoria.id.in_(candidatos)), rango
+
+
+def _sqlite(query: Query, q: str, criterios) -> Tuple[Query, object]:
+    fts = table("asesorias_fts", column("rowid"))
+    query = query.join(fts, fts.c.rowid == models.Asesoria.id).filter(
+        text("asesorias_fts MATCH :consulta").bindparams(consulta=terminos_fts5(q)), *criterios
+    )
+    # bm25 devuelve valores negativos (más negativo = más relevante)
+    rango = -func.bm25(literal_column("asesorias_fts"), *PESOS_FTS5)
+    return query, rango
+
+
+def aplicar(db: Session, query: Query, q: str, *criterios) -> Tuple[Query, object]:
+    """
+    Filtra `query` (sobre asesorias) por la búsqueda y por `criterios`, y
+    devuelve (query, rango), donde `rango` es la expresión de relevancia
+    (mayor = más relevante).
+
+    Raises:
+        ConsultaVaciaError: si `q` no tiene ninguna palabra
+    """
+    if not _PALABRA.search(q):
+        raise ConsultaVaciaError("La búsqueda no contiene palabras")
+    if db.get_bind().dialect.name == "postgresql":
+        return _postgres(query, q, criterios)
+    return _sqlite(query, q, criterios)
+
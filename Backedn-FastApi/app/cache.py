@@ -0,0 +1,140 @@
+"""Caché de lectura (read-through) para las vistas por usuario/programador."""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Configuración por variables de entorno
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "30"))              # segundos (0 = desactivada)
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv("QUERY_CACHE_MAX_ENTRIES", "5000"))
+QUERY_CACHE_URL = os.getenv("QUERY_CACHE_URL")                           # redis://... (opcional)
+
+
+class CacheBackend:
+    """
+    Interfaz de almacenamiento de la caché.
+
+    Los valores son estructuras JSON (dict/list/str/int...) con TTL.
+    """
+    evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+
+class LRUTTLBackend(CacheBackend):
+    """Backend en memoria del proceso: LRU acotado con expiración por TTL."""
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if self.clock() >= expires_at:
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend compartido entre procesos/workers sobre Redis (requiere el paquete `redis`).
+
+    Las expulsiones las gestiona Redis, por eso `evictions` no se contabiliza aquí.
+    """
+
+    def __init__(self, url: str, prefix: str = "ppw:cache:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        self.client.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000))
+
+
+class QueryCache:
+    """Caché read-through con claves versionadas por etiqueta y contadores de hit/miss."""
+
+    def __init__(self, backend: CacheBackend, ttl: float = QUERY_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    @staticmethod
+    def make_key(name: str, params: Dict[str, Any]) -> str:
+        parts = [f"{k}={params[k]}" for k in sorted(params) if params[k] is not None]
+        return name + "?" + "&".join(parts)
+
+    def get_or_load(self, versions: Dict[str, int], key: str, loader: Callable[[], Any]) -> Any:
+        """
+        Valor de `key` con las versiones de sus etiquetas (tabla `versiones`).
+
+        Las versiones forman parte de la clave: tras una escritura, en
+        cualquier proceso, la entrada anterior deja de ser alcanzable y expira
+        sola. Se leen antes de consultar: si hay una escritura concurrente, el
+        valor queda guardado bajo la versión anterior y nunca se vuelve a leer.
+        """
+        if not self.enabled:
+            return loader()
+
+        full_key = key + "#" + ",".join(f"{tag}@{versions[tag]}" for tag in sorted(versions))
+
+        value = self.backend.get(full_key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = loader()
+        self.backend.set(full_key, value, self.ttl)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.backend.evictions}
+
+
+def _build_backend() -> CacheBackend:
+    if QUERY_CACHE_URL:
+        return RedisBackend(QUERY_CACHE_URL)
+    return LRUTTLBackend()
+
+
+# Caché compartida por los servicios
+query_cache = QueryCache(_build_backend())
@@ -0,0 +1,203 @@
+"""Motor de disponibilidad: índice de intervalos ocupados por programador."""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import false, text, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Duración asumida de una asesoría (solo se guarda la hora de inicio)
+DURACION_ASESORIA = timedelta(minutes=60)
+
+# Primera clave del advisory lock de la agenda (la segunda es hashtext del programador)
+LOCK_AGENDA = 7_340_022
+
+
+class ConflictoHorarioError(Exception):
+    """La asesoría se cruza con una ausencia o con otra asesoría aprobada."""
+
+
+class IntervalIndex:
+    """
+    Intervalos [inicio, fin) ordenados y fusionados.
+
+    Al no solaparse entre sí, los inicios y los fines quedan ordenados y una
+    consulta de solapamiento es una búsqueda binaria: O(log n). Construirlo
+    cuesta O(n log n): compensa con muchas consultas sobre la misma
+    ocupación (slots libres, lotes), no para verificar un solo horario.
+    """
+
+    def __init__(self, intervalos: Iterable[Tuple[datetime, datetime]]):
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+        for inicio, fin in sorted(intervalos):
+            if fin <= inicio:
+                continue
+            if self.ends and inicio <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], fin)
+            else:
+                self.starts.append(inicio)
+                self.ends.append(fin)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def overlaps(self, inicio: datetime, fin: datetime) -> bool:
+        # Primer intervalo que termina después de `inicio`
+        i = bisect_right(self.ends, inicio)
+        return i < len(self.starts) and self.starts[i] < fin
+
+    def add(self, inicio: datetime, fin: datetime):
+        """Inserta un intervalo fusionándolo con los que se solapan o tocan."""
+        i = bisect_left(self.ends, inicio)
+        j = bisect_right(self.starts, fin)
+        if i < j:
+            inicio = min(inicio, self.starts[i])
+            fin = max(fin, self.ends[j - 1])
+        self.starts[i:j] = [inicio]
+        self.ends[i:j] = [fin]
+
+    def slots_libres(self, desde: date, hasta: date, slot: timedelta,
+                     jornada_inicio: time, jornada_fin: time) -> List[Tuple[datetime, datetime]]:
+        """Slots de duración `slot` dentro de la jornada de cada día que no se solapan."""
+        libres = []
+        dia = desde
+        while dia <= hasta:
+            inicio = datetime.combine(dia, jornada_inicio)
+            fin_jornada = datetime.combine(dia, jornada_fin)
+            while inicio + slot <= fin_jornada:
+                if not self.overlaps(inicio, inicio + slot):
+                    libres.append((inicio, inicio + slot))
+                inicio += slot
+            dia += timedelta(days=1)
+        return libres
+
+
+def _intervalo_ausencia(ausencia: models.Ausencia) -> Tuple[datetime, datetime]:
+    fecha = date.fromisoformat(ausencia.fecha)
+    return (datetime.combine(fecha, time.fromisoformat(ausencia.hora_inicio)),
+            datetime.combine(fecha, time.fromisoformat(ausencia.hora_fin)))
+
+
+def intervalo_asesoria(fecha: str, hora: str) -> Tuple[datetime, datetime]:
+    inicio = datetime.combine(date.fromisoformat(fecha), time.fromisoformat(hora))
+    return inicio, inicio + DURACION_ASESORIA
+
+
+def bloquear_agenda(db: Session, programador_uids: Iterable[str]):
+    """
+    Serializa hasta el fin de la transacción las reservas de esos programadores.
+
+    Sin bloqueo, dos aprobaciones simultáneas verifican antes de que ninguna
+    haya escrito y pasan las dos. En PostgreSQL es un advisory lock por
+    programador, tomado en orden; quien además modifica asesorías existentes
+    bloquea antes sus filas (mismo orden en todas las transacciones). SQLite
+    no bloquea filas: una escritura vacía toma el bloqueo de escritura de la
+    base, que se mantiene hasta el commit.
+    """
+    programador_uids = sorted(set(programador_uids))
+    if not programador_uids:
+        return
+    dialecto = db.get_bind().dialect.name
+    if dialecto == "postgresql":
+        for programador_uid in programador_uids:
+            db.execute(text("SELECT pg_advisory_xact_lock(:clave, hashtext(:uid))"),
+                       {"clave": LOCK_AGENDA, "uid": programador_uid})
+    elif dialecto == "sqlite":
+        db.execute(update(models.VersionEntidad).where(false()).values(version=models.VersionEntidad.version))
+
+
+def _intervalos_ocupados(db: Session, programador_uid: str, desde: date, hasta: date,
+                         excluir_asesoria_ids: Iterable[int] = ()) -> List[Tuple[datetime, datetime]]:
+    """
+    Ausencias y asesorías aprobadas que ocupan algún momento del rango.
+
+    Ambas consultas son búsquedas por rango sobre los índices compuestos
+    (programador_uid, fecha) y (programador_uid, estado, fecha_solicitada).
+    Las asesorías se cargan desde el día anterior: una de las 23:30 termina
+    pasada la medianoche.
+    """
+    ausencias = db.query(models.Ausencia).filter(
+        models.Ausencia.programador_uid == programador_uid,
+        models.Ausencia.fecha >= desde,
+        models.Ausencia.fecha <= hasta,
+    )
+    asesorias = db.query(models.Asesoria.fecha_solicitada, models.Asesoria.hora_solicitada).filter(
+        models.Asesoria.programador_uid == programador_uid,
+        models.Asesoria.estado == "aprobada",
+        models.Asesoria.fecha_solicitada >= (datetime.combine(desde, time.min) - DURACION_ASESORIA).date(),
+        models.Asesoria.fecha_solicitada <= hasta,
+    )
+    excluir_asesoria_ids = list(excluir_asesoria_ids)
+    if excluir_asesoria_ids:
+        asesorias = asesorias.filter(models.Asesoria.id.notin_(excluir_asesoria_ids))
+
+    intervalos = [_intervalo_ausencia(a) for a in ausencias]
+    intervalos.extend(intervalo_asesoria(fecha, hora) for fecha, hora in asesorias)
+    return intervalos
+
+
+def cargar_ocupacion(db: Session, programador_uid: str, desde: date, hasta: date,
+                     excluir_asesoria_ids: Iterable[int] = ()) -> IntervalIndex:
+    """Construye el índice con las ausencias y asesorías aprobadas del rango."""
+    return IntervalIndex(_intervalos_ocupados(db, programador_uid, desde, hasta, excluir_asesoria_ids))
+
+
+def _conflicto() -> ConflictoHorarioError:
+    return ConflictoHorarioError("El horario se cruza con una ausencia o con otra asesoría aprobada")
+
+
+def verificar_conflicto(db: Session, programador_uid: str, fecha: str, hora: str,
+                        excluir_asesoria_ids: Iterable[int] = ()):
+    """
+    Lanza ConflictoHorarioError si el horario solicitado está ocupado.
+
+    Bloquea antes la agenda del programador (ver bloquear_agenda). Para un
+    solo horario no se construye el índice: se recorren los pocos intervalos
+    de esos días.
+    """
+    bloquear_agenda(db, [programador_uid])
+    inicio, fin = intervalo_asesoria(fecha, hora)
+    intervalos = _intervalos_ocupados(db, programador_uid, inicio.date(), fin.date(), excluir_asesoria_ids)
+    if any(ocupado_inicio < fin and inicio < ocupado_fin for ocupado_inicio, ocupado_fin in intervalos):
+        raise _conflicto()
+
+
+class AgendaLote:
+    """
+    Verificación de cruces para un lote de asesorías.
+
+    Carga una sola vez la ocupación de cada programador en el rango de fechas
+    del lote y va reservando los horarios aceptados, de modo que también se
+    detectan los cruces entre elementos del mismo lote. Antes bloquea la
+    agenda de todos esos programadores (ver bloquear_agenda).
+    """
+
+    def __init__(self, db: Session, horarios: Iterable[Tuple[str, str]],
+                 excluir_asesoria_ids: Iterable[int] = ()):
+        """`horarios`: pares (programador_uid, fecha) que se van a verificar."""
+        rangos: Dict[str, Tuple[date, date]] = {}
+        for programador_uid, fecha in horarios:
+            dia = date.fromisoformat(fecha)
+            desde, hasta = rangos.get(programador_uid, (dia, dia))
+            rangos[programador_uid] = (min(desde, dia), max(hasta, dia + timedelta(days=1)))
+
+        bloquear_agenda(db, rangos)
+        excluir_asesoria_ids = list(excluir_asesoria_ids)
+        self.ocupacion: Dict[str, IntervalIndex] = {
+            programador_uid: cargar_ocupacion(db, programador_uid, desde, hasta, excluir_asesoria_ids)
+            for programador_uid, (desde, hasta) in rangos.items()
+        }
+
+    def verificar(self, programador_uid: str, fecha: str, hora: str):
+        """Lanza ConflictoHorarioError si el horario está ocupado."""
+        inicio, fin = intervalo_asesoria(fecha, hora)
+        if self.ocupacion[programador_uid].overlaps(inicio, fin):
+            raise _conflicto()
+
+    def reservar(self, programador_uid: str, fecha: str, hora: str):
+        """Marca el horario como ocupado para el resto del lote."""
+        self.ocupacion[programador_uid].add(*intervalo_asesoria(fecha, hora))
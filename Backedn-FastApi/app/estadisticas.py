@@ -0,0 +1,219 @@
+"""
+Resumen incremental de asesorías para los dashboards.
+
+La tabla estadisticas_asesorias acumula, por programador, semana de
+creación, estado y tramo de tiempo de respuesta, la cantidad de asesorías
+y la suma de sus tiempos de respuesta. Cada escritura suma y resta su
+aporte en la misma transacción, así las consultas del dashboard recorren
+O(programadores × semanas) filas en lugar de todas las asesorías.
+
+Reconstrucción completa (backfill o tras cargar datos a mano):
+    python -m app.estadisticas --reconstruir
+"""
+
+import argparse
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# Límites superiores (segundos) de los tramos de tiempo de respuesta: de 1 minuto a 30 días.
+# Un tramo extra recoge lo que supere el último límite.
+TRAMOS_RESPUESTA_S = (
+    60, 300, 900, 1800, 3600, 2 * 3600, 4 * 3600, 8 * 3600, 12 * 3600,
+    86400, 2 * 86400, 3 * 86400, 7 * 86400, 14 * 86400, 30 * 86400,
+)
+
+# Tramo de las asesorías aún sin respuesta
+SIN_RESPUESTA = -1
+
+# Columnas de la asesoría que determinan su aporte al resumen
+COLUMNAS = (
+    models.Asesoria.programador_uid,
+    models.Asesoria.estado,
+    models.Asesoria.fecha_creacion,
+    models.Asesoria.fecha_respuesta,
+)
+
+Clave = Tuple[str, date, str, int]
+
+
+def semana(momento: date) -> date:
+    """Lunes de la semana de `momento` (fecha o fecha y hora)"""
+    dia = momento.date() if isinstance(momento, datetime) else momento
+    return dia - timedelta(days=dia.weekday())
+
+
+def _tramo(segundos: float) -> int:
+    return bisect_left(TRAMOS_RESPUESTA_S, segundos)
+
+
+def fila(asesoria) -> dict:
+    """Columnas relevantes de una instancia ORM (o de cualquier objeto con esos atributos)"""
+    return {columna.key: getattr(asesoria, columna.key) for columna in COLUMNAS}
+
+
+def _aporte(datos: Mapping) -> Tuple[Clave, float]:
+    """(clave del resumen, segundos de respuesta) de una asesoría"""
+    respuesta = 0.0
+    tramo = SIN_RESPUESTA
+    if datos["fecha_respuesta"] is not None:
+        respuesta = max((datos["fecha_respuesta"] - datos["fecha_creacion"]).total_seconds(), 0.0)
+        tramo = _tramo(respuesta)
+    clave = (datos["programador_uid"], semana(datos["fecha_creacion"]), datos["estado"], tramo)
+    return clave, respuesta
+
+
+def _deltas(antes: Iterable[Mapping], despues: Iterable[Mapping]) -> Dict[Clave, List[float]]:
+    """Cambio neto [cantidad, suma_respuesta_s] por clave; las que no cambian se descartan"""
+    deltas: Dict[Clave, List[float]] = defaultdict(lambda: [0, 0.0])
+    for signo, filas in ((-1, antes), (1, despues)):
+        for datos in filas:
+            clave, respuesta = _aporte(datos)
+            deltas[clave][0] += signo
+            deltas[clave][1] += signo * respuesta
+    return {clave: d for clave, d in deltas.items() if d[0] or d[1]}
+
+
+def actualizar(db: Session, antes: Iterable[Mapping] = (), despues: Iterable[Mapping] = ()):
+    """
+    Resta el aporte de las filas `antes` y suma el de `despues` en la transacción en curso.
+
+    INSERT ... ON CONFLICT DO UPDATE con las claves ordenadas (mismo orden de
+    bloqueo en transacciones concurrentes, como los contadores de versión).
+    """
+    deltas = _deltas(antes, despues)
+    if not deltas:
+        return
+    tabla = models.EstadisticaAsesoria.__table__
+    stmt = _INSERTS[db.get_bind().dialect.name](tabla)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabla.c.programador_uid, tabla.c.semana, tabla.c.estado, tabla.c.tramo_respuesta],
+        set_={
+            "cantidad": tabla.c.cantidad + stmt.excluded.cantidad,
+            "suma_respuesta_s": tabla.c.suma_respuesta_s + stmt.excluded.suma_respuesta_s,
+        },
+    )
+    # executemany: una sola compilación (en caché) aunque el lote toque muchas claves
+    db.execute(stmt, [
+        {"programador_uid": p, "semana": s, "estado": e, "tramo_respuesta": t,
+         "cantidad": cantidad, "suma_respuesta_s": suma}
+        for (p, s, e, t), (cantidad, suma) in sorted(deltas.items())
+    ])
+
+
+# ========== Lectura ==========
+
+def percentil(histograma: Dict[int, int], p: float) -> Optional[float]:
+    """
+    Percentil aproximado (segundos) a partir de las cantidades por tramo.
+
+    Interpola linealmente dentro del tramo; para el último tramo (sin límite
+    superior) devuelve su límite inferior.
+    """
+    total = sum(histograma.values())
+    if total <= 0:
+        return None
+    objetivo = p * total
+    acumulado = 0
+    for tramo in sorted(histograma):
+        cantidad = histograma[tramo]
+        if cantidad <= 0:
+            continue
+        if acumulado + cantidad >= objetivo:
+            inferior = TRAMOS_RESPUESTA_S[tramo - 1] if tramo > 0 else 0
+            if tramo >= len(TRAMOS_RESPUESTA_S):
+                return float(inferior)
+            superior = TRAMOS_RESPUESTA_S[tramo]
+            return inferior + (superior - inferior) * (objetivo - acumulado) / cantidad
+        acumulado += cantidad
+    return float(TRAMOS_RESPUESTA_S[-1])
+
+
+class Acumulado:
+    """Totales por estado y distribución del tiempo de respuesta de un grupo de filas del resumen."""
+
+    def __init__(self):
+        self.por_estado: Dict[str, int] = defaultdict(int)
+        self.histograma: Dict[int, int] = defaultdict(int)
+        self.suma_respuesta_s = 0.0
+
+    def sumar(self, estado: str, tramo: int, cantidad: int, suma_respuesta_s: float):
+        self.por_estado[estado] += cantidad
+        if tramo != SIN_RESPUESTA:
+            self.histograma[tramo] += cantidad
+            self.suma_respuesta_s += suma_respuesta_s
+
+    def a_dict(self) -> dict:
+        respondidas = sum(self.histograma.values())
+        return {
+            "total": sum(self.por_estado.values()),
+            "por_estado": {estado: n for estado, n in sorted(self.por_estado.items()) if n},
+            "respuesta": {
+                "respondidas": respondidas,
+                "media_s": self.suma_respuesta_s / respondidas if respondidas else None,
+                "p50_s": percentil(self.histograma, 0.5),
+                "p90_s": percentil(self.histograma, 0.9),
+                "p99_s": percentil(self.histograma, 0.99),
+            },
+        }
+
+
+# ========== Reconstrucción ==========
+
+def reconstruir(db: Session, lote: int = 5000) -> int:
+    """
+    Recalcula el resumen completo a partir de la tabla asesorias y devuelve
+    cuántas asesorías se procesaron. No confirma la transacción.
+
+    En PostgreSQL bloquea las escrituras sobre asesorias mientras dura, para
+    que ninguna quede fuera (o contada dos veces) en el resultado.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE asesorias IN SHARE MODE"))
+
+    db.execute(delete(models.EstadisticaAsesoria))
+    totales: Dict[Clave, List[float]] = defaultdict(lambda: [0, 0.0])
+    procesadas = 0
+    for datos in db.execute(select(*COLUMNAS).execution_options(yield_per=lote)).mappings():
+        clave, respuesta = _aporte(datos)
+        totales[clave][0] += 1
+        totales[clave][1] += respuesta
+        procesadas += 1
+
+    filas = [
+        {"programador_uid": p, "semana": s, "estado": e, "tramo_respuesta": t,
+         "cantidad": cantidad, "suma_respuesta_s": suma}
+        for (p, s, e, t), (cantidad, suma) in sorted(totales.items())
+    ]
+    for inicio in range(0, len(filas), lote):
+        db.execute(insert(models.EstadisticaAsesoria), filas[inicio:inicio + lote])
+    return procesadas
+
+
+def main():
+    from . import database
+
+    parser = argparse.ArgumentParser(description="Resumen de estadísticas de asesorías")
+    parser.add_argument("--reconstruir", action="store_true", required=True,
+                        help="Recalcular el resumen completo desde la tabla asesorias")
+    parser.parse_args()
+
+    database.init_db()
+    with database.SessionLocal() as db:
+        procesadas = reconstruir(db)
+        db.commit()
+    print(f"✅ Resumen reconstruido con {procesadas} asesorías")
+
+
+if __name__ == "__main__":
+    main()
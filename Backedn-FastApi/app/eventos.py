@@ -0,0 +1,228 @@
+"""
+Eventos de cambios en asesorías y ausencias para los clientes suscritos (SSE / WebSocket).
+
+Cada escritura emite un evento con las mismas etiquetas que usan la caché y
+los ETags (`asesorias:programador:<uid>`, `asesorias:usuario:<uid>`,
+`ausencias:programador:<uid>`). Con PostgreSQL el evento viaja por
+`NOTIFY` dentro de la transacción (solo se entrega si hay commit) y un
+único listener por worker lo reparte entre sus suscriptores en memoria.
+Sin PostgreSQL (SQLite, pruebas) se publica directamente en el broker en
+memoria del proceso.
+"""
+
+import asyncio
+import json
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from . import settings
+from .metrics import EVENTOS_SUSCRIPTORES
+
+# Canal de NOTIFY compartido por todos los workers
+CANAL_NOTIFY = "ppw_cambios"
+
+# Límite de payload de NOTIFY en PostgreSQL (bytes)
+MAX_PAYLOAD = 7900
+
+# Tipo de evento que pide al cliente recargar (se perdieron eventos)
+EVENTO_RESINCRONIZAR = {"tipo": "resincronizar"}
+
+
+def crear_evento(tipo: str, accion: str, ids: Iterable[int], canales: Iterable[str]) -> dict:
+    """tipo: asesoria | ausencia; accion: creada | actualizada | eliminada"""
+    return {"tipo": tipo, "accion": accion, "ids": sorted(ids), "canales": sorted(set(canales))}
+
+
+def _payload(evento: dict) -> str:
+    payload = json.dumps(evento, separators=(",", ":"))
+    if len(payload.encode()) > MAX_PAYLOAD:
+        # Lotes grandes: sin ids (el cliente recarga la vista del canal)
+        payload = json.dumps({**evento, "ids": None}, separators=(",", ":"))
+    return payload
+
+
+# ========== Broker en memoria (reparto dentro del proceso) ==========
+
+class Suscripcion:
+    """Cola de eventos de un cliente conectado."""
+
+    def __init__(self, canales: Set[str], max_cola: int):
+        self.canales = canales
+        self.loop = asyncio.get_running_loop()
+        self.cola: "asyncio.Queue[dict]" = asyncio.Queue(maxsize=max_cola)
+
+    def _entregar(self, evento: dict):
+        if self.cola.full():
+            # Cliente lento: se descartan los pendientes y se le pide recargar
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            evento = EVENTO_RESINCRONIZAR
+        self.cola.put_nowait(evento)
+
+    async def siguiente(self, timeout: float) -> Optional[dict]:
+        """Próximo evento, o None si pasa `timeout` sin eventos (momento del heartbeat)."""
+        try:
+            return await asyncio.wait_for(self.cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBroker:
+    """
+    Reparte eventos entre las suscripciones del proceso, indexadas por canal.
+
+    `publicar` se puede llamar desde cualquier hilo (los servicios síncronos
+    corren en el threadpool) mientras el loop suscribe y cancela: el índice
+    por canal se protege con un lock y la entrega se agenda en el loop del
+    suscriptor.
+
+    El gauge de suscriptores se actualiza al suscribir y al cancelar (y no
+    al hacer scrape): en modo multiproceso cada worker escribe su valor en
+    PROMETHEUS_MULTIPROC_DIR y /metrics los suma.
+    """
+
+    def __init__(self, max_cola: int = settings.EVENTOS_MAX_COLA):
+        self.max_cola = max_cola
+        self._por_canal: Dict[str, Set[Suscripcion]] = {}
+        self._activas: Set[Suscripcion] = set()
+        self._lock = threading.Lock()
+
+    def suscribir(self, canales: Iterable[str]) -> Suscripcion:
+        suscripcion = Suscripcion(set(canales), self.max_cola)
+        with self._lock:
+            self._activas.add(suscripcion)
+            for canal in suscripcion.canales:
+                self._por_canal.setdefault(canal, set()).add(suscripcion)
+        EVENTOS_SUSCRIPTORES.inc()
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion):
+        with self._lock:
+            if suscripcion not in self._activas:
+                # Ya cancelada: el gauge no se descuenta dos veces
+                return
+            self._activas.discard(suscripcion)
+            for canal in suscripcion.canales:
+                suscriptores = self._por_canal.get(canal)
+                if suscriptores is not None:
+                    suscriptores.discard(suscripcion)
+                    if not suscriptores:
+                        del self._por_canal[canal]
+        EVENTOS_SUSCRIPTORES.dec()
+
+    def publicar(self, evento: dict):
+        with self._lock:
+            destinatarios = set()
+            for canal in evento.get("canales", ()):
+                destinatarios.update(self._por_canal.get(canal, ()))
+        for suscripcion in destinatarios:
+            suscripcion.loop.call_soon_threadsafe(suscripcion._entregar, evento)
+
+    @property
+    def suscriptores(self) -> int:
+        with self._lock:
+            return len(self._activas)
+
+
+broker = MemoryBroker()
+
+
+# ========== Emisión desde los servicios ==========
+
+def usar_notify(db: Session) -> bool:
+    return settings.EVENTOS_BACKEND == "postgres" and db.get_bind().dialect.name == "postgresql"
+
+
+def emitir(db: Session, evento: dict):
+    """
+    Registra el evento en la transacción en curso; se entrega solo tras el commit.
+
+    Con PostgreSQL es un `pg_notify` dentro de la transacción. En otro caso se
+    guarda en la sesión y `publicar_confirmados` lo publica después del commit.
+    """
+    if usar_notify(db):
+        db.execute(select(func.pg_notify(CANAL_NOTIFY, _payload(evento))))
+    else:
+        db.info.setdefault("eventos_pendientes", []).append(evento)
+
+
+def publicar_confirmados(db: Session):
+    """Publica en el broker en memoria los eventos de la transacción ya confirmada."""
+    for evento in db.info.pop("eventos_pendientes", ()):
+        broker.publicar(evento)
+
+
+# ========== Listener de PostgreSQL (uno por worker) ==========
+
+class PostgresListener:
+    """
+    Conexión dedicada con LISTEN que reenvía cada NOTIFY al broker en memoria.
+
+    Los suscriptores inactivos no generan consultas: solo esta conexión espera
+    notificaciones. Si se cae, reconecta y pide a los clientes que recarguen.
+    """
+
+    def __init__(self, dsn: str, broker: MemoryBroker, reintento: float = 2.0):
+        # asyncpg no entiende el sufijo de driver de SQLAlchemy (postgresql+psycopg2://)
+        self.dsn = re.sub(r"^postgresql\+\w+://", "postgresql://", dsn)
+        self.broker = broker
+        self.reintento = reintento
+        self._tarea: Optional[asyncio.Task] = None
+
+    def _recibir(self, conexion, pid, canal, payload):
+        try:
+            self.broker.publicar(json.loads(payload))
+        except ValueError:
+            print(f"⚠️ Evento con payload inválido: {payload[:200]}")
+
+    def _resincronizar_todos(self):
+        canales = list(self.broker._por_canal)
+        if canales:
+            self.broker.publicar({**EVENTO_RESINCRONIZAR, "canales": canales})
+
+    async def _escuchar(self):
+        import asyncpg
+
+        primera = True
+        while True:
+            try:
+                conexion = await asyncpg.connect(self.dsn)
+                try:
+                    perdida = asyncio.get_running_loop().create_future()
+                    conexion.add_termination_listener(lambda c: perdida.done() or perdida.set_result(None))
+                    await conexion.add_listener(CANAL_NOTIFY, self._recibir)
+                    if not primera:
+                        # Se pudieron perder eventos mientras no había conexión
+                        self._resincronizar_todos()
+                    primera = False
+                    await perdida
+                finally:
+                    await conexion.close()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Listener de eventos desconectado: {e}")
+            await asyncio.sleep(self.reintento)
+
+    def iniciar(self):
+        self._tarea = asyncio.create_task(self._escuchar())
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+
+
+def canales_programador(programador_uid: str) -> List[str]:
+    return [f"asesorias:programador:{programador_uid}", f"ausencias:programador:{programador_uid}"]
+
+
+def canales_usuario(usuario_uid: str) -> List[str]:
+    return [f"asesorias:usuario:{usuario_uid}"]
@@ -0,0 +1,128 @@
+"""
+Exportación de listados completos como NDJSON o CSV con memoria constante.
+
+La consulta se lee con un cursor del servidor (stream_results + yield_per:
+en PostgreSQL un cursor con nombre, en SQLite el cursor de sqlite3) en
+lotes de EXPORTACION_LOTE filas, y cada lote se codifica y se envía antes
+de leer el siguiente. Ni las filas ni la respuesta se acumulan en memoria.
+
+La exportación usa su propia conexión (no la sesión de la petición), que
+se devuelve al pool en cuanto termina o el cliente se desconecta.
+"""
+
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Callable, Iterator, List, Sequence
+
+import anyio
+import anyio.lowlevel
+import orjson
+from sqlalchemy import Select
+
+from . import settings
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+# ========== Codificación ==========
+
+def _valor_csv(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, datetime):
+        return valor.isoformat()
+    return valor
+
+
+def codificador(formato: str, columnas: List[str]) -> Callable[[Sequence], bytes]:
+    """Función que convierte un lote de filas en bytes del formato pedido"""
+    if formato == "ndjson":
+        def ndjson(filas: Sequence) -> bytes:
+            return b"".join(orjson.dumps(dict(zip(columnas, fila))) + b"\n" for fila in filas)
+        return ndjson
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def csv_(filas: Sequence) -> bytes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_valor_csv(v) for v in fila] for fila in filas)
+        return buffer.getvalue().encode("utf-8")
+    return csv_
+
+
+def cabecera(formato: str, columnas: List[str]) -> bytes:
+    """Primera línea del archivo (solo CSV)"""
+    if formato != "csv":
+        return b""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columnas)
+    return buffer.getvalue().encode("utf-8")
+
+
+# ========== Lectura por lotes ==========
+
+def _lotes(engine, consulta: Select, lote: int) -> Iterator[Sequence]:
+    with engine.connect() as conn:
+        resultado = conn.execution_options(stream_results=True, yield_per=lote).execute(consulta)
+        yield from resultado.partitions()
+
+
+async def _lotes_sync(engine, consulta: Select, lote: int) -> AsyncIterator[Sequence]:
+    # Cada lote se lee en el threadpool; si se cancela (cliente desconectado),
+    # to_thread espera a que termine el lote en curso y luego cierra la conexión
+    lotes = _lotes(engine, consulta, lote)
+    try:
+        while True:
+            filas = await anyio.to_thread.run_sync(next, lotes, None)
+            if filas is None:
+                break
+            yield filas
+    finally:
+        with anyio.CancelScope(shield=True):
+            await anyio.to_thread.run_sync(lotes.close)
+
+
+async def _lotes_async(engine, consulta: Select, lote: int) -> AsyncIterator[Sequence]:
+    # Igual que en _lotes_sync: la cancelación no interrumpe un lote a medio leer
+    # (invalidaría la conexión), se atiende entre lotes
+    conn = await engine.connect()
+    resultado = None
+    try:
+        resultado = await conn.stream(consulta, execution_options={"yield_per": lote})
+        while True:
+            await anyio.lowlevel.checkpoint_if_cancelled()
+            with anyio.CancelScope(shield=True):
+                filas = await resultado.fetchmany(lote)
+            if not filas:
+                break
+            yield filas
+    finally:
+        with anyio.CancelScope(shield=True):
+            if resultado is not None:
+                await resultado.close()
+            await conn.close()
+
+
+async def generar(engine, consulta: Select, formato: str,
+                  lote: int = settings.EXPORTACION_LOTE) -> AsyncIterator[bytes]:
+    """
+    Bytes de la exportación, lote a lote.
+
+    `engine` puede ser síncrono o asíncrono (AsyncEngine); ver
+    database.engine_lectura.
+    """
+    columnas = [columna.key for columna in consulta.selected_columns]
+    codificar = codificador(formato, columnas)
+    lotes = _lotes_sync if not hasattr(engine, "sync_engine") else _lotes_async
+
+    primera_linea = cabecera(formato, columnas)
+    if primera_linea:
+        yield primera_linea
+    async for filas in lotes(engine, consulta, lote):
+        yield codificar(filas)
@@ -1,17 +1,32 @@
 """Configuración de Firebase Admin SDK para FastAPI"""
 
-import firebase_admin
-from firebase_admin import credentials
+import json
 import os
 
+# Ruta al archivo de credenciales
+CREDENTIALS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'firebase-credentials.json')
+
+def get_project_id():
+    """ID del proyecto Firebase (FIREBASE_PROJECT_ID o el archivo de credenciales)"""
+    project_id = os.getenv("FIREBASE_PROJECT_ID")
+    if project_id:
+        return project_id
+    with open(CREDENTIALS_PATH, encoding="utf-8") as f:
+        return json.load(f)["project_id"]
+
 def initialize_firebase():
-    """Inicializar Firebase Admin SDK"""
+    """
+    Inicializar Firebase Admin SDK.
+
+    La API verifica los tokens localmente (firebase_tokens) y no necesita el
+    Admin SDK para atender peticiones: se importa aquí, solo si se usa.
+    """
+    import firebase_admin
+    from firebase_admin import credentials
+
     if not firebase_admin._apps:
-        # Obtener la ruta al archivo de credenciales
-        cred_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'firebase-credentials.json')
-        
         try:
-            cred = credentials.Certificate(cred_path)
+            cred = credentials.Certificate(CREDENTIALS_PATH)
             firebase_admin.initialize_app(cred)
             print("✅ Firebase Admin SDK inicializado correctamente")
         except Exception as e:
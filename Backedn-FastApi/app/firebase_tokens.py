@@ -0,0 +1,199 @@
+"""Verificación local de ID tokens de Firebase con caché de tokens y de claves públicas."""
+
+import asyncio
+import hashlib
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+import jwt
+from cryptography.x509 import load_pem_x509_certificate
+from fastapi.concurrency import run_in_threadpool
+
+# Certificados públicos con los que Google firma los ID tokens de Firebase
+GOOGLE_CERTS_URL = (
+    "https://www.googleapis.com/robot/v1/metadata/x509/securetoken@system.gserviceaccount.com"
+)
+
+# Vigencia por defecto de las claves si la respuesta no trae Cache-Control
+DEFAULT_MAX_AGE = 3600
+
+# Margen antes de la expiración para refrescar las claves en segundo plano
+REFRESH_MARGIN = 300
+
+# Intervalo mínimo entre descargas provocadas por un kid desconocido
+MIN_REFETCH_INTERVAL = 60
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class InvalidTokenError(Exception):
+    """El token es inválido, está mal formado o expiró."""
+
+
+def parse_max_age(cache_control: Optional[str]) -> int:
+    """Obtiene max-age (segundos) de un header Cache-Control."""
+    match = _MAX_AGE_RE.search(cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_MAX_AGE
+
+
+class PublicKeyCache:
+    """
+    Caché de las claves públicas de Google (kid -> clave RSA).
+
+    Respeta el max-age de Cache-Control. Cuando faltan menos de REFRESH_MARGIN
+    segundos para expirar, devuelve las claves actuales y refresca en segundo plano.
+    """
+
+    def __init__(self, url: str = GOOGLE_CERTS_URL, clock: Callable[[], float] = time.time):
+        self.url = url
+        self.clock = clock
+        self._keys: Dict[str, object] = {}
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._fetched_at = float("-inf")
+        self._lock: Optional[asyncio.Lock] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def fetch(self) -> Tuple[Dict[str, str], int]:
+        """Descarga los certificados PEM y devuelve (certificados, max_age)."""
+        # Crear el cliente carga los certificados CA (trabajo síncrono): fuera del event loop
+        client = await run_in_threadpool(httpx.AsyncClient, timeout=10)
+        async with client:
+            response = await client.get(self.url)
+            response.raise_for_status()
+            return response.json(), parse_max_age(response.headers.get("cache-control"))
+
+    async def refresh(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        started = self._fetched_at
+        async with self._lock:
+            if self._fetched_at != started:
+                # Otra corutina descargó las claves mientras esperábamos el lock
+                return
+            certs, max_age = await self.fetch()
+            self._keys = {
+                kid: load_pem_x509_certificate(pem.encode()).public_key()
+                for kid, pem in certs.items()
+            }
+            self._fetched_at = self.clock()
+            self._expires_at = self._fetched_at + max_age
+            self._refresh_at = self._fetched_at + max(max_age - REFRESH_MARGIN, max_age / 2)
+
+    async def get_key(self, kid: str):
+        now = self.clock()
+        unknown_kid = kid not in self._keys and now - self._fetched_at >= MIN_REFETCH_INTERVAL
+        if now >= self._expires_at or unknown_kid:
+            # Sin claves vigentes (o rotación de kid): hay que esperar la descarga
+            await self.refresh()
+        elif now >= self._refresh_at:
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self.refresh())
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise InvalidTokenError("Unknown key id")
+        return key
+
+
+class VerifiedTokenCache:
+    """Caché LRU de tokens ya verificados, indexada por el hash SHA-256 del token."""
+
+    def __init__(self, max_entries: int = 10_000, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self.key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        claims, exp = entry
+        if self.clock() >= exp:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def put(self, token: str, claims: dict):
+        key = self.key(token)
+        self._entries[key] = (claims, float(claims["exp"]))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FirebaseTokenVerifier:
+    """
+    Verifica ID tokens de Firebase localmente (RS256 contra las claves de Google).
+
+    Aplica las mismas reglas que firebase_admin.auth.verify_id_token: audiencia
+    e issuer del proyecto, exp/iat/auth_time y sub no vacío.
+    """
+
+    def __init__(self, project_id: Callable[[], str], keys: Optional[PublicKeyCache] = None,
+                 cache: Optional[VerifiedTokenCache] = None, clock: Callable[[], float] = time.time):
+        self._project_id_loader = project_id
+        self._project_id: Optional[str] = None
+        self.keys = keys or PublicKeyCache(clock=clock)
+        self.cache = cache or VerifiedTokenCache(clock=clock)
+        self.clock = clock
+
+    async def verify(self, token: str) -> dict:
+        claims = self.cache.get(token)
+        if claims is not None:
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError:
+            raise InvalidTokenError("Malformed token")
+        if header.get("alg") != "RS256" or "kid" not in header:
+            raise InvalidTokenError("Invalid token header")
+
+        key = await self.keys.get_key(header["kid"])
+        # La verificación RSA y la lectura del project id van fuera del event loop
+        claims = await run_in_threadpool(self._decode, token, key)
+        self.cache.put(token, claims)
+        return claims
+
+    def cargar_project_id(self) -> str:
+        """Lee el project id una sola vez (archivo de credenciales o variable de entorno)."""
+        if self._project_id is None:
+            self._project_id = self._project_id_loader()
+        return self._project_id
+
+    def _decode(self, token: str, key) -> dict:
+        project_id = self.cargar_project_id()
+
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=["RS256"],
+                audience=project_id,
+                issuer=f"https://securetoken.google.com/{project_id}",
+                options={"require": ["exp", "iat", "sub"]},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidTokenError(str(e))
+
+        sub = claims.get("sub")
+        if not isinstance(sub, str) or not sub or len(sub) > 128:
+            raise InvalidTokenError("Invalid sub claim")
+        if claims.get("auth_time", 0) > self.clock():
+            raise InvalidTokenError("Invalid auth_time claim")
+
+        claims["uid"] = sub
+        return claims
@@ -0,0 +1,473 @@
+"""
+Importación de asesorías y ausencias desde un export JSON de Firestore.
+
+Reemplaza a migrate-firebase-to-apis.ts, que hacía un POST por documento
+(una transacción, un commit y los contadores de versión por fila). Aquí
+el archivo se lee en streaming, documento a documento; cada uno se valida
+con los schemas de la API, se descartan los repetidos y se cargan por lotes:
+
+- PostgreSQL: COPY a una tabla temporal y un INSERT ... SELECT ... ON
+  CONFLICT (origen_id) DO UPDATE por lote.
+- SQLite (pruebas locales): INSERT ... ON CONFLICT por lote.
+
+La clave de los upserts es el id del documento de origen (columna
+origen_id, migración 005): volver a importar el mismo export no duplica
+filas y solo reescribe las que cambiaron. Cada lote suma y resta su aporte
+al resumen de estadísticas en su transacción, como las escrituras de la API.
+
+Formato del archivo (el de firestore-export-import):
+    {"asesorias": {"<docId>": {...}}, "usuarios": {"<uid>": {"ausencias": [...], ...}}}
+También se acepta todo dentro de "__collections__" y una colección
+"ausencias" de primer nivel (documentos con programadorUid).
+
+Uso:
+    python -m app.importacion export.json
+    python -m app.importacion export.json --lote 10000
+    python -m app.importacion export.json --solo-validar
+"""
+
+import argparse
+import io
+import json
+import re
+import time as reloj
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import column, or_, select, table, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import estadisticas, models, schemas, versiones
+
+LOTE_POR_DEFECTO = 5000
+
+# Tamaño de cada lectura del archivo
+TAMANO_BLOQUE = 1 << 20
+
+
+class ErrorFormato(Exception):
+    """El archivo no tiene la estructura de un export de Firestore."""
+
+
+# ========== Lectura en streaming ==========
+
+class _LectorJSON:
+    """
+    Recorre un JSON de objetos anidados sin cargarlo entero.
+
+    Solo avanza por las claves de los dos primeros niveles; cada documento
+    se decodifica completo con json (raw_decode) a medida que se llega a él.
+    """
+
+    def __init__(self, archivo, tamano_bloque: int = TAMANO_BLOQUE):
+        self.archivo = archivo
+        self.tamano_bloque = tamano_bloque
+        self.buffer = ""
+        self.pos = 0
+        self.fin = False
+        self._decoder = json.JSONDecoder()
+
+    def _leer(self) -> bool:
+        if self.fin:
+            return False
+        bloque = self.archivo.read(self.tamano_bloque)
+        if not bloque:
+            self.fin = True
+            return False
+        self.buffer = self.buffer[self.pos:] + bloque
+        self.pos = 0
+        return True
+
+    def _siguiente(self) -> str:
+        """Primer carácter que no es espacio (sin consumirlo); '' al final del archivo"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._leer():
+                return ""
+
+    def _esperar(self, caracter: str):
+        encontrado = self._siguiente()
+        if encontrado != caracter:
+            raise ErrorFormato(f"Se esperaba '{caracter}' y se encontró '{encontrado or 'fin del archivo'}'")
+        self.pos += 1
+
+    def valor(self):
+        """Decodifica el valor completo que empieza en la posición actual"""
+        self._siguiente()
+        while True:
+            try:
+                valor, fin = self._decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._leer():
+                    continue
+                raise ErrorFormato("JSON incompleto o inválido")
+            # Un valor que llega justo al final del buffer puede seguir en el próximo bloque
+            if fin == len(self.buffer) and self._leer():
+                continue
+            self.pos = fin
+            return valor
+
+    def claves(self) -> Iterator[str]:
+        """
+        Claves del objeto que empieza en la posición actual. Después de cada
+        clave el consumidor debe leer su valor (valor() o claves()).
+        """
+        self._esperar("{")
+        if self._siguiente() == "}":
+            self.pos += 1
+            return
+        while True:
+            clave = self.valor()
+            if not isinstance(clave, str):
+                raise ErrorFormato("Clave de objeto inválida")
+            self._esperar(":")
+            yield clave
+            separador = self._siguiente()
+            self.pos += 1
+            if separador == "}":
+                return
+            if separador != ",":
+                raise ErrorFormato(f"Se esperaba ',' o '}}' y se encontró '{separador or 'fin del archivo'}'")
+
+
+def _ausencias_de_usuario(uid: str, usuario) -> Iterator[Tuple[str, str, dict]]:
+    # Las ausencias viven dentro del documento del programador (usuarios/{uid}.ausencias)
+    if not isinstance(usuario, dict) or not isinstance(usuario.get("ausencias"), list):
+        return
+    for ausencia in usuario["ausencias"]:
+        if not isinstance(ausencia, dict):
+            yield "ausencias", f"{uid}/?", ausencia
+            continue
+        # Sin id propio, la clave es el horario: el mismo bloque no se importa dos veces
+        clave = ausencia.get("id") or "{}_{}_{}".format(
+            ausencia.get("fecha"), ausencia.get("horaInicio"), ausencia.get("horaFin"))
+        yield "ausencias", f"{uid}/{clave}", {**ausencia, "programadorUid": uid}
+
+
+def documentos(archivo) -> Iterator[Tuple[str, str, dict]]:
+    """(tipo, origen_id, datos) de cada asesoría y ausencia del export, en orden de lectura"""
+    lector = _LectorJSON(archivo)
+
+    def colecciones():
+        for coleccion in lector.claves():
+            if coleccion == "__collections__":
+                yield from colecciones()
+            elif coleccion in ("asesorias", "ausencias"):
+                for doc_id in lector.claves():
+                    yield coleccion, doc_id, lector.valor()
+            elif coleccion == "usuarios":
+                for uid in lector.claves():
+                    yield from _ausencias_de_usuario(uid, lector.valor())
+            else:
+                lector.valor()
+
+    yield from colecciones()
+
+
+# ========== Validación ==========
+
+@lru_cache(maxsize=1024)
+def _snake(clave: str) -> str:
+    # Las mismas claves se repiten en todos los documentos
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", clave).lower()
+
+
+def momento(valor) -> Optional[datetime]:
+    """Timestamp de Firestore (dict con _seconds, epoch o ISO 8601) -> datetime UTC sin zona"""
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, dict):
+        if "value" in valor:  # {"__datatype__": "timestamp", "value": {...}}
+            return momento(valor["value"])
+        segundos = valor.get("_seconds", valor.get("seconds"))
+        if segundos is None:
+            raise ValueError("Timestamp sin segundos")
+        nanos = valor.get("_nanoseconds", valor.get("nanoseconds", 0))
+        return datetime.fromtimestamp(segundos + nanos / 1e9, timezone.utc).replace(tzinfo=None)
+    if isinstance(valor, (int, float)):
+        # Milisegundos (Date.now()) o segundos
+        segundos = valor / 1000 if valor > 1e11 else valor
+        return datetime.fromtimestamp(segundos, timezone.utc).replace(tzinfo=None)
+    instante = datetime.fromisoformat(str(valor).replace("Z", "+00:00"))
+    if instante.tzinfo is not None:
+        instante = instante.astimezone(timezone.utc).replace(tzinfo=None)
+    return instante
+
+
+def _fecha(valor):
+    # "2025-03-01T00:00:00.000Z" (new Date().toISOString()) o timestamp -> "YYYY-MM-DD"
+    if isinstance(valor, str):
+        return valor[:10]
+    if isinstance(valor, (dict, int, float)):
+        return momento(valor).date().isoformat()
+    return valor
+
+
+def _hora(valor):
+    # "9:00" -> "09:00", "09:00:00" -> "09:00"
+    if isinstance(valor, str):
+        horas, _, resto = valor.partition(":")
+        return f"{horas.zfill(2)}:{resto[:2]}" if resto else valor
+    return valor
+
+
+def asesoria(origen_id: str, datos: dict) -> dict:
+    """
+    Fila de asesorias a partir del documento.
+
+    Raises:
+        ValueError / ValidationError: si el documento no cumple el schema de la API
+    """
+    campos = {_snake(k): v for k, v in datos.items()}
+    campos["fecha_solicitada"] = _fecha(campos.get("fecha_solicitada"))
+    campos["hora_solicitada"] = _hora(campos.get("hora_solicitada"))
+    fila = schemas.AsesoriaCreate(**campos).model_dump()
+    # Sin fecha de creación en el origen, la de la solicitud: la fila no cambia al reimportar
+    fila["fecha_creacion"] = momento(campos.get("fecha")) or datetime.fromisoformat(fila["fecha_solicitada"])
+    fila["fecha_respuesta"] = momento(campos.get("fecha_respuesta"))
+    fila["origen_id"] = origen_id
+    return fila
+
+
+def ausencia(origen_id: str, datos: dict) -> dict:
+    """
+    Fila de ausencias a partir del documento.
+
+    Raises:
+        ValueError / ValidationError: si el documento no cumple el schema de la API
+    """
+    campos = {_snake(k): v for k, v in datos.items() if k != "id"}
+    campos["fecha"] = _fecha(campos.get("fecha"))
+    campos["hora_inicio"] = _hora(campos.get("hora_inicio"))
+    campos["hora_fin"] = _hora(campos.get("hora_fin"))
+    fila = schemas.AusenciaCreate(**campos).model_dump()
+    if fila["hora_inicio"] >= fila["hora_fin"]:
+        raise ValueError("hora_inicio debe ser anterior a hora_fin")
+    fila["origen_id"] = origen_id
+    return fila
+
+
+def _descripcion_error(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, e['loc'])) or 'documento'}: {e['msg']}" for e in error.errors())
+    return str(error)
+
+
+# ========== Carga por lotes ==========
+
+# Modelo, constructor de la fila y columnas que devuelve el upsert (etiquetas de versión
+# y, en las asesorías, el aporte al resumen de estadísticas)
+TIPOS = {
+    "asesorias": (models.Asesoria, asesoria, ("usuario_uid", *(c.key for c in estadisticas.COLUMNAS))),
+    "ausencias": (models.Ausencia, ausencia, ("programador_uid",)),
+}
+
+
+def _tags(tipo: str, fila) -> List[str]:
+    if tipo == "asesorias":
+        return [versiones.TAG_ASESORIAS, versiones.tag_id(tipo, fila.id),
+                f"asesorias:usuario:{fila.usuario_uid}", f"asesorias:programador:{fila.programador_uid}"]
+    return [versiones.TAG_AUSENCIAS, versiones.tag_id(tipo, fila.id),
+            f"ausencias:programador:{fila.programador_uid}"]
+
+
+def _texto_copy(valor) -> str:
+    # Formato text de COPY: \N es NULL; barra, tabulador y saltos de línea escapados
+    if valor is None:
+        return "\\N"
+    return (str(valor).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+def _copiar(db: Session, tabla_temporal: str, origen: str, columnas: List[str], filas: List[dict]):
+    """COPY de las filas a una tabla temporal con las columnas de `origen` (vacía en cada commit)"""
+    lista = ", ".join(columnas)
+    db.execute(text(
+        f"CREATE TEMP TABLE IF NOT EXISTS {tabla_temporal} ON COMMIT DELETE ROWS "
+        f"AS SELECT {lista} FROM {origen} WITH NO DATA"
+    ))
+    contenido = io.StringIO("".join(
+        "\t".join(_texto_copy(fila[c]) for c in columnas) + "\n" for fila in filas
+    ))
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {tabla_temporal} ({lista}) FROM STDIN", contenido)
+    finally:
+        cursor.close()
+
+
+def _upsert(db: Session, model, filas: List[dict], devueltas: Tuple[str, ...]):
+    """
+    Inserta las filas nuevas y actualiza las que cambiaron (clave origen_id).
+    Devuelve las filas escritas (id, origen_id y las columnas `devueltas`, con los valores nuevos).
+    """
+    tabla = model.__table__
+    columnas = list(filas[0])
+    dialecto = db.get_bind().dialect.name
+
+    if dialecto == "postgresql":
+        temporal = f"importacion_{tabla.name}"
+        _copiar(db, temporal, tabla.name, columnas, filas)
+        origen = table(temporal, *(column(c) for c in columnas))
+        stmt = pg_insert(tabla).from_select(columnas, select(*origen.c))
+    else:
+        stmt = sqlite_insert(tabla)
+
+    actualizables = [c for c in columnas if c != "origen_id"]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[tabla.c.origen_id],
+        set_={c: stmt.excluded[c] for c in actualizables},
+        # Solo las filas que cambiaron: reimportar el mismo export no escribe nada
+        where=or_(*(tabla.c[c].is_distinct_from(stmt.excluded[c]) for c in actualizables)),
+    ).returning(tabla.c.id, tabla.c.origen_id, *(tabla.c[c] for c in devueltas))
+
+    if dialecto == "postgresql":
+        return db.execute(stmt).all()
+    return db.execute(stmt, filas).all()
+
+
+def cargar_lote(engine: Engine, tipo: str, filas: List[dict]) -> Tuple[int, int]:
+    """
+    Escribe un lote en una transacción, con los contadores de versión de las
+    filas afectadas (las claves de la caché de lectura de todos los servidores
+    llevan esas versiones) y, en las asesorías, el cambio en el resumen de
+    estadísticas. Devuelve (nuevas, actualizadas).
+    """
+    model, _, devueltas = TIPOS[tipo]
+    with Session(engine) as db:
+        consulta = select(model.origen_id, *(model.__table__.c[c] for c in devueltas)).where(
+            model.origen_id.in_([fila["origen_id"] for fila in filas])
+        )
+        if tipo == "asesorias":
+            # Como en update_bulk: el aporte anterior no puede cambiar hasta el commit (filas en orden de id)
+            consulta = consulta.order_by(model.id).with_for_update()
+        existentes = {fila.origen_id: fila for fila in db.execute(consulta)}
+        escritas = _upsert(db, model, filas, devueltas)
+        if tipo == "asesorias":
+            estadisticas.actualizar(
+                db,
+                antes=[existentes[fila.origen_id]._mapping for fila in escritas if fila.origen_id in existentes],
+                despues=[fila._mapping for fila in escritas],
+            )
+        tags = {tag for fila in escritas for tag in _tags(tipo, fila)}
+        versiones.incrementar(db, tags - versiones.TAGS_GLOBALES)
+        db.commit()
+        versiones.incrementar_globales(db, tags)
+    actualizadas = sum(1 for fila in escritas if fila.origen_id in existentes)
+    return len(escritas) - actualizadas, actualizadas
+
+
+# ========== Importación ==========
+
+class Progreso:
+    """Contadores por tipo y ritmo de la importación"""
+
+    CONTADORES = ("leidos", "invalidos", "repetidos", "nuevos", "actualizados")
+
+    def __init__(self, clock=reloj.perf_counter):
+        self.clock = clock
+        self.inicio = clock()
+        self.por_tipo = {tipo: dict.fromkeys(self.CONTADORES, 0) for tipo in TIPOS}
+
+    def total(self, contador: str) -> int:
+        return sum(c[contador] for c in self.por_tipo.values())
+
+    def docs_por_segundo(self) -> float:
+        segundos = self.clock() - self.inicio
+        return self.total("leidos") / segundos if segundos > 0 else 0.0
+
+    def linea(self) -> str:
+        return (f"{self.total('leidos'):>10,} documentos  {self.docs_por_segundo():>9,.0f} docs/s  "
+                f"nuevos {self.total('nuevos'):,}  actualizados {self.total('actualizados'):,}  "
+                f"inválidos {self.total('invalidos'):,}  repetidos {self.total('repetidos'):,}")
+
+    def resumen(self) -> dict:
+        return {"segundos": round(self.clock() - self.inicio, 3),
+                "docs_por_segundo": round(self.docs_por_segundo(), 1), **self.por_tipo}
+
+
+def importar(engine: Optional[Engine], archivo, lote: int = LOTE_POR_DEFECTO, solo_validar: bool = False,
+             max_errores_mostrados: int = 20, mostrar: bool = True) -> dict:
+    """
+    Importa el export (archivo de texto abierto) y devuelve el resumen por tipo.
+
+    Con `solo_validar` lee y valida todo sin escribir (engine puede ser None).
+    """
+    progreso = Progreso()
+    pendientes: Dict[str, Dict[str, dict]] = {tipo: {} for tipo in TIPOS}
+    errores_mostrados = 0
+
+    def vaciar(tipo: str):
+        filas = list(pendientes[tipo].values())
+        pendientes[tipo].clear()
+        if filas and not solo_validar:
+            nuevas, actualizadas = cargar_lote(engine, tipo, filas)
+            progreso.por_tipo[tipo]["nuevos"] += nuevas
+            progreso.por_tipo[tipo]["actualizados"] += actualizadas
+        if mostrar:
+            print(f"⏳ {progreso.linea()}", flush=True)
+
+    for tipo, origen_id, datos in documentos(archivo):
+        contadores = progreso.por_tipo[tipo]
+        contadores["leidos"] += 1
+        try:
+            if not isinstance(datos, dict):
+                raise ValueError("El documento no es un objeto")
+            fila = TIPOS[tipo][1](origen_id, datos)
+        except (ValueError, TypeError, OverflowError, ValidationError) as e:
+            contadores["invalidos"] += 1
+            if mostrar and errores_mostrados < max_errores_mostrados:
+                errores_mostrados += 1
+                print(f"⚠️ {tipo}/{origen_id}: {_descripcion_error(e)}")
+            continue
+        # Repetido dentro del lote: gana el último (ON CONFLICT no admite la misma clave dos veces)
+        if origen_id in pendientes[tipo]:
+            contadores["repetidos"] += 1
+        pendientes[tipo][origen_id] = fila
+        if len(pendientes[tipo]) >= lote:
+            vaciar(tipo)
+
+    for tipo in TIPOS:
+        if pendientes[tipo]:
+            vaciar(tipo)
+
+    return progreso.resumen()
+
+
+def main():
+    from . import database
+
+    parser = argparse.ArgumentParser(description="Importa asesorías y ausencias desde un export JSON de Firestore")
+    parser.add_argument("archivo", help="Export JSON de Firestore")
+    parser.add_argument("--lote", type=int, default=LOTE_POR_DEFECTO, help="Filas por transacción")
+    parser.add_argument("--solo-validar", action="store_true", help="Leer y validar sin escribir")
+    parser.add_argument("--max-errores", type=int, default=20, help="Documentos inválidos a mostrar")
+    args = parser.parse_args()
+
+    engine = None
+    if not args.solo_validar:
+        database.init_db()
+        engine = database.engine
+    with open(args.archivo, encoding="utf-8") as archivo:
+        try:
+            resumen = importar(engine, archivo, args.lote, args.solo_validar, args.max_errores)
+        except ErrorFormato as e:
+            raise SystemExit(f"❌ {args.archivo}: {e}")
+
+    for tipo in TIPOS:
+        c = resumen[tipo]
+        print(f"✅ {tipo}: {c['leidos']:,} leídos, {c['nuevos']:,} nuevos, {c['actualizados']:,} actualizados, "
+              f"{c['invalidos']:,} inválidos, {c['repetidos']:,} repetidos")
+    print(f"⏱️ {resumen['segundos']:.1f}s ({resumen['docs_por_segundo']:,.0f} documentos/s)")
+
+
+if __name__ == "__main__":
+    main()
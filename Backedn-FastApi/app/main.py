@@ -1,17 +1,64 @@
-from fastapi import FastAPI, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import APIRouter, FastAPI, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
+import orjson
+from datetime import date, time
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 
-from . import models, schemas, database, service
-from .auth import verify_firebase_token
-from .firebase_config import initialize_firebase
+from . import admision, busqueda, schemas, database, eventos, exportacion, migraciones, service, settings, versiones
+from .metrics import MetricsMiddleware, exportar as exportar_metricas
+from .cache import query_cache
+from .disponibilidad import ConflictoHorarioError
+from .auth import token_verifier, verify_firebase_token, verify_stream_token
+from .pagination import MAX_LIMIT, InvalidCursorError, Page, decode_cursor, decode_rank_cursor
 
-# Inicializar Firebase Admin SDK
-initialize_firebase()
+async def _precargar_claves_firebase():
+    """Descarga las claves públicas de Google sin bloquear el arranque"""
+    try:
+        await token_verifier.keys.refresh()
+    except Exception as e:
+        print(f"⚠️ No se pudieron precargar las claves de Firebase: {e}")
 
-models.Base.metadata.create_all(bind=database.engine)
-app = FastAPI(title="Asesorías y Ausencias API - FastAPI")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicialización al arrancar cada worker (y no al importar el módulo).
+
+    El esquema ya no se crea con create_all: las migraciones se aplican con
+    `python -m app.migraciones` o, si se pide, aquí con DB_MIGRATE_ON_STARTUP=1.
+    """
+    database.init_db()
+    if settings.DB_MIGRATE_ON_STARTUP:
+        await run_in_threadpool(migraciones.aplicar, database.engine)
+
+    # Sin project id no se puede verificar ningún token: mejor fallar al arrancar
+    await run_in_threadpool(token_verifier.cargar_project_id)
+    precarga = asyncio.create_task(_precargar_claves_firebase())
+
+    # Una sola conexión LISTEN por worker reparte los NOTIFY entre sus clientes
+    listener = None
+    if settings.EVENTOS_BACKEND == "postgres":
+        listener = eventos.PostgresListener(settings.EVENTOS_DATABASE_URL, eventos.broker)
+        listener.iniciar()
+
+    yield
+
+    precarga.cancel()
+    if listener is not None:
+        await listener.detener()
+    await database.close_db()
+
+app = FastAPI(title="Asesorías y Ausencias API - FastAPI", lifespan=lifespan)
+
+# Concurrencia por ruta y rechazo con el pool saturado (dentro de CORS: los 503 llevan sus headers)
+if settings.ADMISION_ACTIVA:
+    # Solo las rutas de `router` (/api); se leen al llegar cada petición
+    app.add_middleware(admision.AdmisionMiddleware, rutas=lambda: router.routes)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,8 +66,40 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Retry-After"],
 )
 
+# Compresión de respuestas grandes (listados): brotli si está instalado, si no gzip
+COMPRESION_MIN_BYTES = 1024
+try:
+    from brotli_asgi import BrotliMiddleware
+    app.add_middleware(BrotliMiddleware, minimum_size=COMPRESION_MIN_BYTES, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESION_MIN_BYTES)
+
+# Tiempos por ruta y sentencias SQL por petición (el más externo: mide también la compresión)
+app.add_middleware(MetricsMiddleware)
+
+# Máximo de elementos por petición en los endpoints /bulk
+MAX_BULK = 1000
+
+# Máximo de días consultables en /disponibilidad y /calendario
+MAX_DIAS_DISPONIBILIDAD = 92
+
+# Máximo de programadores por petición en /calendario
+MAX_PROGRAMADORES_CALENDARIO = 100
+
+@app.exception_handler(ConflictoHorarioError)
+async def conflicto_horario_handler(request: Request, exc: ConflictoHorarioError):
+    return JSONResponse(status_code=status.HTTP_409_CONFLICT, content={"detail": str(exc)})
+
+@app.exception_handler(PoolTimeoutError)
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError):
+    # No hubo conexión libre en DB_POOL_TIMEOUT: el cliente debe reintentar, no es un error del servidor
+    return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        content={"detail": "Servicio saturado, reintente más tarde"},
+                        headers={"Retry-After": str(settings.ADMISION_RETRY_AFTER_S)})
+
 # ========== Endpoint Público ==========
 
 @app.get("/health")
@@ -28,151 +107,576 @@ def health_check():
     """Endpoint de salud (sin autenticación)"""
     return {"status": "ok", "service": "FastAPI - Asesorías y Ausencias"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas en formato Prometheus (sin autenticación, como /health)"""
+    contenido, content_type = exportar_metricas()
+    return Response(content=contenido, media_type=content_type)
+
 # ========== Dependencias ==========
 
-def get_asesoria_service(db: Session = Depends(database.get_db)):
-    return service.AsesoriaService(db)
+def get_asesoria_service(db=Depends(database.get_session)):
+    return service.AsyncAsesoriaService(db)
+
+def get_ausencia_service(db=Depends(database.get_session)):
+    return service.AsyncAusenciaService(db)
+
+def get_disponibilidad_service(db=Depends(database.get_session)):
+    return service.AsyncDisponibilidadService(db)
+
+def get_calendario_service(db=Depends(database.get_session)):
+    return service.AsyncCalendarioService(db)
+
+def get_estadisticas_service(db=Depends(database.get_session)):
+    return service.AsyncEstadisticasService(db)
+
+def get_version_service(db=Depends(database.get_session)):
+    return service.AsyncVersionService(db)
+
+def etag_de(*plantillas: str):
+    """
+    Dependencia de GET condicional.
+
+    Calcula el ETag con los contadores de versión de las etiquetas (las
+    plantillas se completan con los parámetros de ruta) y responde 304 sin
+    leer filas si coincide con If-None-Match.
+    """
+    async def dependencia(request: Request,
+                          version_service: service.AsyncVersionService = Depends(get_version_service)) -> str:
+        tags = [plantilla.format(**request.path_params) for plantilla in plantillas]
+        return await etag_condicional(request, version_service, tags)
+    return dependencia
 
-def get_ausencia_service(db: Session = Depends(database.get_db)):
-    return service.AusenciaService(db)
+async def etag_condicional(request: Request, version_service: service.AsyncVersionService,
+                           tags: List[str]) -> str:
+    """
+    ETag de la petición con las versiones de `tags`; 304 si coincide con If-None-Match.
+
+    Las versiones leídas quedan en request.state.versiones: las rutas con caché
+    de lectura las usan en la clave, así la página cacheada y el ETag siempre
+    corresponden a la misma versión (en cualquier worker).
+    """
+    recurso = request.url.path + "?" + request.url.query
+    request.state.versiones = await version_service.get_versiones(tags)
+    etag = versiones.etag(recurso, request.state.versiones)
+    if versiones.coincide(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabeceras_etag(etag))
+    return etag
+
+def cabeceras_etag(etag: str) -> dict:
+    # no-cache: el cliente puede guardar la respuesta pero debe revalidarla
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+def get_listado_params(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_LIMIT, description="Máximo de filas por página"),
+    after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    desde: Optional[date] = Query(None, description="Fecha mínima (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Fecha máxima (YYYY-MM-DD)"),
+):
+    """Parámetros comunes de paginación por cursor y rango de fechas"""
+    try:
+        after_id = decode_cursor(after) if after else None
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return {"limit": limit, "after": after_id, "desde": desde, "hasta": hasta}
+
+def validar_lote(items: list):
+    """Rechaza lotes vacíos o mayores que MAX_BULK"""
+    if not items:
+        raise HTTPException(status_code=400, detail="El lote está vacío")
+    if len(items) > MAX_BULK:
+        raise HTTPException(status_code=413, detail=f"Máximo {MAX_BULK} elementos por lote")
+
+def responder_json(items: list, etag: Optional[str] = None, headers: Optional[dict] = None) -> Response:
+    """
+    Serializa filas ya proyectadas con orjson.
+
+    Evita la segunda validación con Pydantic del response_model (que se
+    mantiene en la ruta solo para la documentación OpenAPI).
+    """
+    headers = dict(headers or {})
+    if etag:
+        headers.update(cabeceras_etag(etag))
+    return Response(content=orjson.dumps(items), media_type="application/json", headers=headers)
+
+def responder_pagina(page: Page, etag: Optional[str] = None) -> Response:
+    """Devuelve los elementos de la página y expone el siguiente cursor en X-Next-Cursor"""
+    headers = {"X-Next-Cursor": page.next_cursor} if page.next_cursor else None
+    return responder_json(page.items, etag, headers)
+
+def responder_exportacion(request: Request, consulta, formato: str, nombre: str) -> StreamingResponse:
+    """
+    Envía todas las filas de `consulta` como NDJSON o CSV a medida que se leen.
+
+    Si el cliente se desconecta, la lectura se detiene y la conexión vuelve al pool.
+    """
+    return StreamingResponse(
+        exportacion.generar(database.engine_lectura(request), consulta, formato),
+        media_type=exportacion.FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"',
+                 "Cache-Control": "no-store"},
+    )
+
+FORMATO_EXPORTACION = Query("ndjson", pattern="^(ndjson|csv)$", description="ndjson (una fila JSON por línea) o csv")
+
+# Todas las rutas /api/* exigen un ID token de Firebase válido
+router = APIRouter(prefix="/api", dependencies=[Depends(verify_firebase_token), Depends(admision.limitar_tasa)])
 
 # ========== Endpoints de Asesorías (Requieren Autenticación) ==========
 
-@app.get("/api/asesorias", response_model=List[schemas.AsesoriaOut])
-def get_asesorias(
-    asesoria_service: service.AsesoriaService = Depends(get_asesoria_service)
+@router.get("/asesorias", response_model=List[schemas.AsesoriaOut])
+async def get_asesorias(
+    estado: Optional[str] = None,
+    programador_uid: Optional[str] = None,
+    params: dict = Depends(get_listado_params),
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service),
+    etag: str = Depends(etag_de(versiones.TAG_ASESORIAS))
 ):
     """Obtener todas las asesorías"""
-    return asesoria_service.get_all()
+    page = await asesoria_service.get_all(programador_uid=programador_uid, estado=estado, **params)
+    return responder_pagina(page, etag)
+
+# Antes de /asesorias/{asesoria_id} para que "buscar" no se tome como id
+@router.get("/asesorias/buscar", response_model=List[schemas.AsesoriaBusqueda])
+async def buscar_asesorias(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar en tema, descripción y respuesta"),
+    programador_uid: Optional[str] = None,
+    estado: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=MAX_LIMIT, description="Máximo de resultados por página"),
+    after: Optional[str] = Query(None, description="Cursor devuelto en X-Next-Cursor"),
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service),
+    etag: str = Depends(etag_de(versiones.TAG_ASESORIAS))
+):
+    """Buscar asesorías por texto, ordenadas por relevancia"""
+    try:
+        cursor = decode_rank_cursor(after) if after else None
+    except InvalidCursorError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    try:
+        page = await asesoria_service.buscar(q, limit, cursor, programador_uid=programador_uid, estado=estado)
+    except busqueda.ConsultaVaciaError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return responder_pagina(page, etag)
+
+@router.get("/asesorias/exportar")
+async def exportar_asesorias(
+    request: Request,
+    formato: str = FORMATO_EXPORTACION,
+    estado: Optional[str] = None,
+    programador_uid: Optional[str] = None,
+    usuario_uid: Optional[str] = None,
+    desde: Optional[date] = Query(None, description="Fecha mínima (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Fecha máxima (YYYY-MM-DD)"),
+):
+    """Exportar todas las asesorías que cumplen los filtros (NDJSON o CSV, en streaming)"""
+    consulta = service.consulta_exportacion_asesorias(
+        programador_uid=programador_uid, usuario_uid=usuario_uid, estado=estado, desde=desde, hasta=hasta,
+    )
+    return responder_exportacion(request, consulta, formato, "asesorias")
 
-@app.get("/api/asesorias/{asesoria_id}", response_model=schemas.AsesoriaOut)
-def get_asesoria(
+@router.get("/asesorias/{asesoria_id}", response_model=schemas.AsesoriaOut)
+async def get_asesoria(
     asesoria_id: int,
-    asesoria_service: service.AsesoriaService = Depends(get_asesoria_service)
+    response: Response,
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service),
+    etag: str = Depends(etag_de(versiones.tag_id("asesorias", "{asesoria_id}")))
 ):
     """Obtener una asesoría por ID"""
-    asesoria = asesoria_service.get_by_id(asesoria_id)
+    asesoria = await asesoria_service.get_by_id(asesoria_id)
     if not asesoria:
         raise HTTPException(status_code=404, detail="Asesoría no encontrada")
+    response.headers.update(cabeceras_etag(etag))
     return asesoria
 
-@app.get("/api/asesorias/usuario/{usuario_uid}", response_model=List[schemas.AsesoriaOut])
-def get_asesorias_usuario(
+@router.get("/asesorias/usuario/{usuario_uid}", response_model=List[schemas.AsesoriaOut])
+async def get_asesorias_usuario(
     usuario_uid: str,
-    asesoria_service: service.AsesoriaService = Depends(get_asesoria_service)
+    request: Request,
+    estado: Optional[str] = None,
+    params: dict = Depends(get_listado_params),
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service),
+    etag: str = Depends(etag_de("asesorias:usuario:{usuario_uid}"))
 ):
     """Obtener todas las asesorías de un usuario"""
-    return asesoria_service.get_by_usuario(usuario_uid)
+    page = await asesoria_service.get_by_usuario(usuario_uid, request.state.versiones, estado=estado, **params)
+    return responder_pagina(page, etag)
 
-@app.get("/api/asesorias/programador/{programador_uid}", response_model=List[schemas.AsesoriaOut])
-def get_asesorias_programador(
+@router.get("/asesorias/programador/{programador_uid}", response_model=List[schemas.AsesoriaOut])
+async def get_asesorias_programador(
     programador_uid: str,
-    asesoria_service: service.AsesoriaService = Depends(get_asesoria_service)
+    request: Request,
+    estado: Optional[str] = None,
+    params: dict = Depends(get_listado_params),
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service),
+    etag: str = Depends(etag_de("asesorias:programador:{programador_uid}"))
 ):
     """Obtener todas las asesorías de un programador"""
-    return asesoria_service.get_by_programador(programador_uid)
+    page = await asesoria_service.get_by_programador(programador_uid, request.state.versiones, estado=estado, **params)
+    return responder_pagina(page, etag)
 
-@app.get("/api/asesorias/programador/{programador_uid}/pendientes", response_model=List[schemas.AsesoriaOut])
-def get_asesorias_pendientes(
+@router.get("/asesorias/programador/{programador_uid}/pendientes", response_model=List[schemas.AsesoriaOut])
+async def get_asesorias_pendientes(
     programador_uid: str,
-    asesoria_service: service.AsesoriaService = Depends(get_asesoria_service)
+    request: Request,
+    params: dict = Depends(get_listado_params),
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service),
+    etag: str = Depends(etag_de("asesorias:programador:{programador_uid}"))
 ):
     """Obtener asesorías pendientes de un programador"""
-    return asesoria_service.get_pendientes_by_programador(programador_uid)
+    page = await asesoria_service.get_pendientes_by_programador(programador_uid, request.state.versiones, **params)
+    return responder_pagina(page, etag)
 
-@app.post("/api/asesorias", response_model=schemas.AsesoriaOut, status_code=status.HTTP_201_CREATED)
-def create_asesoria(
+@router.post("/asesorias", response_model=schemas.AsesoriaOut, status_code=status.HTTP_201_CREATED)
+async def create_asesoria(
     asesoria: schemas.AsesoriaCreate,
-    asesoria_service: service.AsesoriaService = Depends(get_asesoria_service)
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service)
 ):
     """Crear una nueva asesoría"""
-    return asesoria_service.create(asesoria)
+    return await asesoria_service.create(asesoria)
+
+@router.post("/asesorias/bulk", response_model=schemas.BulkResult)
+async def create_asesorias_bulk(
+    asesorias: List[schemas.AsesoriaCreate],
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service)
+):
+    """Crear varias asesorías en una sola transacción"""
+    validar_lote(asesorias)
+    return await asesoria_service.create_bulk(asesorias)
+
+@router.patch("/asesorias/bulk", response_model=schemas.BulkResult)
+async def update_asesorias_bulk(
+    asesorias: List[schemas.AsesoriaBulkUpdate],
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service)
+):
+    """Actualizar (p. ej. aprobar/rechazar) varias asesorías en una sola transacción"""
+    validar_lote(asesorias)
+    return await asesoria_service.update_bulk(asesorias)
+
+@router.delete("/asesorias/bulk", response_model=schemas.BulkResult)
+async def delete_asesorias_bulk(
+    lote: schemas.BulkDelete,
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service)
+):
+    """Eliminar varias asesorías en una sola sentencia"""
+    validar_lote(lote.ids)
+    return await asesoria_service.delete_bulk(lote.ids)
 
-@app.put("/api/asesorias/{asesoria_id}", response_model=schemas.AsesoriaOut)
-def update_asesoria(
+@router.put("/asesorias/{asesoria_id}", response_model=schemas.AsesoriaOut)
+async def update_asesoria(
     asesoria_id: int,
     asesoria: schemas.AsesoriaUpdate,
-    asesoria_service: service.AsesoriaService = Depends(get_asesoria_service)
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service)
 ):
     """Actualizar una asesoría"""
-    updated = asesoria_service.update(asesoria_id, asesoria)
+    updated = await asesoria_service.update(asesoria_id, asesoria)
     if not updated:
         raise HTTPException(status_code=404, detail="Asesoría no encontrada")
     return updated
 
-@app.delete("/api/asesorias/{asesoria_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_asesoria(
+@router.delete("/asesorias/{asesoria_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_asesoria(
     asesoria_id: int,
-    asesoria_service: service.AsesoriaService = Depends(get_asesoria_service)
+    asesoria_service: service.AsyncAsesoriaService = Depends(get_asesoria_service)
 ):
     """Eliminar una asesoría"""
-    if not asesoria_service.delete(asesoria_id):
+    if not await asesoria_service.delete(asesoria_id):
         raise HTTPException(status_code=404, detail="Asesoría no encontrada")
     return None
 
 # ========== Endpoints de Ausencias (Requieren Autenticación) ==========
 
-@app.get("/api/ausencias", response_model=List[schemas.AusenciaOut])
-def get_ausencias(
-    ausencia_service: service.AusenciaService = Depends(get_ausencia_service)
+@router.get("/ausencias", response_model=List[schemas.AusenciaOut])
+async def get_ausencias(
+    programador_uid: Optional[str] = None,
+    params: dict = Depends(get_listado_params),
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service),
+    etag: str = Depends(etag_de(versiones.TAG_AUSENCIAS))
 ):
     """Obtener todas las ausencias"""
-    return ausencia_service.get_all()
+    page = await ausencia_service.get_all(programador_uid=programador_uid, **params)
+    return responder_pagina(page, etag)
+
+@router.get("/ausencias/exportar")
+async def exportar_ausencias(
+    request: Request,
+    formato: str = FORMATO_EXPORTACION,
+    programador_uid: Optional[str] = None,
+    desde: Optional[date] = Query(None, description="Fecha mínima (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Fecha máxima (YYYY-MM-DD)"),
+):
+    """Exportar todas las ausencias que cumplen los filtros (NDJSON o CSV, en streaming)"""
+    consulta = service.consulta_exportacion_ausencias(programador_uid=programador_uid, desde=desde, hasta=hasta)
+    return responder_exportacion(request, consulta, formato, "ausencias")
 
-@app.get("/api/ausencias/{ausencia_id}", response_model=schemas.AusenciaOut)
-def get_ausencia(
+@router.get("/ausencias/{ausencia_id}", response_model=schemas.AusenciaOut)
+async def get_ausencia(
     ausencia_id: int,
-    ausencia_service: service.AusenciaService = Depends(get_ausencia_service)
+    response: Response,
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service),
+    etag: str = Depends(etag_de(versiones.tag_id("ausencias", "{ausencia_id}")))
 ):
     """Obtener una ausencia por ID"""
-    ausencia = ausencia_service.get_by_id(ausencia_id)
+    ausencia = await ausencia_service.get_by_id(ausencia_id)
     if not ausencia:
         raise HTTPException(status_code=404, detail="Ausencia no encontrada")
+    response.headers.update(cabeceras_etag(etag))
     return ausencia
 
-@app.get("/api/ausencias/programador/{programador_uid}", response_model=List[schemas.AusenciaOut])
-def get_ausencias_programador(
+@router.get("/ausencias/programador/{programador_uid}", response_model=List[schemas.AusenciaOut])
+async def get_ausencias_programador(
     programador_uid: str,
-    ausencia_service: service.AusenciaService = Depends(get_ausencia_service)
+    request: Request,
+    params: dict = Depends(get_listado_params),
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service),
+    etag: str = Depends(etag_de("ausencias:programador:{programador_uid}"))
 ):
     """Obtener todas las ausencias de un programador"""
-    return ausencia_service.get_by_programador(programador_uid)
+    page = await ausencia_service.get_by_programador(programador_uid, request.state.versiones, **params)
+    return responder_pagina(page, etag)
 
-@app.get("/api/ausencias/programador/{programador_uid}/fecha/{fecha}", response_model=List[schemas.AusenciaOut])
-def get_ausencias_por_fecha(
+@router.get("/ausencias/programador/{programador_uid}/fecha/{fecha}", response_model=List[schemas.AusenciaOut])
+async def get_ausencias_por_fecha(
     programador_uid: str,
-    fecha: str,
-    ausencia_service: service.AusenciaService = Depends(get_ausencia_service)
+    fecha: date,
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service),
+    etag: str = Depends(etag_de("ausencias:programador:{programador_uid}"))
 ):
     """Obtener ausencias de un programador en una fecha específica"""
-    return ausencia_service.get_by_programador_y_fecha(programador_uid, fecha)
+    return responder_json(await ausencia_service.get_by_programador_y_fecha(programador_uid, fecha), etag)
 
-@app.post("/api/ausencias", response_model=schemas.AusenciaOut, status_code=status.HTTP_201_CREATED)
-def create_ausencia(
+@router.post("/ausencias", response_model=schemas.AusenciaOut, status_code=status.HTTP_201_CREATED)
+async def create_ausencia(
     ausencia: schemas.AusenciaCreate,
-    ausencia_service: service.AusenciaService = Depends(get_ausencia_service)
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service)
 ):
     """Crear una nueva ausencia"""
-    return ausencia_service.create(ausencia)
+    return await ausencia_service.create(ausencia)
 
-@app.put("/api/ausencias/{ausencia_id}", response_model=schemas.AusenciaOut)
-def update_ausencia(
+@router.post("/ausencias/bulk", response_model=schemas.BulkResult)
+async def create_ausencias_bulk(
+    ausencias: List[schemas.AusenciaCreate],
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service)
+):
+    """Crear varias ausencias en una sola transacción"""
+    validar_lote(ausencias)
+    return await ausencia_service.create_bulk(ausencias)
+
+@router.patch("/ausencias/bulk", response_model=schemas.BulkResult)
+async def update_ausencias_bulk(
+    ausencias: List[schemas.AusenciaBulkUpdate],
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service)
+):
+    """Actualizar varias ausencias en una sola transacción"""
+    validar_lote(ausencias)
+    return await ausencia_service.update_bulk(ausencias)
+
+@router.delete("/ausencias/bulk", response_model=schemas.BulkResult)
+async def delete_ausencias_bulk(
+    lote: schemas.BulkDelete,
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service)
+):
+    """Eliminar varias ausencias en una sola sentencia"""
+    validar_lote(lote.ids)
+    return await ausencia_service.delete_bulk(lote.ids)
+
+@router.put("/ausencias/{ausencia_id}", response_model=schemas.AusenciaOut)
+async def update_ausencia(
     ausencia_id: int,
     ausencia: schemas.AusenciaUpdate,
-    ausencia_service: service.AusenciaService = Depends(get_ausencia_service)
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service)
 ):
     """Actualizar una ausencia"""
-    updated = ausencia_service.update(ausencia_id, ausencia)
+    updated = await ausencia_service.update(ausencia_id, ausencia)
     if not updated:
         raise HTTPException(status_code=404, detail="Ausencia no encontrada")
     return updated
 
-@app.delete("/api/ausencias/{ausencia_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_ausencia(
+@router.delete("/ausencias/{ausencia_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_ausencia(
     ausencia_id: int,
-    ausencia_service: service.AusenciaService = Depends(get_ausencia_service)
+    ausencia_service: service.AsyncAusenciaService = Depends(get_ausencia_service)
 ):
     """Eliminar una ausencia"""
-    if not ausencia_service.delete(ausencia_id):
+    if not await ausencia_service.delete(ausencia_id):
         raise HTTPException(status_code=404, detail="Ausencia no encontrada")
     return None
+
+# ========== Disponibilidad ==========
+
+@router.get("/programadores/{programador_uid}/disponibilidad", response_model=List[schemas.SlotOut])
+async def get_disponibilidad(
+    programador_uid: str,
+    desde: date,
+    hasta: date,
+    slot: int = Query(60, ge=5, le=480, description="Duración del slot en minutos"),
+    jornada_inicio: time = Query(time(8, 0), description="Inicio de la jornada (HH:mm)"),
+    jornada_fin: time = Query(time(18, 0), description="Fin de la jornada (HH:mm)"),
+    disponibilidad_service: service.AsyncDisponibilidadService = Depends(get_disponibilidad_service),
+    etag: str = Depends(etag_de("asesorias:programador:{programador_uid}",
+                                "ausencias:programador:{programador_uid}"))
+):
+    """Slots libres de un programador (sin ausencias ni asesorías aprobadas)"""
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+    if (hasta - desde).days > MAX_DIAS_DISPONIBILIDAD:
+        raise HTTPException(status_code=400, detail=f"El rango máximo es de {MAX_DIAS_DISPONIBILIDAD} días")
+    slots = await disponibilidad_service.get_slots_libres(
+        programador_uid, desde, hasta, slot, jornada_inicio, jornada_fin
+    )
+    return responder_json(slots, etag)
+
+# ========== Calendario ==========
+
+def get_programadores_calendario(
+    programadores: str = Query(..., description="uids de los programadores separados por coma"),
+) -> List[str]:
+    """uids sin repetir, en el orden pedido"""
+    uids = list(dict.fromkeys(uid.strip() for uid in programadores.split(",") if uid.strip()))
+    if not uids:
+        raise HTTPException(status_code=400, detail="Indique al menos un programador")
+    if len(uids) > MAX_PROGRAMADORES_CALENDARIO:
+        raise HTTPException(status_code=400,
+                            detail=f"Máximo {MAX_PROGRAMADORES_CALENDARIO} programadores por petición")
+    return uids
+
+async def etag_calendario(
+    request: Request,
+    programadores: List[str] = Depends(get_programadores_calendario),
+    version_service: service.AsyncVersionService = Depends(get_version_service),
+) -> str:
+    """Como etag_de, con las etiquetas de cada programador de la query"""
+    tags = [tag for uid in programadores
+            for tag in (f"asesorias:programador:{uid}", f"ausencias:programador:{uid}")]
+    return await etag_condicional(request, version_service, tags)
+
+@router.get("/calendario", response_model=schemas.Calendario)
+async def get_calendario(
+    desde: date,
+    hasta: date,
+    estado: Optional[str] = None,
+    programadores: List[str] = Depends(get_programadores_calendario),
+    calendario_service: service.AsyncCalendarioService = Depends(get_calendario_service),
+    etag: str = Depends(etag_calendario)
+):
+    """
+    Asesorías y ausencias de varios programadores agrupadas por programador y fecha.
+
+    Reemplaza las 2 peticiones por programador (asesorías + ausencias) de la
+    vista de calendario: dos consultas con IN y rango de fechas en una sola sesión.
+    """
+    if hasta < desde:
+        raise HTTPException(status_code=400, detail="'hasta' debe ser posterior a 'desde'")
+    if (hasta - desde).days > MAX_DIAS_DISPONIBILIDAD:
+        raise HTTPException(status_code=400, detail=f"El rango máximo es de {MAX_DIAS_DISPONIBILIDAD} días")
+    return responder_json(await calendario_service.get_calendario(programadores, desde, hasta, estado), etag)
+
+# ========== Estadísticas (dashboard) ==========
+
+def get_estadisticas_params(
+    programador_uid: Optional[str] = None,
+    desde: Optional[date] = Query(None, description="Desde la semana que contiene esta fecha (YYYY-MM-DD)"),
+    hasta: Optional[date] = Query(None, description="Hasta la semana que contiene esta fecha (YYYY-MM-DD)"),
+):
+    """Filtros del resumen (granularidad semanal por fecha de creación)"""
+    return {"programador_uid": programador_uid, "desde": desde, "hasta": hasta}
+
+@router.get("/estadisticas", response_model=schemas.EstadisticaResumen)
+async def get_estadisticas(
+    filtros: dict = Depends(get_estadisticas_params),
+    estadisticas_service: service.AsyncEstadisticasService = Depends(get_estadisticas_service),
+    etag: str = Depends(etag_de(versiones.TAG_ASESORIAS))
+):
+    """Asesorías por estado y tiempo de respuesta (media y percentiles)"""
+    return responder_json(await estadisticas_service.get_resumen(**filtros), etag)
+
+@router.get("/estadisticas/programadores", response_model=List[schemas.EstadisticaProgramador])
+async def get_estadisticas_programadores(
+    filtros: dict = Depends(get_estadisticas_params),
+    estadisticas_service: service.AsyncEstadisticasService = Depends(get_estadisticas_service),
+    etag: str = Depends(etag_de(versiones.TAG_ASESORIAS))
+):
+    """Carga de trabajo y tiempo de respuesta por programador"""
+    return responder_json(await estadisticas_service.get_por_programador(**filtros), etag)
+
+@router.get("/estadisticas/semanas", response_model=List[schemas.EstadisticaSemana])
+async def get_estadisticas_semanas(
+    filtros: dict = Depends(get_estadisticas_params),
+    estadisticas_service: service.AsyncEstadisticasService = Depends(get_estadisticas_service),
+    etag: str = Depends(etag_de(versiones.TAG_ASESORIAS))
+):
+    """Asesorías recibidas por semana (lunes de la semana de creación)"""
+    return responder_json(await estadisticas_service.get_por_semana(**filtros), etag)
+
+# ========== Caché ==========
+
+@router.get("/cache/stats")
+async def get_cache_stats():
+    """Contadores de la caché de lectura (hits, misses, evictions)"""
+    return query_cache.stats()
+
+app.include_router(router)
+
+# ========== Eventos en vivo (SSE / WebSocket) ==========
+
+# Mismo token de Firebase, también en ?token= (EventSource y WebSocket no envían headers)
+eventos_router = APIRouter(prefix="/api/eventos", dependencies=[Depends(verify_stream_token)])
+
+def _formato_sse(evento: dict) -> bytes:
+    return b"event: " + evento["tipo"].encode() + b"\ndata: " + orjson.dumps(evento) + b"\n\n"
+
+def responder_sse(canales: List[str]) -> StreamingResponse:
+    """
+    Mantiene abierta la respuesta y envía un evento por cada cambio en los canales.
+
+    Si no hay cambios, cada EVENTOS_HEARTBEAT_S se envía un comentario para
+    que los proxies no cierren la conexión. Un evento "resincronizar" indica
+    que se perdieron eventos y hay que recargar el listado.
+    """
+    async def generar():
+        # La suscripción se crea y se cancela dentro del generador: se libera al desconectarse el cliente
+        suscripcion = eventos.broker.suscribir(canales)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                evento = await suscripcion.siguiente(settings.EVENTOS_HEARTBEAT_S)
+                yield _formato_sse(evento) if evento is not None else b": ping\n\n"
+        finally:
+            eventos.broker.cancelar(suscripcion)
+
+    return StreamingResponse(generar(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def transmitir_ws(websocket: WebSocket, canales: List[str]):
+    """Igual que responder_sse pero por WebSocket (un mensaje JSON por evento)"""
+    await websocket.accept()
+    suscripcion = eventos.broker.suscribir(canales)
+    try:
+        while True:
+            evento = await suscripcion.siguiente(settings.EVENTOS_HEARTBEAT_S)
+            await websocket.send_text(orjson.dumps(evento if evento is not None else {"tipo": "ping"}).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        eventos.broker.cancelar(suscripcion)
+
+@eventos_router.get("/programador/{programador_uid}")
+async def eventos_programador(programador_uid: str):
+    """Cambios en las asesorías y ausencias de un programador (Server-Sent Events)"""
+    return responder_sse(eventos.canales_programador(programador_uid))
+
+@eventos_router.get("/usuario/{usuario_uid}")
+async def eventos_usuario(usuario_uid: str):
+    """Cambios en las asesorías de un usuario (Server-Sent Events)"""
+    return responder_sse(eventos.canales_usuario(usuario_uid))
+
+@eventos_router.websocket("/programador/{programador_uid}/ws")
+async def eventos_programador_ws(websocket: WebSocket, programador_uid: str):
+    """Cambios en las asesorías y ausencias de un programador (WebSocket)"""
+    await transmitir_ws(websocket, eventos.canales_programador(programador_uid))
+
+@eventos_router.websocket("/usuario/{usuario_uid}/ws")
+async def eventos_usuario_ws(websocket: WebSocket, usuario_uid: str):
+    """Cambios en las asesorías de un usuario (WebSocket)"""
+    await transmitir_ws(websocket, eventos.canales_usuario(usuario_uid))
+
+app.include_router(eventos_router)
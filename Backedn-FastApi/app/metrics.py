@@ -0,0 +1,251 @@
+"""Métricas Prometheus: tiempos por ruta, sentencias SQL, pool de conexiones y Firebase."""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Sentencias más lentas que este umbral (milisegundos) se registran en el log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+# Con varios workers (app.servidor) cada proceso escribe sus métricas en este directorio y
+# /metrics las suma; prometheus_client lo lee al importarse, así que debe fijarse antes
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+logger = logging.getLogger("app.sql")
+
+# Etiqueta para peticiones que no coinciden con ninguna ruta (evita una serie por URL)
+RUTA_DESCONOCIDA = "desconocida"
+
+_BUCKETS_SQL = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+
+# ========== Métricas ==========
+
+HTTP_DURACION = Histogram(
+    "http_request_duration_seconds", "Duración de las peticiones HTTP", ["method", "route", "status"]
+)
+HTTP_EN_CURSO = Gauge("http_requests_in_progress", "Peticiones HTTP en curso", multiprocess_mode="livesum")
+
+SQL_DURACION = Histogram(
+    "db_statement_duration_seconds", "Duración de las sentencias SQL", ["method", "route", "operation"],
+    buckets=_BUCKETS_SQL,
+)
+SQL_POR_PETICION = Histogram(
+    "db_statements_per_request", "Sentencias SQL ejecutadas por petición", ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+SQL_LENTAS = Counter("db_slow_statements_total", "Sentencias por encima de SLOW_QUERY_MS", ["method", "route"])
+
+POOL_ESPERA = Histogram(
+    "db_pool_checkout_wait_seconds", "Espera para obtener una conexión del pool", ["engine"],
+    buckets=_BUCKETS_SQL,
+)
+
+FIREBASE_VERIFICACION = Histogram(
+    "firebase_token_verification_seconds", "Duración de la verificación del ID token", ["result"],
+    buckets=_BUCKETS_SQL,
+)
+
+EVENTOS_SUSCRIPTORES = Gauge("events_subscribers", "Clientes conectados a los canales de eventos (SSE / WebSocket)",
+                             multiprocess_mode="livesum")
+
+ADMISION_RECHAZOS = Counter(
+    "admission_rejected_total", "Peticiones rechazadas por el control de admisión", ["route", "reason"]
+)
+ADMISION_EN_COLA = Gauge("admission_queue_waiting", "Peticiones esperando turno en el control de admisión",
+                         multiprocess_mode="livesum")
+
+
+class EstadoPeticion:
+    """Datos de la petición en curso que necesitan los eventos de SQLAlchemy."""
+    __slots__ = ("scope", "sentencias")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.sentencias = 0
+
+    @property
+    def ruta(self) -> str:
+        # El router de FastAPI deja la ruta resuelta en el scope antes de ejecutar el endpoint
+        route = self.scope.get("route")
+        return getattr(route, "path", RUTA_DESCONOCIDA)
+
+
+# Se propaga al threadpool y a los greenlets de AsyncSession.run_sync
+peticion_actual: ContextVar[Optional[EstadoPeticion]] = ContextVar("peticion_actual", default=None)
+
+
+def _ruta_actual() -> Tuple[str, str]:
+    """(método, ruta) de la petición en curso; fuera de una petición (scripts, arranque) 'sin_peticion'"""
+    estado = peticion_actual.get()
+    if estado is None:
+        return "", "sin_peticion"
+    return estado.scope["method"], estado.ruta
+
+
+# ========== Middleware ASGI ==========
+
+class MetricsMiddleware:
+    """Mide cada petición HTTP (hasta enviar el último fragmento del cuerpo)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = EstadoPeticion(scope)
+        token = peticion_actual.set(estado)
+        status_code = 500
+
+        async def send_medido(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_EN_CURSO.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_medido)
+        finally:
+            duracion = time.perf_counter() - inicio
+            HTTP_EN_CURSO.dec()
+            peticion_actual.reset(token)
+            ruta = estado.ruta
+            HTTP_DURACION.labels(scope["method"], ruta, str(status_code)).observe(duracion)
+            SQL_POR_PETICION.labels(scope["method"], ruta).observe(estado.sentencias)
+
+
+# ========== Instrumentación de SQLAlchemy ==========
+
+def _operacion(statement: str) -> str:
+    palabra = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return palabra if palabra in ("SELECT", "INSERT", "UPDATE", "DELETE") else "OTHER"
+
+
+def _antes(conn, cursor, statement, parameters, context, executemany):
+    # En el contexto de ejecución y no en la conexión: si la sentencia falla
+    # no hay after_cursor_execute y el contexto se descarta con ella
+    if context is not None:
+        context.inicio_sentencia = time.perf_counter()
+
+
+def _despues(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "inicio_sentencia", None)
+    if inicio is None:
+        return
+    duracion = time.perf_counter() - inicio
+    metodo, ruta = _ruta_actual()
+    SQL_DURACION.labels(metodo, ruta, _operacion(statement)).observe(duracion)
+
+    estado = peticion_actual.get()
+    if estado is not None:
+        estado.sentencias += 1
+
+    if duracion * 1000 >= SLOW_QUERY_MS:
+        SQL_LENTAS.labels(metodo, ruta).inc()
+        logger.warning("Sentencia lenta (%.1f ms) en %s %s: %s", duracion * 1000, metodo, ruta,
+                       " ".join(statement.split()))
+
+
+def instrumentar_engine(engine):
+    """Registra los eventos de cursor en un Engine síncrono (o en el sync_engine de uno asíncrono)."""
+    event.listen(engine, "before_cursor_execute", _antes)
+    event.listen(engine, "after_cursor_execute", _despues)
+
+
+class _EsperaCheckout:
+    """
+    Mide lo que tarda el pool en entregar una conexión (incluye abrir una nueva).
+
+    La última espera queda en `ultima_espera_s` para el control de admisión.
+    """
+    nombre_engine = "primary"
+    ultima_espera_s = 0.0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera = time.perf_counter() - inicio
+            self.ultima_espera_s = espera
+            POOL_ESPERA.labels(self.nombre_engine).observe(espera)
+
+
+def pool_instrumentado(nombre_engine: str, asincrono: bool = False) -> type:
+    """
+    Clase de pool para `poolclass=` que etiqueta la espera con `nombre_engine`.
+
+    Es una clase (y no un atributo de la instancia) para que el nombre se
+    conserve cuando SQLAlchemy recrea el pool (dispose / invalidación).
+    """
+    base = AsyncAdaptedQueuePool if asincrono else QueuePool
+    return type(f"{base.__name__}Instrumentado", (_EsperaCheckout, base), {"nombre_engine": nombre_engine})
+
+
+class PoolCollector:
+    """
+    Tamaño, conexiones en uso y overflow de cada pool, leídos al momento del scrape.
+
+    Los pools son del proceso: con varios workers las series llevan el `pid`
+    del worker que respondió al scrape.
+    """
+
+    def __init__(self):
+        self.pools: Dict[str, object] = {}
+        self.etiquetas = ["engine", "pid"] if PROMETHEUS_MULTIPROC_DIR else ["engine"]
+
+    def registrar(self, nombre: str, engine):
+        self.pools[nombre] = engine.pool
+
+    def collect(self):
+        tamano = GaugeMetricFamily("db_pool_size", "Tamaño configurado del pool", labels=self.etiquetas)
+        en_uso = GaugeMetricFamily("db_pool_checked_out", "Conexiones en uso", labels=self.etiquetas)
+        overflow = GaugeMetricFamily("db_pool_overflow", "Conexiones por encima de pool_size", labels=self.etiquetas)
+        libres = GaugeMetricFamily("db_pool_checked_in", "Conexiones libres en el pool", labels=self.etiquetas)
+        for nombre, pool in self.pools.items():
+            if not isinstance(pool, QueuePool):
+                continue
+            valores = [nombre, str(os.getpid())][:len(self.etiquetas)]
+            tamano.add_metric(valores, pool.size())
+            en_uso.add_metric(valores, pool.checkedout())
+            overflow.add_metric(valores, max(pool.overflow(), 0))
+            libres.add_metric(valores, pool.checkedin())
+        yield from (tamano, en_uso, overflow, libres)
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+
+def exportar():
+    """
+    (contenido, content-type) en formato de exposición de Prometheus.
+
+    En modo multiproceso suma las métricas de todos los workers (archivos de
+    PROMETHEUS_MULTIPROC_DIR) y agrega los pools del worker que responde.
+    """
+    if not PROMETHEUS_MULTIPROC_DIR:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+    registro = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registro)
+    registro.register(pool_collector)
+    return generate_latest(registro), CONTENT_TYPE_LATEST
+
+
+def worker_terminado(pid: int):
+    """Descarta los gauges `livesum` de un worker que terminó (hook child_exit de gunicorn)."""
+    if PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
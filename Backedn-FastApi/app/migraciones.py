@@ -0,0 +1,97 @@
+"""
+Aplicación explícita de las migraciones SQL de `migrations/`.
+
+Reemplaza a `Base.metadata.create_all` al arrancar: cada archivo
+NNN_nombre.sql se aplica una sola vez, en orden, y queda registrado en
+la tabla schema_migrations. Los scripts son idempotentes, así que una
+base a la que ya se le aplicaron a mano con psql admite volver a pasarlos.
+
+Uso:
+    python -m app.migraciones            # aplica las pendientes
+    python -m app.migraciones --listar   # muestra aplicadas y pendientes
+"""
+
+import argparse
+import os
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+MIGRACIONES_DIR = Path(os.path.dirname(os.path.dirname(__file__))) / "migrations"
+
+# Clave del advisory lock: con varios workers arrancando a la vez, solo uno migra
+LOCK_MIGRACIONES = 7_340_021
+
+
+def archivos(directorio: Path = MIGRACIONES_DIR) -> List[Path]:
+    return sorted(directorio.glob("[0-9][0-9][0-9]_*.sql"))
+
+
+def _crear_tabla(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version VARCHAR(255) PRIMARY KEY,"
+        " aplicada_en TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
+
+
+def aplicadas(conn) -> set:
+    _crear_tabla(conn)
+    return set(conn.scalars(text("SELECT version FROM schema_migrations")))
+
+
+def pendientes(engine: Engine, directorio: Path = MIGRACIONES_DIR) -> List[Path]:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        hechas = aplicadas(conn)
+    return [archivo for archivo in archivos(directorio) if archivo.stem not in hechas]
+
+
+def aplicar(engine: Engine, directorio: Path = MIGRACIONES_DIR) -> List[str]:
+    """
+    Aplica las migraciones pendientes y devuelve sus nombres.
+
+    Cada script maneja su propia transacción (BEGIN/COMMIT, como cuando se
+    ejecuta con psql), por eso la conexión va en autocommit.
+    """
+    if engine.dialect.name != "postgresql":
+        raise RuntimeError("Las migraciones SQL están escritas para PostgreSQL")
+
+    nuevas = []
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:clave)"), {"clave": LOCK_MIGRACIONES})
+        try:
+            hechas = aplicadas(conn)
+            for archivo in archivos(directorio):
+                if archivo.stem in hechas:
+                    continue
+                print(f"🗄️ Aplicando migración {archivo.name}")
+                conn.exec_driver_sql(archivo.read_text(encoding="utf-8"))
+                conn.execute(text("INSERT INTO schema_migrations (version) VALUES (:v)"), {"v": archivo.stem})
+                nuevas.append(archivo.stem)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:clave)"), {"clave": LOCK_MIGRACIONES})
+    return nuevas
+
+
+def main():
+    from . import database
+
+    parser = argparse.ArgumentParser(description="Aplica las migraciones SQL pendientes")
+    parser.add_argument("--listar", action="store_true", help="Solo mostrar las migraciones pendientes")
+    args = parser.parse_args()
+
+    database.init_db()
+    if args.listar:
+        faltan = pendientes(database.engine)
+        for archivo in archivos():
+            print(f"{'pendiente' if archivo in faltan else 'aplicada '}  {archivo.name}")
+        return
+
+    nuevas = aplicar(database.engine)
+    print(f"✅ {len(nuevas)} migraciones aplicadas" if nuevas else "✅ La base ya está al día")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,37 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, Text
-from datetime import datetime
+from sqlalchemy import Column, BigInteger, String, DateTime, Text, Date, Time, Index, Float, SmallInteger, DDL, event
+from sqlalchemy.types import TypeDecorator
+from datetime import datetime, date, time
 from .database import Base
 
+# ========== Tipos de columna ==========
+
+class FechaISO(TypeDecorator):
+    """Columna DATE que se expone como texto 'YYYY-MM-DD' (formato de la API)."""
+    impl = Date
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        return value.isoformat() if value is not None else None
+
+
+class HoraHM(TypeDecorator):
+    """Columna TIME que se expone como texto 'HH:mm' (formato de la API)."""
+    impl = Time
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, str):
+            return time.fromisoformat(value)
+        return value
+
+    def process_result_value(self, value, dialect):
+        return value.strftime("%H:%M") if value is not None else None
+
 # Modelo para Asesoría
 class Asesoria(Base):
     __tablename__ = "asesorias"
@@ -15,20 +45,79 @@ class Asesoria(Base):
     tema = Column(String(500), nullable=False)
     descripcion = Column(Text, nullable=False)
     comentario = Column(Text, nullable=True)
-    fecha_solicitada = Column(String(20), nullable=False)  # YYYY-MM-DD
-    hora_solicitada = Column(String(10), nullable=False)   # HH:mm
+    fecha_solicitada = Column(FechaISO, nullable=False)  # YYYY-MM-DD
+    hora_solicitada = Column(HoraHM, nullable=False)     # HH:mm
     estado = Column(String(50), default="pendiente", nullable=False)  # pendiente, aprobada, rechazada
     respuesta = Column(Text, nullable=True)
     fecha_creacion = Column(DateTime, default=datetime.utcnow, nullable=False)
     fecha_respuesta = Column(DateTime, nullable=True)
+    origen_id = Column(String(255), nullable=True)  # id del documento de Firestore (importación)
+
+    __table_args__ = (
+        Index("ix_asesorias_usuario_id", "usuario_uid", "id"),
+        Index("ix_asesorias_programador_estado_fecha", "programador_uid", "estado", "fecha_solicitada"),
+        Index("ux_asesorias_origen_id", "origen_id", unique=True),
+    )
+
+# Búsqueda de texto completo en SQLite (pruebas locales): tabla FTS5 de contenido
+# externo sincronizada con triggers. En PostgreSQL la búsqueda usa la columna
+# tsvector de la migración 004 (fuera del modelo: no se devuelve en los RETURNING).
+FTS_SQLITE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS asesorias_fts USING fts5("
+    " tema, descripcion, respuesta, content='asesorias', content_rowid='id',"
+    " tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS asesorias_fts_ai AFTER INSERT ON asesorias BEGIN"
+    " INSERT INTO asesorias_fts (rowid, tema, descripcion, respuesta)"
+    " VALUES (new.id, new.tema, new.descripcion, new.respuesta); END",
+    "CREATE TRIGGER IF NOT EXISTS asesorias_fts_ad AFTER DELETE ON asesorias BEGIN"
+    " INSERT INTO asesorias_fts (asesorias_fts, rowid, tema, descripcion, respuesta)"
+    " VALUES ('delete', old.id, old.tema, old.descripcion, old.respuesta); END",
+    "CREATE TRIGGER IF NOT EXISTS asesorias_fts_au AFTER UPDATE OF tema, descripcion, respuesta ON asesorias BEGIN"
+    " INSERT INTO asesorias_fts (asesorias_fts, rowid, tema, descripcion, respuesta)"
+    " VALUES ('delete', old.id, old.tema, old.descripcion, old.respuesta);"
+    " INSERT INTO asesorias_fts (rowid, tema, descripcion, respuesta)"
+    " VALUES (new.id, new.tema, new.descripcion, new.respuesta); END",
+]
+
+for _sentencia in FTS_SQLITE:
+    event.listen(Asesoria.__table__, "after_create", DDL(_sentencia).execute_if(dialect="sqlite"))
+event.listen(Asesoria.__table__, "before_drop", DDL("DROP TABLE IF EXISTS asesorias_fts").execute_if(dialect="sqlite"))
 
 # Modelo para Ausencia
 class Ausencia(Base):
     __tablename__ = "ausencias"
     
     id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
-    programador_uid = Column(String(255), nullable=False, index=True)
-    fecha = Column(String(20), nullable=False)  # YYYY-MM-DD
-    hora_inicio = Column(String(10), nullable=False)  # HH:mm
-    hora_fin = Column(String(10), nullable=False)     # HH:mm
+    programador_uid = Column(String(255), nullable=False)
+    fecha = Column(FechaISO, nullable=False)      # YYYY-MM-DD
+    hora_inicio = Column(HoraHM, nullable=False)  # HH:mm
+    hora_fin = Column(HoraHM, nullable=False)     # HH:mm
     motivo = Column(Text, nullable=True)
+    origen_id = Column(String(255), nullable=True)  # id de origen en Firestore (importación)
+
+    __table_args__ = (
+        Index("ix_ausencias_programador_fecha", "programador_uid", "fecha"),
+        Index("ux_ausencias_origen_id", "origen_id", unique=True),
+    )
+
+# Contador de cambios por etiqueta (usuario/programador/global), base de los ETags
+class VersionEntidad(Base):
+    __tablename__ = "versiones"
+
+    clave = Column(String(300), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+# Resumen incremental para /api/estadisticas (lo mantiene app/estadisticas.py)
+class EstadisticaAsesoria(Base):
+    __tablename__ = "estadisticas_asesorias"
+
+    programador_uid = Column(String(255), primary_key=True)
+    semana = Column(Date, primary_key=True)                # lunes de la semana de fecha_creacion
+    estado = Column(String(50), primary_key=True)
+    tramo_respuesta = Column(SmallInteger, primary_key=True)  # -1 = sin respuesta
+    cantidad = Column(BigInteger, nullable=False, default=0)
+    suma_respuesta_s = Column(Float, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_estadisticas_asesorias_semana", "semana"),
+    )
@@ -0,0 +1,92 @@
+"""Paginación por cursor (keyset) para los endpoints de listado."""
+
+import base64
+import json
+from typing import NamedTuple, Optional, List, Any, Tuple
+
+# Límite máximo de filas por página
+MAX_LIMIT = 500
+
+
+class InvalidCursorError(ValueError):
+    """El cursor recibido no es válido."""
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(last_id: int) -> str:
+    """Codifica el último id de la página en un cursor opaco."""
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decodifica un cursor opaco y devuelve el id a partir del cual continuar."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        last_id = data["id"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursorError("Cursor inválido")
+    if not isinstance(last_id, int):
+        raise InvalidCursorError("Cursor inválido")
+    return last_id
+
+
+def paginate(query, id_column, limit: Optional[int] = None, after: Optional[int] = None) -> Page:
+    """
+    Aplica paginación keyset sobre `id_column` (orden ascendente).
+
+    Sin `limit` devuelve todas las filas (compatibilidad con los clientes actuales).
+    Se pide una fila extra para saber si existe una página siguiente sin hacer COUNT.
+    """
+    if after is not None:
+        query = query.filter(id_column > after)
+    query = query.order_by(id_column)
+
+    if limit is None:
+        return Page(query.all(), None)
+
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return Page(rows, encode_cursor(rows[-1].id))
+    return Page(rows, None)
+
+
+def encode_rank_cursor(rank: float, last_id: int) -> str:
+    """Cursor para listados ordenados por relevancia: (rango, id) de la última fila."""
+    raw = json.dumps({"r": rank, "id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        rank, last_id = data["r"], data["id"]
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursorError("Cursor inválido")
+    if not isinstance(rank, (int, float)) or not isinstance(last_id, int):
+        raise InvalidCursorError("Cursor inválido")
+    return float(rank), last_id
+
+
+def paginate_ranked(query, rank, id_column, limit: int, after: Optional[Tuple[float, int]] = None) -> Page:
+    """
+    Paginación keyset sobre (`rank` DESC, `id_column` DESC).
+
+    `rank` es la expresión de relevancia; la query debe incluirla como
+    columna con la etiqueta "rango" para construir el cursor.
+    """
+    if after is not None:
+        last_rank, last_id = after
+        query = query.filter((rank < last_rank) | ((rank == last_rank) & (id_column < last_id)))
+    rows = query.order_by(rank.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return Page(rows, encode_rank_cursor(rows[-1].rango, rows[-1].id))
+    return Page(rows, None)
@@ -1,11 +1,55 @@
+from sqlalchemy import delete, insert, update
 from sqlalchemy.orm import Session
+from typing import Optional
 from . import models
 
 
-class AsesoriaRepository:
+class BaseRepository:
+    """
+    Escrituras en un solo viaje a la base de datos con INSERT/UPDATE/DELETE ... RETURNING.
+
+    Devuelven diccionarios con las columnas de la fila (no instancias ORM), así no
+    hace falta un SELECT de `refresh` después del commit. No confirman la
+    transacción: el servicio hace el commit junto con los contadores de versión.
+    """
+    model = None
+
     def __init__(self, db: Session):
         self.db = db
 
+    def _columnas(self):
+        return self.model.__table__.c
+
+    def insert(self, data: dict) -> dict:
+        fila = self.db.execute(
+            insert(self.model).values(**data).returning(*self._columnas())
+        ).mappings().one()
+        return dict(fila)
+
+    def update(self, entity_id: int, data: dict) -> Optional[dict]:
+        stmt = update(self.model).where(self.model.id == entity_id)
+        if data:
+            stmt = stmt.values(**data)
+        else:
+            # Sin cambios: UPDATE trivial para obtener la fila en el mismo viaje
+            stmt = stmt.values(id=self.model.id)
+        fila = self.db.execute(
+            stmt.returning(*self._columnas()),
+            execution_options={"synchronize_session": False},
+        ).mappings().first()
+        return dict(fila) if fila is not None else None
+
+    def delete(self, entity_id: int) -> Optional[dict]:
+        fila = self.db.execute(
+            delete(self.model).where(self.model.id == entity_id).returning(*self._columnas()),
+            execution_options={"synchronize_session": False},
+        ).mappings().first()
+        return dict(fila) if fila is not None else None
+
+
+class AsesoriaRepository(BaseRepository):
+    model = models.Asesoria
+
     def find_all(self):
         return self.db.query(models.Asesoria).all()
 
@@ -24,20 +68,9 @@ class AsesoriaRepository:
             models.Asesoria.programador_uid == programador_uid
         ).all()
 
-    def save(self, asesoria: models.Asesoria):
-        self.db.add(asesoria)
-        self.db.commit()
-        self.db.refresh(asesoria)
-        return asesoria
-
-    def delete(self, asesoria: models.Asesoria):
-        self.db.delete(asesoria)
-        self.db.commit()
 
-
-class AusenciaRepository:
-    def __init__(self, db: Session):
-        self.db = db
+class AusenciaRepository(BaseRepository):
+    model = models.Ausencia
 
     def find_all(self):
         return self.db.query(models.Ausencia).all()
@@ -51,13 +84,3 @@ class AusenciaRepository:
         return self.db.query(models.Ausencia).filter(
             models.Ausencia.programador_uid == programador_uid
         ).all()
-
-    def save(self, ausencia: models.Ausencia):
-        self.db.add(ausencia)
-        self.db.commit()
-        self.db.refresh(ausencia)
-        return ausencia
-
-    def delete(self, ausencia: models.Ausencia):
-        self.db.delete(ausencia)
-        self.db.commit()
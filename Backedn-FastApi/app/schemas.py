@@ -1,6 +1,29 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
-from datetime import datetime
+import re
+from pydantic import BaseModel, ConfigDict, field_validator
+from typing import Any, Dict, List, Optional
+from datetime import datetime, date, time
+
+# ========== Validadores de formato ==========
+
+# fromisoformat también acepta "20240102" o "10:00:30": primero el formato exacto
+_FORMATO_FECHA = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+_FORMATO_HORA = re.compile(r"[0-9]{2}:[0-9]{2}")
+
+def validar_fecha(value: Optional[str]) -> Optional[str]:
+    """Verifica que la fecha tenga formato YYYY-MM-DD"""
+    if value is not None:
+        if not _FORMATO_FECHA.fullmatch(value):
+            raise ValueError("La fecha debe tener formato YYYY-MM-DD")
+        date.fromisoformat(value)
+    return value
+
+def validar_hora(value: Optional[str]) -> Optional[str]:
+    """Verifica que la hora tenga formato HH:mm"""
+    if value is not None:
+        if not _FORMATO_HORA.fullmatch(value):
+            raise ValueError("La hora debe tener formato HH:mm")
+        time.fromisoformat(value)
+    return value
 
 # ========== Schemas para Asesoría ==========
 
@@ -18,6 +41,9 @@ class AsesoriaBase(BaseModel):
     estado: str = "pendiente"
     respuesta: Optional[str] = None
 
+    _validar_fecha = field_validator("fecha_solicitada")(validar_fecha)
+    _validar_hora = field_validator("hora_solicitada")(validar_hora)
+
 class AsesoriaCreate(AsesoriaBase):
     pass
 
@@ -30,6 +56,12 @@ class AsesoriaUpdate(BaseModel):
     estado: Optional[str] = None
     respuesta: Optional[str] = None
 
+    _validar_fecha = field_validator("fecha_solicitada")(validar_fecha)
+    _validar_hora = field_validator("hora_solicitada")(validar_hora)
+
+class AsesoriaBulkUpdate(AsesoriaUpdate):
+    id: int
+
 class AsesoriaOut(AsesoriaBase):
     id: int
     fecha_creacion: datetime
@@ -37,6 +69,9 @@ class AsesoriaOut(AsesoriaBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class AsesoriaBusqueda(AsesoriaOut):
+    rango: float    # relevancia (mayor = más relevante)
+
 # ========== Schemas para Ausencia ==========
 
 class AusenciaBase(BaseModel):
@@ -46,6 +81,9 @@ class AusenciaBase(BaseModel):
     hora_fin: str       # HH:mm
     motivo: Optional[str] = None
 
+    _validar_fecha = field_validator("fecha")(validar_fecha)
+    _validar_hora = field_validator("hora_inicio", "hora_fin")(validar_hora)
+
 class AusenciaCreate(AusenciaBase):
     pass
 
@@ -55,8 +93,67 @@ class AusenciaUpdate(BaseModel):
     hora_fin: Optional[str] = None
     motivo: Optional[str] = None
 
+    _validar_fecha = field_validator("fecha")(validar_fecha)
+    _validar_hora = field_validator("hora_inicio", "hora_fin")(validar_hora)
+
+class AusenciaBulkUpdate(AusenciaUpdate):
+    id: int
+
 class AusenciaOut(AusenciaBase):
     id: int
     
     model_config = ConfigDict(from_attributes=True)
 
+# ========== Schemas para operaciones por lote ==========
+
+class BulkDelete(BaseModel):
+    ids: List[int]
+
+class BulkItemResult(BaseModel):
+    indice: int                   # posición del elemento en la petición
+    id: Optional[int] = None
+    ok: bool
+    error: Optional[str] = None
+
+class BulkResult(BaseModel):
+    procesados: int
+    errores: int
+    resultados: List[BulkItemResult]
+
+# ========== Schemas para Disponibilidad ==========
+
+class SlotOut(BaseModel):
+    fecha: str          # YYYY-MM-DD
+    hora_inicio: str    # HH:mm
+    hora_fin: str       # HH:mm
+
+# ========== Schemas para Calendario ==========
+
+class CalendarioDia(BaseModel):
+    # Filas como listas, en el orden de Calendario.campos (sin repetir los nombres)
+    asesorias: List[List[Any]] = []
+    ausencias: List[List[Any]] = []
+
+class Calendario(BaseModel):
+    campos: Dict[str, List[str]]                          # columnas de cada fila por tipo
+    programadores: Dict[str, Dict[str, CalendarioDia]]    # uid -> fecha (YYYY-MM-DD) -> día
+
+# ========== Schemas para Estadísticas ==========
+
+class EstadisticaRespuesta(BaseModel):
+    respondidas: int
+    media_s: Optional[float] = None   # tiempo medio de fecha_creacion a fecha_respuesta
+    p50_s: Optional[float] = None     # percentiles aproximados por tramos
+    p90_s: Optional[float] = None
+    p99_s: Optional[float] = None
+
+class EstadisticaResumen(BaseModel):
+    total: int
+    por_estado: Dict[str, int]
+    respuesta: EstadisticaRespuesta
+
+class EstadisticaProgramador(EstadisticaResumen):
+    programador_uid: str
+
+class EstadisticaSemana(EstadisticaResumen):
+    semana: date        # lunes de la semana de creación
@@ -1,109 +1,664 @@
+from sqlalchemy import Select, delete, func, insert, select, update
 from sqlalchemy.orm import Session
-from datetime import datetime
-from . import models, schemas
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.concurrency import run_in_threadpool
+from datetime import datetime, date, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from . import busqueda, estadisticas, eventos, models, schemas, versiones
+from .cache import query_cache
+from .disponibilidad import AgendaLote, ConflictoHorarioError, cargar_ocupacion, verificar_conflicto
+from .pagination import Page, paginate, paginate_ranked
+from .repository import AsesoriaRepository, AusenciaRepository
+
+# ========== Proyección de columnas para listados ==========
+
+def _columnas(model, schema) -> list:
+    """Columnas del modelo en el mismo orden que los campos del schema de salida"""
+    return [getattr(model, campo) for campo in schema.model_fields]
+
+COLUMNAS_ASESORIA = _columnas(models.Asesoria, schemas.AsesoriaOut)
+COLUMNAS_AUSENCIA = _columnas(models.Ausencia, schemas.AusenciaOut)
+
+def _fila_a_dict(fila) -> dict:
+    """Fila proyectada -> dict listo para JSON (mismo formato que el schema de salida)"""
+    data = fila._asdict()
+    for key, value in data.items():
+        if isinstance(value, datetime):
+            data[key] = value.isoformat()
+    return data
+
+def _pagina_a_dicts(page: Page) -> Page:
+    return Page([_fila_a_dict(fila) for fila in page.items], page.next_cursor)
+
+# ========== Filtros de listado ==========
+
+def _criterios_asesoria(programador_uid: Optional[str] = None, usuario_uid: Optional[str] = None,
+                        estado: Optional[str] = None, desde: Optional[date] = None,
+                        hasta: Optional[date] = None) -> list:
+    criterios = []
+    if programador_uid is not None:
+        criterios.append(models.Asesoria.programador_uid == programador_uid)
+    if usuario_uid is not None:
+        criterios.append(models.Asesoria.usuario_uid == usuario_uid)
+    if estado is not None:
+        criterios.append(models.Asesoria.estado == estado)
+    if desde is not None:
+        criterios.append(models.Asesoria.fecha_solicitada >= desde)
+    if hasta is not None:
+        criterios.append(models.Asesoria.fecha_solicitada <= hasta)
+    return criterios
+
+def _criterios_ausencia(programador_uid: Optional[str] = None, desde: Optional[date] = None,
+                        hasta: Optional[date] = None) -> list:
+    criterios = []
+    if programador_uid is not None:
+        criterios.append(models.Ausencia.programador_uid == programador_uid)
+    if desde is not None:
+        criterios.append(models.Ausencia.fecha >= desde)
+    if hasta is not None:
+        criterios.append(models.Ausencia.fecha <= hasta)
+    return criterios
+
+# ========== Exportación ==========
+
+def consulta_exportacion_asesorias(**filtros) -> Select:
+    """Todas las asesorías que cumplen los filtros, por id (sin límite: se leen por lotes)"""
+    return select(*COLUMNAS_ASESORIA).where(*_criterios_asesoria(**filtros)).order_by(models.Asesoria.id)
+
+def consulta_exportacion_ausencias(**filtros) -> Select:
+    """Todas las ausencias que cumplen los filtros, por id (sin límite: se leen por lotes)"""
+    return select(*COLUMNAS_AUSENCIA).where(*_criterios_ausencia(**filtros)).order_by(models.Ausencia.id)
+
+# ========== Caché de lectura ==========
+
+def _pagina_cacheada(db: Session, tag: str, nombre: str, filtros: dict, loader,
+                     leidas: Optional[Dict[str, int]] = None) -> Page:
+    """
+    Lee la página desde la caché o la carga con `loader` y la guarda serializada.
+
+    La clave lleva la versión de `tag` en la base: la que ya se leyó para el
+    ETag (`leidas`) o, si no se pasa, una búsqueda por clave primaria.
+    """
+    def cargar():
+        page = loader()
+        return {"items": page.items, "next_cursor": page.next_cursor}
+
+    if leidas is None or tag not in leidas:
+        leidas = versiones.obtener(db, [tag])
+    data = query_cache.get_or_load({tag: leidas[tag]}, query_cache.make_key(nombre, filtros), cargar)
+    return Page(data["items"], data["next_cursor"])
+
+# ========== Reglas comunes de escritura ==========
+
+def _confirmar(db: Session, tags: Iterable[str], evento: Optional[dict] = None):
+    """
+    Incrementa las versiones de las etiquetas en la misma transacción que la
+    escritura (las globales, después del commit), confirma y notifica el
+    cambio a los clientes suscritos (el evento solo sale si el commit se
+    completa). Las claves de la caché de lectura llevan esas versiones, así
+    que no hace falta invalidarla.
+    """
+    tags = set(tags)
+    versiones.incrementar(db, tags - versiones.TAGS_GLOBALES)
+    if evento is not None:
+        eventos.emitir(db, evento)
+    db.commit()
+    versiones.incrementar_globales(db, tags)
+    eventos.publicar_confirmados(db)
+
+def _requiere_verificacion(estado_actual: str, update_data: dict) -> bool:
+    """Hay que comprobar cruces si cambia el horario o se aprueba la asesoría"""
+    horario_cambia = {'fecha_solicitada', 'hora_solicitada'} & update_data.keys()
+    estado_final = update_data.get('estado', estado_actual)
+    return estado_final != 'rechazada' and bool(horario_cambia or update_data.get('estado') == 'aprobada')
+
+def _puede_requerir_verificacion(update_data: dict) -> bool:
+    """Cambios que podrían exigir comprobar cruces (según el estado actual)"""
+    return bool({'fecha_solicitada', 'hora_solicitada'} & update_data.keys()) or update_data.get('estado') == 'aprobada'
+
+def _registrar_fecha_respuesta(update_data: dict, ahora: Optional[datetime] = None):
+    """Si se actualiza el estado, registrar la fecha de respuesta"""
+    if 'estado' in update_data and update_data['estado'] in ['aprobada', 'rechazada']:
+        update_data['fecha_respuesta'] = ahora or datetime.utcnow()
+
+def _insertar_lote(db: Session, model, filas: List[dict]) -> list:
+    """
+    INSERT multi-fila con RETURNING (insertmanyvalues agrupa las filas por
+    sentencia), devuelto en el orden de `filas`.
+
+    En PostgreSQL el orden lo garantiza sort_by_parameter_order. En SQLite,
+    con una clave BigInteger, SQLAlchemy no puede garantizarlo en un INSERT
+    multi-fila y vuelve a una sentencia por fila: ahí se omite y se ordena por
+    id (SQLite asigna los rowid en el orden de VALUES).
+    """
+    if db.get_bind().dialect.name != "sqlite":
+        return db.scalars(insert(model).returning(model, sort_by_parameter_order=True), filas).all()
+    creadas = db.scalars(insert(model).returning(model), filas).all()
+    return sorted(creadas, key=lambda fila: fila.id)
+
+def _update_agrupado(db: Session, model, filas: List[dict]):
+    """Un UPDATE ... WHERE id IN (...) por cada combinación distinta de valores"""
+    grupos = {}
+    for fila in filas:
+        valores = tuple(sorted((k, v) for k, v in fila.items() if k != "id"))
+        grupos.setdefault(valores, []).append(fila["id"])
+    for valores, ids in grupos.items():
+        db.execute(
+            update(model).where(model.id.in_(ids)).values(dict(valores)),
+            execution_options={"synchronize_session": False},
+        )
+
+def _resultado(indice: int, id: Optional[int] = None, error: Optional[str] = None) -> dict:
+    return {"indice": indice, "id": id, "ok": error is None, "error": error}
+
+def _resumen(resultados: List[dict]) -> dict:
+    errores = sum(1 for r in resultados if not r["ok"])
+    return {"procesados": len(resultados) - errores, "errores": errores, "resultados": resultados}
 
 # ========== Servicio para Asesorías ==========
 
 class AsesoriaService:
     def __init__(self, db: Session):
         self.db = db
+        self.repository = AsesoriaRepository(db)
+
+    def _listar(self, *criterios, limit: Optional[int] = None, after: Optional[int] = None,
+                estado: Optional[str] = None, desde: Optional[date] = None,
+                hasta: Optional[date] = None) -> Page:
+        # Solo columnas (tuplas): sin identity map ni instrumentación ORM
+        query = self.db.query(*COLUMNAS_ASESORIA).filter(
+            *criterios, *_criterios_asesoria(estado=estado, desde=desde, hasta=hasta)
+        )
+        return _pagina_a_dicts(paginate(query, models.Asesoria.id, limit, after))
 
-    def get_all(self):
-        return self.db.query(models.Asesoria).all()
+    def get_all(self, programador_uid: Optional[str] = None, **filtros) -> Page:
+        return self._listar(*_criterios_asesoria(programador_uid=programador_uid), **filtros)
 
     def get_by_id(self, asesoria_id: int):
         return self.db.query(models.Asesoria).filter(models.Asesoria.id == asesoria_id).first()
 
-    def get_by_usuario(self, usuario_uid: str):
-        return self.db.query(models.Asesoria).filter(models.Asesoria.usuario_uid == usuario_uid).all()
+    def get_by_usuario(self, usuario_uid: str, leidas: Optional[Dict[str, int]] = None, **filtros) -> Page:
+        return _pagina_cacheada(
+            self.db, f"asesorias:usuario:{usuario_uid}", "asesorias:usuario", filtros,
+            lambda: self._listar(models.Asesoria.usuario_uid == usuario_uid, **filtros), leidas,
+        )
 
-    def get_by_programador(self, programador_uid: str):
-        return self.db.query(models.Asesoria).filter(models.Asesoria.programador_uid == programador_uid).all()
+    def get_by_programador(self, programador_uid: str, leidas: Optional[Dict[str, int]] = None,
+                           **filtros) -> Page:
+        return _pagina_cacheada(
+            self.db, f"asesorias:programador:{programador_uid}", "asesorias:programador", filtros,
+            lambda: self._listar(models.Asesoria.programador_uid == programador_uid, **filtros), leidas,
+        )
 
-    def get_pendientes_by_programador(self, programador_uid: str):
-        return self.db.query(models.Asesoria).filter(
-            models.Asesoria.programador_uid == programador_uid,
-            models.Asesoria.estado == "pendiente"
-        ).all()
+    def get_pendientes_by_programador(self, programador_uid: str, leidas: Optional[Dict[str, int]] = None,
+                                      **filtros) -> Page:
+        filtros["estado"] = "pendiente"
+        return _pagina_cacheada(
+            self.db, f"asesorias:programador:{programador_uid}", "asesorias:pendientes", filtros,
+            lambda: self._listar(models.Asesoria.programador_uid == programador_uid, **filtros), leidas,
+        )
+
+    def buscar(self, q: str, limit: int, after: Optional[Tuple[float, int]] = None,
+               programador_uid: Optional[str] = None, estado: Optional[str] = None) -> Page:
+        """Asesorías que coinciden con `q`, de más a menos relevante (con su `rango`)"""
+        criterios = _criterios_asesoria(programador_uid=programador_uid, estado=estado)
+        query, rango = busqueda.aplicar(self.db, self.db.query(*COLUMNAS_ASESORIA), q, *criterios)
+        query = query.add_columns(rango.label("rango"))
+        return _pagina_a_dicts(paginate_ranked(query, rango, models.Asesoria.id, limit, after))
+
+    @staticmethod
+    def _tags(usuario_uid: str, programador_uid: str) -> List[str]:
+        return [versiones.TAG_ASESORIAS, f"asesorias:usuario:{usuario_uid}",
+                f"asesorias:programador:{programador_uid}"]
+
+    def _confirmar_fila(self, fila: dict, accion: str):
+        tags = self._tags(fila["usuario_uid"], fila["programador_uid"])
+        _confirmar(self.db, [*tags, versiones.tag_id("asesorias", fila["id"])],
+                   eventos.crear_evento("asesoria", accion, [fila["id"]], tags))
+
+    def _fila_estadistica(self, asesoria_id: int) -> Optional[dict]:
+        # FOR UPDATE: otra actualización concurrente no puede cambiar el estado del que se resta el aporte
+        fila = self.db.query(*estadisticas.COLUMNAS).filter(
+            models.Asesoria.id == asesoria_id
+        ).with_for_update().first()
+        return fila._asdict() if fila is not None else None
 
     def create(self, asesoria_data: schemas.AsesoriaCreate):
-        asesoria = models.Asesoria(**asesoria_data.model_dump())
-        self.db.add(asesoria)
-        self.db.commit()
-        self.db.refresh(asesoria)
+        if asesoria_data.estado != "rechazada":
+            verificar_conflicto(self.db, asesoria_data.programador_uid,
+                                asesoria_data.fecha_solicitada, asesoria_data.hora_solicitada)
+
+        # INSERT ... RETURNING: sin SELECT de refresh
+        asesoria = self.repository.insert(asesoria_data.model_dump())
+        estadisticas.actualizar(self.db, despues=[asesoria])
+        self._confirmar_fila(asesoria, "creada")
         return asesoria
 
     def update(self, asesoria_id: int, asesoria_data: schemas.AsesoriaUpdate):
-        asesoria = self.get_by_id(asesoria_id)
-        if not asesoria:
-            return None
-
         update_data = asesoria_data.model_dump(exclude_unset=True)
-        
-        # Si se actualiza el estado, registrar la fecha de respuesta
-        if 'estado' in update_data and update_data['estado'] in ['aprobada', 'rechazada']:
-            update_data['fecha_respuesta'] = datetime.utcnow()
-        
-        for key, value in update_data.items():
-            setattr(asesoria, key, value)
-
-        self.db.commit()
-        self.db.refresh(asesoria)
+
+        # Solo se lee la fila antes si hay que comprobar cruces de horario.
+        # FOR UPDATE antes del bloqueo de la agenda: el mismo orden que update_bulk
+        if _puede_requerir_verificacion(update_data):
+            asesoria = self.db.query(models.Asesoria).filter(
+                models.Asesoria.id == asesoria_id
+            ).with_for_update().first()
+            if not asesoria:
+                return None
+            if _requiere_verificacion(asesoria.estado, update_data):
+                verificar_conflicto(
+                    self.db, asesoria.programador_uid,
+                    update_data.get('fecha_solicitada', asesoria.fecha_solicitada),
+                    update_data.get('hora_solicitada', asesoria.hora_solicitada),
+                    excluir_asesoria_ids=[asesoria.id],
+                )
+
+        _registrar_fecha_respuesta(update_data)
+
+        # El resumen de estadísticas solo cambia con el estado: se lee (y bloquea) la fila anterior
+        anterior = None
+        if 'estado' in update_data:
+            anterior = self._fila_estadistica(asesoria_id)
+            if anterior is None:
+                return None
+
+        # UPDATE ... RETURNING: el 404 sale de que no haya fila devuelta
+        asesoria = self.repository.update(asesoria_id, update_data)
+        if asesoria is None:
+            return None
+        if anterior is not None:
+            estadisticas.actualizar(self.db, antes=[anterior], despues=[asesoria])
+        self._confirmar_fila(asesoria, "actualizada")
         return asesoria
 
     def delete(self, asesoria_id: int):
-        asesoria = self.get_by_id(asesoria_id)
-        if asesoria:
-            self.db.delete(asesoria)
-            self.db.commit()
-            return True
-        return False
+        asesoria = self.repository.delete(asesoria_id)
+        if asesoria is None:
+            return False
+        estadisticas.actualizar(self.db, antes=[asesoria])
+        self._confirmar_fila(asesoria, "eliminada")
+        return True
+
+    # ----- Operaciones por lote (una sola transacción) -----
+
+    def create_bulk(self, items: List[schemas.AsesoriaCreate]) -> dict:
+        agenda = AgendaLote(self.db, [
+            (item.programador_uid, item.fecha_solicitada) for item in items if item.estado != "rechazada"
+        ])
+        resultados, filas = [], []
+        for indice, item in enumerate(items):
+            if item.estado != "rechazada":
+                try:
+                    agenda.verificar(item.programador_uid, item.fecha_solicitada, item.hora_solicitada)
+                except ConflictoHorarioError as e:
+                    resultados.append(_resultado(indice, error=str(e)))
+                    continue
+                if item.estado == "aprobada":
+                    agenda.reservar(item.programador_uid, item.fecha_solicitada, item.hora_solicitada)
+            resultados.append(_resultado(indice))
+            filas.append((indice, item.model_dump()))
+
+        if filas:
+            creadas = _insertar_lote(self.db, models.Asesoria, [fila for _, fila in filas])
+            estadisticas.actualizar(self.db, despues=[estadisticas.fila(asesoria) for asesoria in creadas])
+            tags = set()
+            for (indice, _), asesoria in zip(filas, creadas):
+                resultados[indice]["id"] = asesoria.id
+                tags.update(self._tags(asesoria.usuario_uid, asesoria.programador_uid))
+            ids = [asesoria.id for asesoria in creadas]
+            _confirmar(self.db, tags.union(versiones.tag_id("asesorias", id) for id in ids),
+                       eventos.crear_evento("asesoria", "creada", ids, tags))
+        return _resumen(resultados)
+
+    def update_bulk(self, items: List[schemas.AsesoriaBulkUpdate]) -> dict:
+        query = self.db.query(models.Asesoria).filter(models.Asesoria.id.in_([item.id for item in items]))
+        if any(item.estado is not None or _puede_requerir_verificacion(item.model_dump(exclude_unset=True))
+               for item in items):
+            # Los cambios de estado restan el aporte anterior al resumen y las verificaciones de cruces
+            # bloquean después la agenda: filas bloqueadas antes, en orden de id
+            query = query.order_by(models.Asesoria.id).with_for_update()
+        actuales = {a.id: a for a in query}
+        cambios = [
+            (item.id, actuales.get(item.id), item.model_dump(exclude_unset=True, exclude={"id"}))
+            for item in items
+        ]
+        por_verificar = [
+            (asesoria, update_data) for _, asesoria, update_data in cambios
+            if asesoria is not None and _requiere_verificacion(asesoria.estado, update_data)
+        ]
+        agenda = AgendaLote(
+            self.db,
+            [(a.programador_uid, d.get('fecha_solicitada', a.fecha_solicitada)) for a, d in por_verificar],
+            excluir_asesoria_ids=[a.id for a, _ in por_verificar],
+        )
+
+        ahora = datetime.utcnow()
+        resultados, filas, tags = [], [], set()
+        antes, despues = [], []
+        for indice, (asesoria_id, asesoria, update_data) in enumerate(cambios):
+            if asesoria is None:
+                resultados.append(_resultado(indice, asesoria_id, "Asesoría no encontrada"))
+                continue
+            if _requiere_verificacion(asesoria.estado, update_data):
+                fecha = update_data.get('fecha_solicitada', asesoria.fecha_solicitada)
+                hora = update_data.get('hora_solicitada', asesoria.hora_solicitada)
+                try:
+                    agenda.verificar(asesoria.programador_uid, fecha, hora)
+                except ConflictoHorarioError as e:
+                    resultados.append(_resultado(indice, asesoria_id, str(e)))
+                    continue
+                if update_data.get('estado', asesoria.estado) == 'aprobada':
+                    agenda.reservar(asesoria.programador_uid, fecha, hora)
+
+            _registrar_fecha_respuesta(update_data, ahora)
+            if update_data:
+                filas.append({"id": asesoria_id, **update_data})
+            if 'estado' in update_data:
+                anterior = estadisticas.fila(asesoria)
+                antes.append(anterior)
+                despues.append({**anterior, **update_data})
+            resultados.append(_resultado(indice, asesoria_id))
+            tags.update(self._tags(asesoria.usuario_uid, asesoria.programador_uid))
+
+        # Las transiciones de estado del lote comparten valores: pocas sentencias UPDATE
+        _update_agrupado(self.db, models.Asesoria, filas)
+        estadisticas.actualizar(self.db, antes, despues)
+        actualizadas = [r["id"] for r in resultados if r["ok"]]
+        _confirmar(self.db, tags.union(versiones.tag_id("asesorias", id) for id in actualizadas),
+                   eventos.crear_evento("asesoria", "actualizada", actualizadas, tags) if actualizadas else None)
+        return _resumen(resultados)
+
+    def delete_bulk(self, ids: List[int]) -> dict:
+        borradas = self.db.execute(
+            delete(models.Asesoria).where(models.Asesoria.id.in_(ids)).returning(
+                models.Asesoria.id, models.Asesoria.usuario_uid, *estadisticas.COLUMNAS
+            )
+        ).all()
+        estadisticas.actualizar(self.db, antes=[fila._asdict() for fila in borradas])
+        tags = {tag for fila in borradas for tag in self._tags(fila.usuario_uid, fila.programador_uid)}
+        borradas_ids = [fila.id for fila in borradas]
+        _confirmar(self.db, tags.union(versiones.tag_id("asesorias", id) for id in borradas_ids),
+                   eventos.crear_evento("asesoria", "eliminada", borradas_ids, tags) if borradas else None)
+        encontrados = set(borradas_ids)
+        return _resumen([
+            _resultado(indice, id, None if id in encontrados else "Asesoría no encontrada")
+            for indice, id in enumerate(ids)
+        ])
 
 # ========== Servicio para Ausencias ==========
 
 class AusenciaService:
     def __init__(self, db: Session):
         self.db = db
+        self.repository = AusenciaRepository(db)
 
-    def get_all(self):
-        return self.db.query(models.Ausencia).all()
+    def _listar(self, *criterios, limit: Optional[int] = None, after: Optional[int] = None,
+                desde: Optional[date] = None, hasta: Optional[date] = None) -> Page:
+        # Solo columnas (tuplas): sin identity map ni instrumentación ORM
+        query = self.db.query(*COLUMNAS_AUSENCIA).filter(
+            *criterios, *_criterios_ausencia(desde=desde, hasta=hasta)
+        )
+        return _pagina_a_dicts(paginate(query, models.Ausencia.id, limit, after))
+
+    def get_all(self, programador_uid: Optional[str] = None, **filtros) -> Page:
+        return self._listar(*_criterios_ausencia(programador_uid=programador_uid), **filtros)
 
     def get_by_id(self, ausencia_id: int):
         return self.db.query(models.Ausencia).filter(models.Ausencia.id == ausencia_id).first()
 
-    def get_by_programador(self, programador_uid: str):
-        return self.db.query(models.Ausencia).filter(models.Ausencia.programador_uid == programador_uid).all()
+    def get_by_programador(self, programador_uid: str, leidas: Optional[Dict[str, int]] = None,
+                           **filtros) -> Page:
+        return _pagina_cacheada(
+            self.db, f"ausencias:programador:{programador_uid}", "ausencias:programador", filtros,
+            lambda: self._listar(models.Ausencia.programador_uid == programador_uid, **filtros), leidas,
+        )
 
-    def get_by_programador_y_fecha(self, programador_uid: str, fecha: str):
-        return self.db.query(models.Ausencia).filter(
+    def get_by_programador_y_fecha(self, programador_uid: str, fecha: date):
+        filas = self.db.query(*COLUMNAS_AUSENCIA).filter(
             models.Ausencia.programador_uid == programador_uid,
             models.Ausencia.fecha == fecha
         ).all()
+        return [_fila_a_dict(fila) for fila in filas]
+
+    @staticmethod
+    def _tags(programador_uid: str) -> List[str]:
+        return [versiones.TAG_AUSENCIAS, f"ausencias:programador:{programador_uid}"]
+
+    def _confirmar_fila(self, fila: dict, accion: str):
+        tags = self._tags(fila["programador_uid"])
+        _confirmar(self.db, [*tags, versiones.tag_id("ausencias", fila["id"])],
+                   eventos.crear_evento("ausencia", accion, [fila["id"]], tags))
 
     def create(self, ausencia_data: schemas.AusenciaCreate):
-        ausencia = models.Ausencia(**ausencia_data.model_dump())
-        self.db.add(ausencia)
-        self.db.commit()
-        self.db.refresh(ausencia)
+        # INSERT ... RETURNING: sin SELECT de refresh
+        ausencia = self.repository.insert(ausencia_data.model_dump())
+        self._confirmar_fila(ausencia, "creada")
         return ausencia
 
     def update(self, ausencia_id: int, ausencia_data: schemas.AusenciaUpdate):
-        ausencia = self.get_by_id(ausencia_id)
-        if not ausencia:
+        # UPDATE ... RETURNING: el 404 sale de que no haya fila devuelta
+        ausencia = self.repository.update(ausencia_id, ausencia_data.model_dump(exclude_unset=True))
+        if ausencia is None:
             return None
-
-        update_data = ausencia_data.model_dump(exclude_unset=True)
-        for key, value in update_data.items():
-            setattr(ausencia, key, value)
-
-        self.db.commit()
-        self.db.refresh(ausencia)
+        self._confirmar_fila(ausencia, "actualizada")
         return ausencia
 
     def delete(self, ausencia_id: int):
-        ausencia = self.get_by_id(ausencia_id)
-        if ausencia:
-            self.db.delete(ausencia)
-            self.db.commit()
-            return True
-        return False
+        ausencia = self.repository.delete(ausencia_id)
+        if ausencia is None:
+            return False
+        self._confirmar_fila(ausencia, "eliminada")
+        return True
+
+    # ----- Operaciones por lote (una sola transacción) -----
+
+    def create_bulk(self, items: List[schemas.AusenciaCreate]) -> dict:
+        if not items:
+            return _resumen([])
+        creadas = _insertar_lote(self.db, models.Ausencia, [item.model_dump() for item in items])
+        resumen = _resumen([_resultado(indice, ausencia.id) for indice, ausencia in enumerate(creadas)])
+        tags = {tag for ausencia in creadas for tag in self._tags(ausencia.programador_uid)}
+        ids = [ausencia.id for ausencia in creadas]
+        _confirmar(self.db, tags.union(versiones.tag_id("ausencias", id) for id in ids),
+                   eventos.crear_evento("ausencia", "creada", ids, tags))
+        return resumen
+
+    def update_bulk(self, items: List[schemas.AusenciaBulkUpdate]) -> dict:
+        ids = [item.id for item in items]
+        actuales = {
+            a.id: a for a in self.db.query(models.Ausencia).filter(models.Ausencia.id.in_(ids))
+        }
+
+        resultados, filas = [], []
+        for indice, item in enumerate(items):
+            ausencia = actuales.get(item.id)
+            if ausencia is None:
+                resultados.append(_resultado(indice, item.id, "Ausencia no encontrada"))
+                continue
+            update_data = item.model_dump(exclude_unset=True, exclude={"id"})
+            if update_data:
+                filas.append({"id": item.id, **update_data})
+            resultados.append(_resultado(indice, item.id))
+
+        tags = {tag for ausencia in actuales.values() for tag in self._tags(ausencia.programador_uid)}
+        _update_agrupado(self.db, models.Ausencia, filas)
+        actualizadas = [r["id"] for r in resultados if r["ok"]]
+        _confirmar(self.db, tags.union(versiones.tag_id("ausencias", id) for id in actualizadas),
+                   eventos.crear_evento("ausencia", "actualizada", actualizadas, tags) if actualizadas else None)
+        return _resumen(resultados)
+
+    def delete_bulk(self, ids: List[int]) -> dict:
+        borradas = self.db.execute(
+            delete(models.Ausencia).where(models.Ausencia.id.in_(ids)).returning(
+                models.Ausencia.id, models.Ausencia.programador_uid
+            )
+        ).all()
+        tags = {tag for fila in borradas for tag in self._tags(fila.programador_uid)}
+        borradas_ids = [fila.id for fila in borradas]
+        _confirmar(self.db, tags.union(versiones.tag_id("ausencias", id) for id in borradas_ids),
+                   eventos.crear_evento("ausencia", "eliminada", borradas_ids, tags) if borradas else None)
+        encontrados = set(borradas_ids)
+        return _resumen([
+            _resultado(indice, id, None if id in encontrados else "Ausencia no encontrada")
+            for indice, id in enumerate(ids)
+        ])
+
+# ========== Servicio de Disponibilidad ==========
+
+class DisponibilidadService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_slots_libres(self, programador_uid: str, desde: date, hasta: date, slot: int,
+                         jornada_inicio: time, jornada_fin: time):
+        ocupacion = cargar_ocupacion(self.db, programador_uid, desde, hasta)
+        libres = ocupacion.slots_libres(desde, hasta, timedelta(minutes=slot), jornada_inicio, jornada_fin)
+        return [
+            {
+                "fecha": inicio.date().isoformat(),
+                "hora_inicio": inicio.strftime("%H:%M"),
+                "hora_fin": fin.strftime("%H:%M"),
+            }
+            for inicio, fin in libres
+        ]
+
+# ========== Servicio de Calendario ==========
+
+# Columnas de cada fila del calendario (la respuesta las nombra una sola vez)
+CAMPOS_CALENDARIO = {
+    "asesorias": ["id", "hora_solicitada", "estado", "tema", "usuario_uid", "usuario_nombre"],
+    "ausencias": ["id", "hora_inicio", "hora_fin", "motivo"],
+}
+
+class CalendarioService:
+    """Asesorías y ausencias de varios programadores: una consulta por tabla (IN + rango de fechas)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_calendario(self, programadores: List[str], desde: date, hasta: date,
+                       estado: Optional[str] = None) -> dict:
+        Asesoria, Ausencia = models.Asesoria, models.Ausencia
+        consultas = {
+            "asesorias": (Asesoria, Asesoria.fecha_solicitada, Asesoria.hora_solicitada,
+                          _criterios_asesoria(estado=estado, desde=desde, hasta=hasta)),
+            "ausencias": (Ausencia, Ausencia.fecha, Ausencia.hora_inicio,
+                          _criterios_ausencia(desde=desde, hasta=hasta)),
+        }
+        # Todos los programadores pedidos aparecen, aunque no tengan nada en el rango
+        calendario = {uid: {} for uid in programadores}
+        for tipo, (model, fecha, hora, criterios) in consultas.items():
+            columnas = [getattr(model, campo) for campo in CAMPOS_CALENDARIO[tipo]]
+            query = (
+                select(model.programador_uid, fecha, *columnas)
+                .where(model.programador_uid.in_(programadores), *criterios)
+                .order_by(fecha, hora, model.id)
+            )
+            for uid, dia, *fila in self.db.execute(query):
+                calendario[uid].setdefault(dia, {"asesorias": [], "ausencias": []})[tipo].append(fila)
+        return {"campos": CAMPOS_CALENDARIO, "programadores": calendario}
+
+# ========== Servicio de Estadísticas ==========
+
+class EstadisticasService:
+    """Consultas del dashboard sobre el resumen incremental (no lee la tabla asesorias)"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _agrupar(self, dimension=None, programador_uid: Optional[str] = None,
+                 desde: Optional[date] = None, hasta: Optional[date] = None) -> dict:
+        tabla = models.EstadisticaAsesoria
+        columnas = [dimension] if dimension is not None else []
+        query = self.db.query(
+            *columnas, tabla.estado, tabla.tramo_respuesta,
+            func.sum(tabla.cantidad), func.sum(tabla.suma_respuesta_s),
+        )
+        if programador_uid is not None:
+            query = query.filter(tabla.programador_uid == programador_uid)
+        if desde is not None:
+            query = query.filter(tabla.semana >= estadisticas.semana(desde))
+        if hasta is not None:
+            query = query.filter(tabla.semana <= hasta)
+        query = query.group_by(*columnas, tabla.estado, tabla.tramo_respuesta)
+
+        grupos = {}
+        for fila in query:
+            clave = fila[0] if dimension is not None else None
+            *_, estado, tramo, cantidad, suma = fila
+            # En PostgreSQL SUM(bigint) devuelve numeric (Decimal)
+            grupos.setdefault(clave, estadisticas.Acumulado()).sumar(estado, tramo, int(cantidad), float(suma))
+        return grupos
+
+    def get_resumen(self, **filtros) -> dict:
+        return self._agrupar(**filtros).get(None, estadisticas.Acumulado()).a_dict()
+
+    def get_por_programador(self, **filtros) -> List[dict]:
+        grupos = self._agrupar(models.EstadisticaAsesoria.programador_uid, **filtros)
+        return [{"programador_uid": uid, **grupos[uid].a_dict()} for uid in sorted(grupos)]
+
+    def get_por_semana(self, **filtros) -> List[dict]:
+        grupos = self._agrupar(models.EstadisticaAsesoria.semana, **filtros)
+        return [{"semana": semana, **grupos[semana].a_dict()} for semana in sorted(grupos)]
+
+# ========== Servicio de Versiones (ETags) ==========
+
+class VersionService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get_versiones(self, tags: List[str]) -> Dict[str, int]:
+        """Versiones de las etiquetas para el ETag: solo lee los contadores, no las filas"""
+        return versiones.obtener(self.db, tags)
+
+# ========== Versiones asíncronas de los servicios ==========
+
+class ServicioAsync:
+    """
+    Expone los métodos de un servicio síncrono como corutinas.
+
+    Con una AsyncSession el código del servicio se ejecuta mediante
+    `run_sync` sobre el driver asíncrono (asyncpg) sin bloquear el event loop.
+    Con una Session normal se ejecuta en el threadpool de FastAPI.
+    """
+    servicio = None
+
+    def __init__(self, db: Union[AsyncSession, Session]):
+        self.db = db
+
+    async def _ejecutar(self, fn):
+        if isinstance(self.db, AsyncSession):
+            return await self.db.run_sync(fn)
+        return await run_in_threadpool(fn, self.db)
+
+    def __getattr__(self, name):
+        metodo = getattr(self.servicio, name)
+
+        async def llamada(*args, **kwargs):
+            return await self._ejecutar(lambda session: metodo(self.servicio(session), *args, **kwargs))
+
+        return llamada
+
+
+class AsyncAsesoriaService(ServicioAsync):
+    servicio = AsesoriaService
+
+
+class AsyncAusenciaService(ServicioAsync):
+    servicio = AusenciaService
+
+
+class AsyncDisponibilidadService(ServicioAsync):
+    servicio = DisponibilidadService
+
+
+class AsyncCalendarioService(ServicioAsync):
+    servicio = CalendarioService
+
+
+class AsyncEstadisticasService(ServicioAsync):
+    servicio = EstadisticasService
+
+
+class AsyncVersionService(ServicioAsync):
+    servicio = VersionService
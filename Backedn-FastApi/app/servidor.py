@@ -0,0 +1,170 @@
+"""
+Arranque de producción con varios workers.
+
+Con gunicorn instalado, la app se importa una sola vez en el proceso
+maestro (preload) y los workers nacen con fork: comparten lo ya importado
+y cada uno crea sus engines en el lifespan, después del fork (los pools no
+se comparten entre procesos). Sin gunicorn se usa el supervisor de
+uvicorn, que importa la app en cada worker.
+
+Las migraciones (DB_MIGRATE_ON_STARTUP=1) se aplican una vez en el
+maestro antes de crear los workers, no en cada uno.
+
+Con más de un worker:
+- las métricas se escriben en PROMETHEUS_MULTIPROC_DIR (un directorio
+  temporal si no se indica) y /metrics suma las de todos los workers
+- con réplica de lectura hace falta QUERY_CACHE_URL: las marcas de
+  read-your-writes tienen que verlas todos los workers
+- la caché de consultas puede ser local de cada worker (sus claves llevan
+  las versiones de la base), pero cada uno la llena por su cuenta
+- el límite por usuario (ADMISION_TASA_UID) y el control de admisión son
+  de cada worker
+
+La cantidad de workers sale de WEB_CONCURRENCY (por defecto, un worker por
+núcleo disponible) y las conexiones de cada uno de DB_CONEXIONES_MAX o de
+DB_POOL_SIZE + DB_MAX_OVERFLOW; ver settings.py.
+
+Uso:
+    python -m app.servidor                           # un worker por núcleo, puerto 5000
+    python -m app.servidor --workers 4 --port 8000
+    DB_CONEXIONES_MAX=80 python -m app.servidor      # 80 conexiones entre todos los workers
+    DB_POOL_EXTERNO=1 DATABASE_URL=postgresql://...@pgbouncer:6432/proyecto_ppw python -m app.servidor
+"""
+
+import argparse
+import glob
+import importlib
+import os
+import tempfile
+
+APP_POR_DEFECTO = "app.main:app"
+
+
+def cargar_app(ruta: str, factory: bool = False):
+    """Importa "modulo:atributo" (y lo llama si es una factory)"""
+    modulo, _, atributo = ruta.partition(":")
+    app = getattr(importlib.import_module(modulo), atributo or "app")
+    return app() if factory else app
+
+
+def conexiones_por_worker() -> int:
+    """Conexiones a la base primaria que puede abrir cada worker (pool + LISTEN)"""
+    from . import settings
+
+    listen = 1 if settings.EVENTOS_BACKEND == "postgres" else 0
+    return settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW + listen
+
+
+def _migrar_una_vez():
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+
+    from . import migraciones, settings
+
+    if not settings.DB_MIGRATE_ON_STARTUP:
+        return
+    engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        migraciones.aplicar(engine)
+    finally:
+        engine.dispose()
+    # Los workers heredan la configuración (fork) o el entorno (uvicorn): ya no migran
+    os.environ["DB_MIGRATE_ON_STARTUP"] = "0"
+    settings.DB_MIGRATE_ON_STARTUP = False
+
+
+def _preparar_workers(workers: int):
+    """Estado compartido entre workers; antes de importar la app (y prometheus_client)"""
+    from . import settings
+
+    if workers < 2:
+        return
+    if settings.DATABASE_REPLICA_URL and not os.getenv("QUERY_CACHE_URL"):
+        raise SystemExit("❌ Con DATABASE_REPLICA_URL y varios workers hace falta QUERY_CACHE_URL (Redis): "
+                         "las lecturas posteriores a una escritura pueden llegar a otro worker")
+    directorio = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if directorio:
+        # Archivos de una ejecución anterior: sus contadores se sumarían a los nuevos
+        for archivo in glob.glob(os.path.join(directorio, "*.db")):
+            os.remove(archivo)
+    else:
+        directorio = tempfile.mkdtemp(prefix="prometheus-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = directorio
+    print(f"📊 Métricas de los {workers} workers en {directorio}")
+
+
+def _worker_terminado(server, worker):
+    from .metrics import worker_terminado
+
+    worker_terminado(worker.pid)
+
+
+def _clase_worker() -> str:
+    try:
+        import uvicorn_worker  # noqa: F401  (paquete separado desde uvicorn 0.30)
+        return "uvicorn_worker.UvicornWorker"
+    except ImportError:
+        return "uvicorn.workers.UvicornWorker"
+
+
+def _gunicorn(ruta_app: str, factory: bool, host: str, puerto: int, workers: int, timeout: int):
+    from gunicorn.app.base import BaseApplication
+
+    class Servidor(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{puerto}")
+            self.cfg.set("workers", workers)
+            self.cfg.set("worker_class", _clase_worker())
+            self.cfg.set("preload_app", True)
+            self.cfg.set("graceful_timeout", timeout)
+            self.cfg.set("child_exit", _worker_terminado)
+
+        def load(self):
+            return cargar_app(ruta_app, factory)
+
+    Servidor().run()
+
+
+def _uvicorn(ruta_app: str, factory: bool, host: str, puerto: int, workers: int, timeout: int):
+    import uvicorn
+
+    uvicorn.run(ruta_app, factory=factory, host=host, port=puerto, workers=workers,
+                timeout_graceful_shutdown=timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor de producción con varios workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, help="Procesos (por defecto WEB_CONCURRENCY o uno por núcleo)")
+    parser.add_argument("--app", default=APP_POR_DEFECTO, help="Aplicación ASGI como modulo:atributo")
+    parser.add_argument("--factory", action="store_true", help="--app es una función que crea la aplicación")
+    parser.add_argument("--timeout", type=int, default=30, help="Segundos para terminar las peticiones al apagar")
+    args = parser.parse_args()
+
+    # Antes de importar settings: el presupuesto de conexiones depende de la cantidad de workers
+    if args.workers:
+        os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    from . import settings
+
+    workers = settings.WEB_CONCURRENCY
+    if settings.DB_POOL_EXTERNO:
+        print(f"🚀 {workers} workers con pooler externo (NullPool): el límite de conexiones lo fija el pooler")
+    else:
+        print(f"🚀 {workers} workers, pool por worker {settings.DB_POOL_SIZE}+{settings.DB_MAX_OVERFLOW}: "
+              f"hasta {workers * conexiones_por_worker()} conexiones a PostgreSQL"
+              + (f" (presupuesto {settings.DB_CONEXIONES_MAX})" if settings.DB_CONEXIONES_MAX else ""))
+
+    _preparar_workers(workers)
+    _migrar_una_vez()
+    try:
+        import gunicorn  # noqa: F401
+        lanzar = _gunicorn
+    except ImportError:
+        print("⚠️ gunicorn no está instalado: se usa uvicorn --workers (sin preload)")
+        lanzar = _uvicorn
+    lanzar(args.app, args.factory, args.host, args.port, workers, args.timeout)
+
+
+if __name__ == "__main__":
+    main()
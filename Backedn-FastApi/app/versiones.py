@@ -0,0 +1,79 @@
+"""Contadores de versión por etiqueta para ETags y GET condicionales."""
+
+import hashlib
+from typing import Dict, Iterable, List
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+_INSERTS = {"postgresql": pg_insert, "sqlite": sqlite_insert}
+
+# Etiquetas globales (listados completos). Todas las escrituras las incrementan: se hace
+# después del commit (incrementar_globales) para no retener su fila durante la transacción
+TAG_ASESORIAS = "asesorias"
+TAG_AUSENCIAS = "ausencias"
+TAGS_GLOBALES = frozenset({TAG_ASESORIAS, TAG_AUSENCIAS})
+
+
+def tag_id(recurso: str, id) -> str:
+    """Etiqueta de un elemento (GET por id): solo la incrementan las escrituras de esa fila."""
+    return f"{recurso}:id:{id}"
+
+
+def incrementar(db: Session, claves: Iterable[str]):
+    """
+    Suma 1 a la versión de cada etiqueta dentro de la transacción en curso.
+
+    Las claves se ordenan para que dos transacciones concurrentes bloqueen
+    las filas en el mismo orden y no se produzcan deadlocks.
+    """
+    claves = sorted(set(claves))
+    if not claves:
+        return
+    tabla = models.VersionEntidad.__table__
+    stmt = _INSERTS[db.get_bind().dialect.name](tabla)
+    stmt = stmt.on_conflict_do_update(index_elements=[tabla.c.clave], set_={"version": tabla.c.version + 1})
+    # executemany: la sentencia se compila una vez (y queda en caché) aunque haya miles de claves
+    db.execute(stmt, [{"clave": clave, "version": 1} for clave in claves])
+
+
+def incrementar_globales(db: Session, claves: Iterable[str]):
+    """
+    Incrementa las etiquetas globales de `claves` en una transacción corta propia.
+
+    Se llama después del commit de la escritura: la fila de la etiqueta
+    global se bloquea solo lo que dura el UPDATE. Mientras tanto un GET puede
+    leer los datos nuevos con la versión anterior; al incrementarse cambia el
+    ETag y el cliente vuelve a pedirlos (nunca queda fijado un dato viejo).
+    """
+    globales = TAGS_GLOBALES.intersection(claves)
+    if globales:
+        incrementar(db, globales)
+        db.commit()
+
+
+def obtener(db: Session, claves: List[str]) -> Dict[str, int]:
+    """Versión actual de cada etiqueta (0 si nunca cambió), con una búsqueda por clave primaria."""
+    filas = db.query(models.VersionEntidad.clave, models.VersionEntidad.version).filter(
+        models.VersionEntidad.clave.in_(claves)
+    )
+    versiones = {clave: 0 for clave in claves}
+    versiones.update(dict(filas.all()))
+    return versiones
+
+
+def etag(recurso: str, versiones: Dict[str, int]) -> str:
+    """ETag débil a partir del recurso (ruta + query) y las versiones de sus etiquetas."""
+    base = recurso + "|" + ",".join(f"{k}={versiones[k]}" for k in sorted(versiones))
+    return 'W/"' + hashlib.sha1(base.encode()).hexdigest()[:20] + '"'
+
+
+def coincide(if_none_match: str, valor: str) -> bool:
+    """Compara un header If-None-Match con el ETag (comparación débil, admite listas y *)."""
+    if not if_none_match:
+        return False
+    candidatos = [c.strip() for c in if_none_match.split(",")]
+    return "*" in candidatos or any(c.removeprefix("W/") == valor.removeprefix("W/") for c in candidatos)
@@ -0,0 +1,9 @@
+"""
+Benchmarks reproducibles del backend FastAPI.
+
+- `datos`: generador de asesorías y ausencias con semilla y sesgo entre programadores.
+- `carga`: driver de carga en proceso (latencias p50/p95/p99, RPS y sentencias SQL por petición).
+- `comparar`: compara un archivo de resultados con una línea base.
+- `planes`: planes de ejecución de las consultas principales.
+- `serializacion`: filas/segundo de la serialización de listados.
+"""
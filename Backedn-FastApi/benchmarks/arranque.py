@@ -0,0 +1,106 @@
+"""
+Tiempo de arranque de un worker: del import de la app a la primera respuesta.
+
+Lanza N procesos nuevos (como un worker de uvicorn/gunicorn) y en cada uno
+mide el import de `app.main`, el lifespan de arranque, la primera respuesta
+(/health) y la primera consulta a la base (/api/asesorias). El tiempo del
+proceso completo incluye además el arranque del intérprete.
+
+Uso:
+    python -m benchmarks.arranque --procesos 5 --salida arranque.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from .entorno import DEFAULT_DATABASE_URL
+
+ETAPAS = ["import_s", "lifespan_s", "primera_respuesta_s", "primera_consulta_s", "total_s", "proceso_s"]
+
+
+async def _primeras_peticiones(app) -> dict:
+    import httpx
+
+    tiempos = {}
+    inicio = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        tiempos["lifespan_s"] = time.perf_counter() - inicio
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://arranque") as client:
+            inicio = time.perf_counter()
+            (await client.get("/health")).raise_for_status()
+            tiempos["primera_respuesta_s"] = time.perf_counter() - inicio
+
+            inicio = time.perf_counter()
+            (await client.get("/api/asesorias", params={"limit": 1})).raise_for_status()
+            tiempos["primera_consulta_s"] = time.perf_counter() - inicio
+    return tiempos
+
+
+def hijo(database_url: str):
+    """Se ejecuta en el proceso nuevo: imprime los tiempos en JSON por stdout."""
+    inicio = time.perf_counter()
+
+    from .entorno import preparar_app
+
+    app, _ = preparar_app(database_url)
+    tiempos = {"import_s": time.perf_counter() - inicio}
+    tiempos.update(asyncio.run(_primeras_peticiones(app)))
+    tiempos["total_s"] = time.perf_counter() - inicio
+    print(json.dumps(tiempos))
+
+
+def _lanzar(database_url: str) -> dict:
+    env = dict(os.environ, FIREBASE_PROJECT_ID=os.getenv("FIREBASE_PROJECT_ID", "benchmark"))
+    inicio = time.perf_counter()
+    resultado = subprocess.run(
+        [sys.executable, "-m", "benchmarks.arranque", "--hijo", "--database-url", database_url],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    tiempos = json.loads(resultado.stdout.strip().splitlines()[-1])
+    tiempos["proceso_s"] = time.perf_counter() - inicio
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de arranque de un worker")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--procesos", type=int, default=5)
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        hijo(args.database_url)
+        return
+
+    # Esquema y unas pocas filas, fuera de la medición
+    from . import datos
+    from .entorno import crear_engine
+
+    datos.sembrar(crear_engine(args.database_url), datos.ConfigDatos(asesorias=100, ausencias=10))
+
+    ejecuciones = [_lanzar(args.database_url) for _ in range(args.procesos)]
+    resumen = {
+        etapa: {
+            "mediana_ms": round(statistics.median(e[etapa] for e in ejecuciones) * 1000, 1),
+            "max_ms": round(max(e[etapa] for e in ejecuciones) * 1000, 1),
+        }
+        for etapa in ETAPAS
+    }
+    for etapa, valores in resumen.items():
+        print(f"{etapa:<22} mediana={valores['mediana_ms']:>8.1f}ms  max={valores['max_ms']:>8.1f}ms")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"procesos": args.procesos, "resumen": resumen, "ejecuciones": ejecuciones}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Latencia de GET /api/asesorias/buscar sobre un corpus grande con semilla.
+
+Siembra asesorías con textos en español (vocabulario con frecuencias tipo
+Zipf: unas pocas palabras aparecen en casi todas, muchas son raras) y mide
+cada tipo de consulta llamando al servicio directamente: palabra frecuente,
+palabra rara, varias palabras, con filtros, segunda página y un error de
+tipeo en el tema. Como referencia se mide también el LIKE sin índice que
+haría falta sin la búsqueda de texto completo.
+
+En PostgreSQL la migración 004 (tsvector + GIN + trigramas) se aplica
+después de sembrar; en SQLite la tabla FTS5 se crea con el esquema.
+
+Uso:
+    python -m benchmarks.busqueda --database-url sqlite:///./busqueda.db --sembrar --asesorias 200000
+    python -m benchmarks.busqueda --database-url postgresql://... --sembrar --asesorias 1000000
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from . import datos as datos_mod
+from .carga import percentil
+from .entorno import crear_engine
+
+# Palabras ordenadas de más a menos frecuentes (rango Zipf)
+VOCABULARIO = [
+    "consulta", "proyecto", "error", "base", "datos", "código", "aplicación", "función", "clase", "servidor",
+    "angular", "python", "java", "sql", "api", "rest", "docker", "prueba", "componente", "formulario",
+    "índice", "rendimiento", "seguridad", "autenticación", "despliegue", "contenedor", "migración", "esquema",
+    "consultas", "transacción", "herencia", "polimorfismo", "interfaz", "servicio", "controlador", "ruta",
+    "firebase", "spring", "fastapi", "postgresql", "optimización", "algoritmo", "recursión", "árbol", "grafo",
+    "ordenamiento", "búsqueda", "memoria", "concurrencia", "hilos", "asíncrono", "promesa", "observable",
+    "typescript", "javascript", "css", "html", "diseño", "patrón", "arquitectura", "microservicios",
+    "kubernetes", "caché", "redis", "cola", "mensajería", "websocket", "notificación", "correo", "validación",
+    "paginación", "filtro", "reporte", "gráfico", "estadística", "depuración", "refactorización", "git",
+]
+RELLENO = ["de", "la", "el", "en", "con", "para", "que", "y", "un", "una", "por", "mi", "no", "se", "como"]
+
+
+def _frase(rng: random.Random, pesos: List[float], palabras: int) -> str:
+    elegidas = rng.choices(VOCABULARIO, pesos, k=palabras)
+    return " ".join(w if rng.random() < 0.6 else f"{rng.choice(RELLENO)} {w}" for w in elegidas)
+
+
+def filas_corpus(config: datos_mod.ConfigDatos, rng: random.Random):
+    """Las asesorías de `datos.filas_asesorias` con tema, descripción y respuesta en español"""
+    pesos = datos_mod.pesos_zipf(len(VOCABULARIO), config.zipf)
+    for fila in datos_mod.filas_asesorias(config, rng):
+        fila["tema"] = _frase(rng, pesos, rng.randint(2, 5)).capitalize()
+        fila["descripcion"] = _frase(rng, pesos, rng.randint(10, 40))
+        if fila["respuesta"] is not None:
+            fila["respuesta"] = _frase(rng, pesos, rng.randint(5, 20))
+        yield fila
+
+
+def sembrar(engine: Engine, config: datos_mod.ConfigDatos):
+    from app import migraciones, models
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    inicio = time.perf_counter()
+    datos_mod._insertar(engine, models.Asesoria, filas_corpus(config, random.Random(config.semilla)))
+    print(f"Sembradas {config.asesorias} asesorías en {time.perf_counter() - inicio:.1f}s")
+
+    if engine.dialect.name == "postgresql":
+        inicio = time.perf_counter()
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql((migraciones.MIGRACIONES_DIR / "004_busqueda.sql").read_text(encoding="utf-8"))
+            conn.exec_driver_sql("ANALYZE asesorias")
+        print(f"Columna tsvector e índices GIN en {time.perf_counter() - inicio:.1f}s")
+
+
+def consultas(programador: str) -> List[Tuple[str, Callable]]:
+    from app import models, service
+
+    def buscar(q: str, **filtros):
+        return lambda db: service.AsesoriaService(db).buscar(q, 20, **filtros)
+
+    def segunda_pagina(q: str):
+        def fn(db):
+            asesorias = service.AsesoriaService(db)
+            primera = asesorias.buscar(q, 20)
+            if primera.next_cursor:
+                from app.pagination import decode_rank_cursor
+                return asesorias.buscar(q, 20, decode_rank_cursor(primera.next_cursor))
+            return primera
+        return fn
+
+    def like(palabra: str):
+        # Referencia: lo que costaría buscar sin índice de texto completo
+        def fn(db):
+            patron = f"%{palabra}%"
+            return db.query(*service.COLUMNAS_ASESORIA).filter(
+                models.Asesoria.tema.ilike(patron) | models.Asesoria.descripcion.ilike(patron)
+            ).order_by(models.Asesoria.id.desc()).limit(20).all()
+        return fn
+
+    return [
+        ("palabra frecuente", buscar("consulta")),
+        ("palabra rara", buscar("refactorización")),
+        ("sin acentos", buscar("migracion")),
+        ("varias palabras", buscar("docker despliegue contenedor")),
+        ("frecuente + programador + estado", buscar("proyecto", programador_uid=programador, estado="aprobada")),
+        ("segunda página", segunda_pagina("error")),
+        ("error de tipeo en el tema", buscar("kubernets")),
+        ("LIKE sin índice (referencia)", like("refactorización")),
+    ]
+
+
+def medir(engine: Engine, fn: Callable, repeticiones: int) -> Dict[str, float]:
+    tiempos, filas = [], 0
+    with Session(engine) as db:
+        fn(db)  # calentamiento (caché de sentencias y páginas)
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = fn(db)
+            tiempos.append(time.perf_counter() - inicio)
+            filas = len(getattr(resultado, "items", resultado))
+            db.rollback()
+    tiempos.sort()
+    return {
+        "p50_ms": round(percentil(tiempos, 50) * 1000, 3),
+        "p95_ms": round(percentil(tiempos, 95) * 1000, 3),
+        "p99_ms": round(percentil(tiempos, 99) * 1000, 3),
+        "filas": filas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la búsqueda de texto completo")
+    parser.add_argument("--database-url", default="sqlite:///./busqueda.db")
+    parser.add_argument("--sembrar", action="store_true", help="Sembrar el corpus antes de medir")
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    datos_mod.agregar_argumentos(parser)
+    parser.set_defaults(asesorias=200_000)
+    args = parser.parse_args()
+
+    engine = crear_engine(args.database_url)
+    config = datos_mod.config_desde_args(args)
+    if args.sembrar:
+        sembrar(engine, config)
+
+    resultados = {}
+    for nombre, fn in consultas(datos_mod.uids("prog", config.programadores)[0]):
+        resultados[nombre] = res = medir(engine, fn, args.repeticiones)
+        print(f"{nombre:<36} p50={res['p50_ms']:>9.2f}ms p95={res['p95_ms']:>9.2f}ms "
+              f"p99={res['p99_ms']:>9.2f}ms filas={res['filas']}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"base_de_datos": engine.dialect.name, "asesorias": config.asesorias,
+                       "consultas": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Vista de calendario de N programadores: fan-out por programador contra /api/calendario.
+
+El frontend armaba el calendario con 2 peticiones por programador
+(GET /asesorias/programador/{uid} y GET /ausencias/programador/{uid} con
+el rango de fechas), lanzadas a la vez; el navegador abre como mucho 6
+conexiones por origen en HTTP/1.1 (--concurrencia). Este benchmark mide
+el tiempo de armar la vista completa de las dos formas, con las
+sentencias SQL y los bytes recibidos:
+
+- fan-out: 2×N peticiones, --concurrencia a la vez (cada una con su sesión, su ETag y su consulta)
+- calendario: una petición a /api/calendario con los N programadores
+
+La caché de consultas se desactiva (QUERY_CACHE_TTL=0, salvo que se pase
+otro valor) para que las dos formas lean de la base en cada repetición.
+
+Uso:
+    python -m benchmarks.calendario --sembrar --programadores 50 --dias-vista 31
+    python -m benchmarks.calendario --database-url postgresql://... --sembrar --asesorias 200000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+from . import datos as datos_mod
+from .carga import percentil
+from .entorno import DEFAULT_DATABASE_URL, crear_engine, sentencias_peticion
+
+
+def _fan_out(programadores: List[str], desde: str, hasta: str) -> List[Tuple[str, dict]]:
+    rango = {"desde": desde, "hasta": hasta}
+    return [(ruta.format(uid=uid), rango) for uid in programadores
+            for ruta in ("/api/asesorias/programador/{uid}", "/api/ausencias/programador/{uid}")]
+
+
+def _calendario(programadores: List[str], desde: str, hasta: str) -> List[Tuple[str, dict]]:
+    return [("/api/calendario", {"programadores": ",".join(programadores), "desde": desde, "hasta": hasta})]
+
+
+FORMAS = {"fan-out": _fan_out, "calendario": _calendario}
+
+
+async def _vista(client, peticiones: List[Tuple[str, dict]], concurrencia: int) -> Tuple[float, int, int, int]:
+    """Peticiones de una vista, `concurrencia` a la vez; devuelve (segundos, sentencias, bytes, errores)"""
+    semaforo = asyncio.Semaphore(concurrencia)
+
+    async def una(ruta: str, params: dict):
+        async with semaforo:
+            return await client.get(ruta, params=params)
+
+    contador = [0]
+    token = sentencias_peticion.set(contador)
+    try:
+        inicio = time.perf_counter()
+        respuestas = await asyncio.gather(*(una(ruta, params) for ruta, params in peticiones))
+        segundos = time.perf_counter() - inicio
+    finally:
+        sentencias_peticion.reset(token)
+    errores = sum(r.status_code != 200 for r in respuestas)
+    return segundos, contador[0], sum(len(r.content) for r in respuestas), errores
+
+
+async def medir(app, programadores: List[str], desde: str, hasta: str,
+                repeticiones: int, calentamiento: int, concurrencia: int) -> Dict[str, dict]:
+    import httpx
+
+    resultados = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for nombre, construir in FORMAS.items():
+            peticiones = construir(programadores, desde, hasta)
+            for _ in range(calentamiento):
+                await _vista(client, peticiones, concurrencia)
+            medidas = [await _vista(client, peticiones, concurrencia) for _ in range(repeticiones)]
+            latencias = sorted(segundos for segundos, *_ in medidas)
+            resultados[nombre] = {
+                "peticiones_http": len(peticiones),
+                "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+                "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+                "sentencias": medidas[-1][1],
+                "bytes": medidas[-1][2],
+                "errores": sum(errores for *_, errores in medidas),
+            }
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calendario de N programadores: fan-out contra /api/calendario")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--sembrar", action="store_true", help="Recrear las tablas con datos de benchmark")
+    parser.add_argument("--async", dest="modo_async", action="store_true", help="DB_ASYNC=1")
+    parser.add_argument("--desde", default=datos_mod.FECHA_INICIO.isoformat(), help="Primer día de la vista")
+    parser.add_argument("--dias-vista", type=int, default=31, help="Días de la vista (máximo 92)")
+    parser.add_argument("--concurrencia", type=int, default=6,
+                        help="Peticiones simultáneas del fan-out (conexiones del navegador por origen)")
+    parser.add_argument("--repeticiones", type=int, default=30)
+    parser.add_argument("--calentamiento", type=int, default=3)
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    datos_mod.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QUERY_CACHE_TTL", "0")
+    config = datos_mod.config_desde_args(args)
+    engine = crear_engine(args.database_url)
+    if args.sembrar:
+        inicio = time.perf_counter()
+        datos_mod.sembrar(engine, config)
+        print(f"Datos sembrados en {time.perf_counter() - inicio:.1f}s")
+
+    from .entorno import preparar_app
+
+    app, _ = preparar_app(args.database_url, args.modo_async)
+    programadores = datos_mod.uids("prog", config.programadores)
+    desde = date.fromisoformat(args.desde)
+    hasta = (desde + timedelta(days=args.dias_vista - 1)).isoformat()
+    print(f"Vista de {len(programadores)} programadores del {desde.isoformat()} al {hasta}")
+
+    resultados = asyncio.run(medir(app, programadores, desde.isoformat(), hasta,
+                                   args.repeticiones, args.calentamiento, args.concurrencia))
+    for nombre, res in resultados.items():
+        print(f"{nombre:<11} {res['peticiones_http']:>4} peticiones  p50={res['p50_ms']:>8.1f}ms  "
+              f"p95={res['p95_ms']:>8.1f}ms  {res['sentencias']:>4} sentencias SQL  "
+              f"{res['bytes'] / 1024:>8.1f} KB  errores={res['errores']}")
+    base, nuevo = resultados["fan-out"], resultados["calendario"]
+    if nuevo["p50_ms"]:
+        print(f"/api/calendario: {base['p50_ms'] / nuevo['p50_ms']:.1f}x más rápido (p50), "
+              f"{base['bytes'] / max(nuevo['bytes'], 1):.1f}x menos bytes")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"base_de_datos": engine.dialect.name, "parametros": vars(args),
+                       "resultados": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
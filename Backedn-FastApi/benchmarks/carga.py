@@ -0,0 +1,404 @@
+"""
+Driver de carga en proceso.
+
+Recorre todas las rutas de `app.main` con httpx sobre ASGI (sin red ni
+servidor), con la concurrencia indicada, y mide por escenario las
+latencias p50/p95/p99, las peticiones por segundo y las sentencias SQL
+ejecutadas por petición. El resultado se guarda en JSON para compararlo
+con una línea base (`benchmarks.comparar`).
+
+Uso:
+    python -m benchmarks.carga --database-url sqlite:///./benchmark.db \\
+        --concurrencia 10 --peticiones 200 --salida resultados.json
+    python -m benchmarks.carga --async ...      # DB_ASYNC=1 (asyncpg / aiosqlite)
+
+Con --retardo-ms cada escenario se mide dos veces, sin y con esa espera
+antes de cada sentencia SQL (latencia de red simulada hacia la base, útil
+contra un Postgres local). La diferencia de p50 dividida por el retardo da
+los viajes a la base por petición: una escritura que vuelve a leer la fila
+antes o después de escribirla se nota aunque la base local sea rápida.
+
+    python -m benchmarks.carga --database-url postgresql://... --retardo-ms 2 \
+        --concurrencia 1 --peticiones 100 --escenario /api/ausencias
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from . import datos as datos_mod
+from .datos import DatosGenerados
+from .entorno import DEFAULT_DATABASE_URL, RetardoRed, sentencias_peticion
+
+TAMANO_LOTE_BULK = 50
+
+
+@dataclass
+class Contexto:
+    """Estado compartido entre escenarios (ids creados para poder borrarlos después)."""
+    datos: DatosGenerados
+    asesorias_creadas: List[int] = field(default_factory=list)
+    ausencias_creadas: List[int] = field(default_factory=list)
+    asesorias_lote: List[List[int]] = field(default_factory=list)
+    ausencias_lote: List[List[int]] = field(default_factory=list)
+    etags: Dict[str, str] = field(default_factory=dict)
+
+    def programador(self, rng: random.Random) -> str:
+        return rng.choices(self.datos.programadores, self.datos.pesos_programadores)[0]
+
+    def usuario(self, rng: random.Random) -> str:
+        return rng.choices(self.datos.usuarios, self.datos.pesos_usuarios)[0]
+
+
+# (método, url, kwargs de httpx)
+Peticion = Tuple[str, str, dict]
+
+
+@dataclass
+class Escenario:
+    nombre: str
+    construir: Callable[[Contexto, random.Random], Peticion]
+    esperados: Set[int] = field(default_factory=lambda: {200})
+    procesar: Optional[Callable[[Contexto, httpx.Response], None]] = None
+    preparar: Optional[Callable[[Contexto, httpx.AsyncClient], Awaitable[None]]] = None
+
+
+# ========== Cuerpos de escritura ==========
+
+def _asesoria(ctx: Contexto, rng: random.Random) -> dict:
+    programador = ctx.programador(rng)
+    usuario = ctx.usuario(rng)
+    return {
+        "usuario_uid": usuario,
+        "usuario_nombre": f"Usuario {usuario}",
+        "usuario_email": f"{usuario}@example.com",
+        "programador_uid": programador,
+        "programador_nombre": f"Programador {programador}",
+        "tema": "Benchmark",
+        "descripcion": "Asesoría creada por el benchmark",
+        "fecha_solicitada": rng.choice(ctx.datos.fechas),
+        "hora_solicitada": f"{rng.randrange(8, 18):02d}:00",
+    }
+
+
+def _ausencia(ctx: Contexto, rng: random.Random) -> dict:
+    inicio = rng.randrange(8, 17)
+    return {
+        "programador_uid": ctx.programador(rng),
+        "fecha": rng.choice(ctx.datos.fechas),
+        "hora_inicio": f"{inicio:02d}:00",
+        "hora_fin": f"{inicio + 1:02d}:00",
+        "motivo": "Benchmark",
+    }
+
+
+def _guardar_id(lista: str):
+    def procesar(ctx: Contexto, response: httpx.Response):
+        if response.status_code == 201:
+            getattr(ctx, lista).append(response.json()["id"])
+    return procesar
+
+
+def _guardar_lote(lista: str):
+    def procesar(ctx: Contexto, response: httpx.Response):
+        getattr(ctx, lista).append([r["id"] for r in response.json()["resultados"] if r["ok"]])
+    return procesar
+
+
+async def _preparar_etag_usuario(ctx: Contexto, client: httpx.AsyncClient):
+    usuario = ctx.datos.usuarios[0]
+    response = await client.get(f"/api/asesorias/usuario/{usuario}", params={"limit": 50})
+    ctx.etags[usuario] = response.headers["etag"]
+
+
+def _sacar_id(creadas: List[int], lotes: List[List[int]]) -> int:
+    """Id creado por el benchmark; si faltan (409 al crear), se toma de los lotes"""
+    if creadas:
+        return creadas.pop()
+    while lotes:
+        if lotes[-1]:
+            return lotes[-1].pop()
+        lotes.pop()
+    return 0  # 404: no queda nada creado por el benchmark
+
+
+def _sacar_lote(lotes: List[List[int]]) -> List[int]:
+    while lotes:
+        ids = lotes.pop()
+        if ids:
+            return ids
+    return [0]
+
+
+def _rango(ctx: Contexto, rng: random.Random, dias: int) -> dict:
+    desde = date.fromisoformat(rng.choice(ctx.datos.fechas))
+    return {"desde": desde.isoformat(), "hasta": (desde + timedelta(days=dias)).isoformat()}
+
+
+# ========== Escenarios (todas las rutas de app.main) ==========
+
+def escenarios() -> List[Escenario]:
+    """Lecturas primero; después las escrituras, que borran al final lo que crearon."""
+    return [
+        Escenario("GET /health", lambda ctx, rng: ("GET", "/health", {})),
+        Escenario("GET /api/asesorias", lambda ctx, rng: (
+            "GET", "/api/asesorias", {"params": {"limit": 50}})),
+        Escenario("GET /api/asesorias?programador_uid&estado", lambda ctx, rng: (
+            "GET", "/api/asesorias",
+            {"params": {"limit": 50, "programador_uid": ctx.programador(rng), "estado": "aprobada"}})),
+        Escenario("GET /api/asesorias/{id}", lambda ctx, rng: (
+            "GET", f"/api/asesorias/{rng.choice(ctx.datos.asesoria_ids)}", {})),
+        Escenario("GET /api/asesorias/usuario/{uid}", lambda ctx, rng: (
+            "GET", f"/api/asesorias/usuario/{ctx.usuario(rng)}", {"params": {"limit": 50}})),
+        Escenario("GET /api/asesorias/usuario/{uid} (If-None-Match)", lambda ctx, rng: (
+            "GET", f"/api/asesorias/usuario/{ctx.datos.usuarios[0]}",
+            {"params": {"limit": 50}, "headers": {"If-None-Match": ctx.etags[ctx.datos.usuarios[0]]}}),
+            esperados={304}, preparar=_preparar_etag_usuario),
+        Escenario("GET /api/asesorias/programador/{uid}", lambda ctx, rng: (
+            "GET", f"/api/asesorias/programador/{ctx.programador(rng)}", {"params": {"limit": 50}})),
+        Escenario("GET /api/asesorias/programador/{uid}/pendientes", lambda ctx, rng: (
+            "GET", f"/api/asesorias/programador/{ctx.programador(rng)}/pendientes", {"params": {"limit": 50}})),
+        Escenario("GET /api/ausencias", lambda ctx, rng: (
+            "GET", "/api/ausencias", {"params": {"limit": 50}})),
+        Escenario("GET /api/ausencias/{id}", lambda ctx, rng: (
+            "GET", f"/api/ausencias/{rng.choice(ctx.datos.ausencia_ids)}", {})),
+        Escenario("GET /api/ausencias/programador/{uid}", lambda ctx, rng: (
+            "GET", f"/api/ausencias/programador/{ctx.programador(rng)}", {"params": {"limit": 50}})),
+        Escenario("GET /api/ausencias/programador/{uid}/fecha/{fecha}", lambda ctx, rng: (
+            "GET", f"/api/ausencias/programador/{ctx.programador(rng)}/fecha/{rng.choice(ctx.datos.fechas)}", {})),
+        Escenario("GET /api/programadores/{uid}/disponibilidad", lambda ctx, rng: (
+            "GET", f"/api/programadores/{ctx.programador(rng)}/disponibilidad", {"params": _rango(ctx, rng, 13)})),
+        Escenario("GET /api/estadisticas", lambda ctx, rng: ("GET", "/api/estadisticas", {})),
+        Escenario("GET /api/estadisticas/programadores", lambda ctx, rng: (
+            "GET", "/api/estadisticas/programadores", {"params": _rango(ctx, rng, 28)})),
+        Escenario("GET /api/estadisticas/semanas?programador_uid", lambda ctx, rng: (
+            "GET", "/api/estadisticas/semanas", {"params": {"programador_uid": ctx.programador(rng)}})),
+        Escenario("GET /api/cache/stats", lambda ctx, rng: ("GET", "/api/cache/stats", {})),
+
+        Escenario("POST /api/asesorias", lambda ctx, rng: (
+            "POST", "/api/asesorias", {"json": _asesoria(ctx, rng)}),
+            # 409: el horario elegido al azar ya estaba ocupado (también se mide la verificación)
+            esperados={201, 409}, procesar=_guardar_id("asesorias_creadas")),
+        Escenario("PUT /api/asesorias/{id}", lambda ctx, rng: (
+            "PUT", f"/api/asesorias/{rng.choice(ctx.datos.asesoria_ids)}",
+            {"json": {"estado": "rechazada", "respuesta": "Benchmark"}})),
+        Escenario("POST /api/asesorias/bulk", lambda ctx, rng: (
+            "POST", "/api/asesorias/bulk", {"json": [_asesoria(ctx, rng) for _ in range(TAMANO_LOTE_BULK)]}),
+            procesar=_guardar_lote("asesorias_lote")),
+        Escenario("PATCH /api/asesorias/bulk", lambda ctx, rng: (
+            "PATCH", "/api/asesorias/bulk",
+            {"json": [{"id": id, "estado": "rechazada"}
+                      for id in rng.sample(ctx.datos.asesoria_ids, TAMANO_LOTE_BULK)]})),
+        Escenario("DELETE /api/asesorias/{id}", lambda ctx, rng: (
+            "DELETE", f"/api/asesorias/{_sacar_id(ctx.asesorias_creadas, ctx.asesorias_lote)}", {}),
+            esperados={204}),
+        Escenario("DELETE /api/asesorias/bulk", lambda ctx, rng: (
+            "DELETE", "/api/asesorias/bulk", {"json": {"ids": _sacar_lote(ctx.asesorias_lote)}})),
+
+        Escenario("POST /api/ausencias", lambda ctx, rng: (
+            "POST", "/api/ausencias", {"json": _ausencia(ctx, rng)}),
+            esperados={201}, procesar=_guardar_id("ausencias_creadas")),
+        Escenario("PUT /api/ausencias/{id}", lambda ctx, rng: (
+            "PUT", f"/api/ausencias/{rng.choice(ctx.datos.ausencia_ids)}", {"json": {"motivo": "Benchmark"}})),
+        Escenario("POST /api/ausencias/bulk", lambda ctx, rng: (
+            "POST", "/api/ausencias/bulk", {"json": [_ausencia(ctx, rng) for _ in range(TAMANO_LOTE_BULK)]}),
+            procesar=_guardar_lote("ausencias_lote")),
+        Escenario("PATCH /api/ausencias/bulk", lambda ctx, rng: (
+            "PATCH", "/api/ausencias/bulk",
+            {"json": [{"id": id, "motivo": "Benchmark"}
+                      for id in rng.sample(ctx.datos.ausencia_ids, TAMANO_LOTE_BULK)]})),
+        Escenario("DELETE /api/ausencias/{id}", lambda ctx, rng: (
+            "DELETE", f"/api/ausencias/{_sacar_id(ctx.ausencias_creadas, ctx.ausencias_lote)}", {}),
+            esperados={204}),
+        Escenario("DELETE /api/ausencias/bulk", lambda ctx, rng: (
+            "DELETE", "/api/ausencias/bulk", {"json": {"ids": _sacar_lote(ctx.ausencias_lote)}})),
+    ]
+
+
+# ========== Medición ==========
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano sobre valores ordenados."""
+    if not valores:
+        return 0.0
+    return valores[max(0, math.ceil(p / 100 * len(valores)) - 1)]
+
+
+async def _ejecutar(client: httpx.AsyncClient, ctx: Contexto, escenario: Escenario,
+                    rng: random.Random) -> Tuple[float, int, bool]:
+    metodo, url, kwargs = escenario.construir(ctx, rng)
+    contador = [0]
+    token = sentencias_peticion.set(contador)
+    try:
+        inicio = time.perf_counter()
+        response = await client.request(metodo, url, **kwargs)
+        latencia = time.perf_counter() - inicio
+    finally:
+        sentencias_peticion.reset(token)
+    ok = response.status_code in escenario.esperados
+    if ok and escenario.procesar is not None:
+        escenario.procesar(ctx, response)
+    return latencia, contador[0], ok
+
+
+async def medir(client: httpx.AsyncClient, ctx: Contexto, escenario: Escenario,
+                peticiones: int, concurrencia: int, calentamiento: int, semilla: int) -> dict:
+    if escenario.preparar is not None:
+        await escenario.preparar(ctx, client)
+
+    rng = random.Random(semilla)
+    for _ in range(calentamiento):
+        await _ejecutar(client, ctx, escenario, rng)
+
+    latencias: List[float] = []
+    sentencias: List[int] = []
+    errores = 0
+    pendientes = peticiones
+
+    async def worker(indice: int):
+        nonlocal pendientes, errores
+        rng_worker = random.Random(semilla * 1000 + indice)
+        while pendientes > 0:
+            pendientes -= 1
+            latencia, n_sentencias, ok = await _ejecutar(client, ctx, escenario, rng_worker)
+            latencias.append(latencia)
+            sentencias.append(n_sentencias)
+            errores += not ok
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrencia)))
+    duracion = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "peticiones": len(latencias),
+        "errores": errores,
+        "p50_ms": round(percentil(latencias, 50) * 1000, 3),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 3),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 3),
+        "rps": round(len(latencias) / duracion, 1) if duracion else 0.0,
+        "sentencias_por_peticion": round(sum(sentencias) / len(sentencias), 2) if sentencias else 0.0,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def ejecutar_carga(app, ctx: Contexto, peticiones: int, concurrencia: int, calentamiento: int,
+                         semilla: int, filtro: Optional[str] = None,
+                         retardo: Optional[RetardoRed] = None) -> Dict[str, dict]:
+    """Con `retardo`, cada escenario se mide primero sin espera y después con `retardo.segundos`."""
+    resultados = {}
+    retardo_s = retardo.segundos if retardo is not None else 0.0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for indice, escenario in enumerate(escenarios()):
+            if filtro and filtro not in escenario.nombre:
+                continue
+            sin_retardo = None
+            if retardo_s:
+                retardo.segundos = 0.0
+                sin_retardo = await medir(client, ctx, escenario, peticiones, concurrencia, calentamiento,
+                                          semilla + indice)
+                retardo.segundos = retardo_s
+            resultado = await medir(client, ctx, escenario, peticiones, concurrencia, calentamiento,
+                                    semilla + indice)
+            linea = (f"{escenario.nombre:<55} p50={resultado['p50_ms']:>8.2f}ms p95={resultado['p95_ms']:>8.2f}ms "
+                     f"p99={resultado['p99_ms']:>8.2f}ms rps={resultado['rps']:>8.1f} "
+                     f"sql/pet={resultado['sentencias_por_peticion']:>5.1f} errores={resultado['errores']}")
+            if sin_retardo is not None:
+                # Cada viaje a la base suma el retardo una vez
+                resultado["p50_sin_retardo_ms"] = sin_retardo["p50_ms"]
+                resultado["viajes_por_peticion"] = round(
+                    (resultado["p50_ms"] - sin_retardo["p50_ms"]) / (retardo_s * 1000), 1)
+                linea += f" p50 sin retardo={sin_retardo['p50_ms']:>8.2f}ms viajes={resultado['viajes_por_peticion']:>4.1f}"
+            resultados[escenario.nombre] = resultado
+            print(linea, file=sys.stderr)
+    return resultados
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark de carga del backend FastAPI")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--async", dest="modo_async", action="store_true", help="Ejecutar con DB_ASYNC=1")
+    parser.add_argument("--concurrencia", type=int, default=10)
+    parser.add_argument("--peticiones", type=int, default=200, help="Peticiones medidas por escenario")
+    parser.add_argument("--calentamiento", type=int, default=10, help="Peticiones previas no medidas")
+    parser.add_argument("--escenario", help="Solo los escenarios cuyo nombre contenga este texto")
+    parser.add_argument("--sin-sembrar", action="store_true", help="Usar los datos que ya hay en la base")
+    parser.add_argument("--salida", default="resultados-benchmark.json")
+    parser.add_argument("--baseline", help="Comparar con esta línea base al terminar")
+    parser.add_argument("--tolerancia", type=float, default=0.15)
+    parser.add_argument("--retardo-ms", type=float, default=0,
+                        help="Espera antes de cada sentencia SQL; mide cada escenario sin y con ella")
+    datos_mod.agregar_argumentos(parser)
+    args = parser.parse_args(argv)
+
+    from .entorno import preparar_app
+
+    app, engine = preparar_app(args.database_url, args.modo_async)
+    config = datos_mod.config_desde_args(args)
+    if args.sin_sembrar:
+        datos = datos_mod.describir(engine, config)
+    else:
+        datos = datos_mod.sembrar(engine, config)
+
+    retardo = None
+    if args.retardo_ms:
+        from app import database
+
+        # Después de sembrar: la siembra no paga la latencia simulada
+        retardo = RetardoRed(args.retardo_ms / 1000).instalar(
+            database.async_engine.sync_engine if args.modo_async else engine)
+
+    resultados = asyncio.run(ejecutar_carga(
+        app, Contexto(datos), args.peticiones, args.concurrencia, args.calentamiento,
+        args.semilla, args.escenario, retardo,
+    ))
+
+    informe = {
+        "meta": {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "base_de_datos": engine.dialect.name,
+            "modo": "async" if args.modo_async else "sync",
+            "concurrencia": args.concurrencia,
+            "peticiones": args.peticiones,
+            "retardo_ms": args.retardo_ms,
+            "datos": vars(config),
+        },
+        "escenarios": resultados,
+    }
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.salida}", file=sys.stderr)
+
+    if args.baseline:
+        from .comparar import comparar, imprimir
+
+        with open(args.baseline, encoding="utf-8") as f:
+            regresiones = comparar(informe, json.load(f), args.tolerancia)
+        imprimir(regresiones)
+        sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compara un archivo de resultados con una línea base.
+
+Se considera regresión:
+- p95 por encima de la línea base en más de `tolerancia` (proporción);
+- RPS por debajo de la línea base en más de `tolerancia`;
+- más sentencias SQL por petición (no depende de la máquina: solo se admite
+  MARGEN_SENTENCIAS por la variación de aciertos de la caché entre ejecuciones);
+- errores en un escenario que en la línea base no los tenía.
+
+Uso:
+    python -m benchmarks.comparar resultados.json benchmarks/baselines/sqlite-sync.json --tolerancia 0.15
+"""
+
+import argparse
+import json
+import sys
+from typing import List
+
+MARGEN_SENTENCIAS = 0.1
+
+
+def comparar(actual: dict, base: dict, tolerancia: float = 0.15) -> List[str]:
+    regresiones = []
+    for nombre, res_base in base["escenarios"].items():
+        res = actual["escenarios"].get(nombre)
+        if res is None:
+            continue
+        if res["p95_ms"] > res_base["p95_ms"] * (1 + tolerancia):
+            regresiones.append(f"{nombre}: p95 {res_base['p95_ms']}ms -> {res['p95_ms']}ms")
+        if res["rps"] < res_base["rps"] * (1 - tolerancia):
+            regresiones.append(f"{nombre}: rps {res_base['rps']} -> {res['rps']}")
+        if res["sentencias_por_peticion"] > res_base["sentencias_por_peticion"] + MARGEN_SENTENCIAS:
+            regresiones.append(
+                f"{nombre}: sentencias/petición {res_base['sentencias_por_peticion']} -> {res['sentencias_por_peticion']}"
+            )
+        if res["errores"] and not res_base["errores"]:
+            regresiones.append(f"{nombre}: {res['errores']} errores")
+    return regresiones
+
+
+def imprimir(regresiones: List[str]):
+    if not regresiones:
+        print("Sin regresiones respecto a la línea base")
+        return
+    print(f"{len(regresiones)} regresiones:")
+    for regresion in regresiones:
+        print(f"  - {regresion}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara resultados de benchmark con una línea base")
+    parser.add_argument("resultados")
+    parser.add_argument("baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.15)
+    args = parser.parse_args()
+
+    with open(args.resultados, encoding="utf-8") as f:
+        actual = json.load(f)
+    with open(args.baseline, encoding="utf-8") as f:
+        base = json.load(f)
+
+    regresiones = comparar(actual, base, args.tolerancia)
+    imprimir(regresiones)
+    sys.exit(1 if regresiones else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Generador de datos de benchmark con semilla.
+
+La carga se reparte entre programadores con una distribución tipo Zipf
+(unos pocos concentran la mayoría de asesorías y ausencias), igual que los
+usuarios, para que las consultas por programador/usuario tengan el sesgo
+de un despliegue real.
+
+Uso:
+    python -m benchmarks.datos --database-url sqlite:///./benchmark.db --asesorias 20000
+"""
+
+import argparse
+import random
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import List
+
+from sqlalchemy import insert
+from sqlalchemy.engine import Engine
+
+TAMANO_LOTE = 5000
+FECHA_INICIO = date(2025, 1, 1)
+ESTADOS = ["pendiente", "aprobada", "rechazada"]
+PESOS_ESTADOS = [0.3, 0.5, 0.2]
+
+
+@dataclass
+class ConfigDatos:
+    semilla: int = 42
+    programadores: int = 50
+    usuarios: int = 500
+    asesorias: int = 20_000
+    ausencias: int = 2_000
+    dias: int = 180
+    zipf: float = 1.1
+
+
+@dataclass
+class DatosGenerados:
+    """Lo que el driver de carga necesita saber de los datos sembrados."""
+    programadores: List[str]
+    pesos_programadores: List[float]
+    usuarios: List[str]
+    pesos_usuarios: List[float]
+    asesoria_ids: List[int] = field(default_factory=list)
+    ausencia_ids: List[int] = field(default_factory=list)
+    fechas: List[str] = field(default_factory=list)
+
+
+def pesos_zipf(n: int, s: float) -> List[float]:
+    return [1 / (rango ** s) for rango in range(1, n + 1)]
+
+
+def uids(prefijo: str, n: int) -> List[str]:
+    return [f"{prefijo}-{i:05d}" for i in range(n)]
+
+
+def _fecha(rng: random.Random, config: ConfigDatos) -> date:
+    return FECHA_INICIO + timedelta(days=rng.randrange(config.dias))
+
+
+def filas_asesorias(config: ConfigDatos, rng: random.Random):
+    programadores = uids("prog", config.programadores)
+    usuarios = uids("user", config.usuarios)
+    elegir_prog = rng.choices(programadores, pesos_zipf(config.programadores, config.zipf), k=config.asesorias)
+    elegir_user = rng.choices(usuarios, pesos_zipf(config.usuarios, config.zipf), k=config.asesorias)
+    estados = rng.choices(ESTADOS, PESOS_ESTADOS, k=config.asesorias)
+    for i in range(config.asesorias):
+        estado = estados[i]
+        creada = datetime.combine(_fecha(rng, config), time(rng.randrange(24), rng.randrange(60)))
+        yield {
+            "usuario_uid": elegir_user[i],
+            "usuario_nombre": f"Usuario {elegir_user[i]}",
+            "usuario_email": f"{elegir_user[i]}@example.com",
+            "programador_uid": elegir_prog[i],
+            "programador_nombre": f"Programador {elegir_prog[i]}",
+            "tema": f"Tema {rng.randrange(200)}",
+            "descripcion": "Descripción de la asesoría " * rng.randint(1, 8),
+            "comentario": None,
+            "fecha_solicitada": _fecha(rng, config),
+            "hora_solicitada": time(rng.randrange(8, 18)),
+            "estado": estado,
+            "respuesta": "Respuesta del programador" if estado != "pendiente" else None,
+            "fecha_creacion": creada,
+            "fecha_respuesta": creada + timedelta(hours=rng.randint(1, 72)) if estado != "pendiente" else None,
+        }
+
+
+def filas_ausencias(config: ConfigDatos, rng: random.Random):
+    programadores = uids("prog", config.programadores)
+    elegir_prog = rng.choices(programadores, pesos_zipf(config.programadores, config.zipf), k=config.ausencias)
+    for i in range(config.ausencias):
+        inicio = rng.randrange(8, 17)
+        yield {
+            "programador_uid": elegir_prog[i],
+            "fecha": _fecha(rng, config),
+            "hora_inicio": time(inicio),
+            "hora_fin": time(min(inicio + rng.randint(1, 3), 20)),
+            "motivo": "Ausencia de prueba",
+        }
+
+
+def _insertar(engine: Engine, model, filas) -> None:
+    lote = []
+    with engine.begin() as conn:
+        for fila in filas:
+            lote.append(fila)
+            if len(lote) >= TAMANO_LOTE:
+                conn.execute(insert(model), lote)
+                lote = []
+        if lote:
+            conn.execute(insert(model), lote)
+
+
+def sembrar(engine: Engine, config: ConfigDatos, reiniciar: bool = True) -> DatosGenerados:
+    """Crea (o recrea) las tablas e inserta los datos; el resultado es idéntico para la misma semilla."""
+    from app import models
+
+    if reiniciar:
+        models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(config.semilla)
+    _insertar(engine, models.Asesoria, filas_asesorias(config, rng))
+    _insertar(engine, models.Ausencia, filas_ausencias(config, rng))
+    _reconstruir_estadisticas(engine)
+    return describir(engine, config)
+
+
+def _reconstruir_estadisticas(engine: Engine):
+    # Las filas se insertan sin pasar por los servicios: el resumen se calcula completo
+    from sqlalchemy.orm import Session
+
+    from app import estadisticas
+
+    with Session(engine) as db:
+        estadisticas.reconstruir(db)
+        db.commit()
+
+
+def describir(engine: Engine, config: ConfigDatos) -> DatosGenerados:
+    from app import models
+
+    with engine.connect() as conn:
+        asesoria_ids = list(conn.scalars(models.Asesoria.__table__.select().with_only_columns(models.Asesoria.id)))
+        ausencia_ids = list(conn.scalars(models.Ausencia.__table__.select().with_only_columns(models.Ausencia.id)))
+    return DatosGenerados(
+        programadores=uids("prog", config.programadores),
+        pesos_programadores=pesos_zipf(config.programadores, config.zipf),
+        usuarios=uids("user", config.usuarios),
+        pesos_usuarios=pesos_zipf(config.usuarios, config.zipf),
+        asesoria_ids=asesoria_ids,
+        ausencia_ids=ausencia_ids,
+        fechas=[(FECHA_INICIO + timedelta(days=d)).isoformat() for d in range(config.dias)],
+    )
+
+
+def agregar_argumentos(parser: argparse.ArgumentParser):
+    defaults = ConfigDatos()
+    parser.add_argument("--semilla", type=int, default=defaults.semilla)
+    parser.add_argument("--programadores", type=int, default=defaults.programadores)
+    parser.add_argument("--usuarios", type=int, default=defaults.usuarios)
+    parser.add_argument("--asesorias", type=int, default=defaults.asesorias)
+    parser.add_argument("--ausencias", type=int, default=defaults.ausencias)
+    parser.add_argument("--dias", type=int, default=defaults.dias)
+    parser.add_argument("--zipf", type=float, default=defaults.zipf, help="Exponente del sesgo entre programadores")
+
+
+def config_desde_args(args) -> ConfigDatos:
+    return ConfigDatos(
+        semilla=args.semilla, programadores=args.programadores, usuarios=args.usuarios,
+        asesorias=args.asesorias, ausencias=args.ausencias, dias=args.dias, zipf=args.zipf,
+    )
+
+
+def main():
+    from .entorno import DEFAULT_DATABASE_URL, crear_engine
+
+    parser = argparse.ArgumentParser(description="Siembra datos de benchmark")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    datos = sembrar(crear_engine(args.database_url), config_desde_args(args))
+    print(f"Sembradas {len(datos.asesoria_ids)} asesorías y {len(datos.ausencia_ids)} ausencias")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Disponibilidad y detección de cruces con la agenda de un programador muy cargado.
+
+Siembra un programador con miles de ausencias (y asesorías aprobadas)
+repartidas en los días de la vista, además de los datos de fondo, y mide
+las dos rutas que arman el índice de intervalos ocupados:
+
+- GET /api/programadores/{uid}/disponibilidad sobre toda la vista (carga
+  todas sus ausencias y aprobadas del rango)
+- POST /api/asesorias en un horario ocupado por una ausencia: 409 tras
+  bloquear la agenda y leer solo ese día
+
+La caché de consultas se desactiva (QUERY_CACHE_TTL=0, salvo que se pase
+otro valor) para que cada repetición lea de la base.
+
+Uso:
+    python -m benchmarks.disponibilidad --sembrar --ausencias-programador 5000 --dias-vista 30
+    python -m benchmarks.disponibilidad --database-url postgresql://... --sembrar --ausencias-programador 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from datetime import date, datetime, time as hora, timedelta
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.engine import Engine
+
+from . import datos as datos_mod
+from .carga import percentil
+from .entorno import DEFAULT_DATABASE_URL, crear_engine, sentencias_peticion
+
+# Programador con la agenda llena (fuera de los uids de datos_mod.uids)
+PROGRAMADOR = "prog-agenda-llena"
+
+
+def _minuto(rng: random.Random) -> int:
+    """Minuto del día, de 5 en 5, entre las 8:00 y las 17:00"""
+    return rng.randrange(8 * 60, 17 * 60, 5)
+
+
+def _hora(minutos: int) -> hora:
+    return hora(minutos // 60, minutos % 60)
+
+
+def filas_agenda(rng: random.Random, desde: date, dias: int, ausencias: int, aprobadas: int):
+    """Ausencias de 15 a 90 minutos y asesorías aprobadas del programador, al azar en la jornada"""
+    filas_ausencias = []
+    for _ in range(ausencias):
+        inicio = _minuto(rng)
+        filas_ausencias.append({
+            "programador_uid": PROGRAMADOR,
+            "fecha": desde + timedelta(days=rng.randrange(dias)),
+            "hora_inicio": _hora(inicio),
+            "hora_fin": _hora(inicio + rng.randrange(15, 91, 5)),
+            "motivo": "Agenda llena",
+        })
+    filas_asesorias = []
+    for i in range(aprobadas):
+        fecha = desde + timedelta(days=rng.randrange(dias))
+        filas_asesorias.append({
+            "usuario_uid": f"user-{i % 500:05d}",
+            "usuario_nombre": "Usuario",
+            "usuario_email": "usuario@example.com",
+            "programador_uid": PROGRAMADOR,
+            "programador_nombre": "Programador con la agenda llena",
+            "tema": "Agenda llena",
+            "descripcion": "Asesoría aprobada",
+            "fecha_solicitada": fecha,
+            "hora_solicitada": _hora(_minuto(rng)),
+            "estado": "aprobada",
+            "respuesta": "Aprobada",
+            "fecha_creacion": datetime.combine(fecha, datetime.min.time()),
+            "fecha_respuesta": datetime.combine(fecha, datetime.min.time()),
+        })
+    return filas_ausencias, filas_asesorias
+
+
+def sembrar_agenda(engine: Engine, semilla: int, desde: date, dias: int, ausencias: int,
+                   aprobadas: int) -> List[dict]:
+    """Reemplaza la agenda del programador y devuelve sus ausencias"""
+    from app import models
+
+    filas_ausencias, filas_asesorias = filas_agenda(random.Random(semilla), desde, dias, ausencias, aprobadas)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(delete(models.Ausencia).where(models.Ausencia.programador_uid == PROGRAMADOR))
+        conn.execute(delete(models.Asesoria).where(models.Asesoria.programador_uid == PROGRAMADOR))
+    datos_mod._insertar(engine, models.Ausencia, filas_ausencias)
+    datos_mod._insertar(engine, models.Asesoria, filas_asesorias)
+    datos_mod._reconstruir_estadisticas(engine)
+    return filas_ausencias
+
+
+def _asesoria_en_conflicto(ausencia: dict) -> dict:
+    # Empieza a la misma hora que la ausencia: se solapa con ella sí o sí
+    return {
+        "usuario_uid": "user-00000",
+        "usuario_nombre": "Usuario",
+        "usuario_email": "usuario@example.com",
+        "programador_uid": PROGRAMADOR,
+        "programador_nombre": "Programador con la agenda llena",
+        "tema": "Benchmark",
+        "descripcion": "Horario ocupado por una ausencia",
+        "fecha_solicitada": ausencia["fecha"].isoformat(),
+        "hora_solicitada": ausencia["hora_inicio"].strftime("%H:%M"),
+    }
+
+
+async def _serie(llamar: Callable[[], Awaitable[int]], esperado: int, repeticiones: int,
+                 calentamiento: int) -> dict:
+    for _ in range(calentamiento):
+        await llamar()
+    latencias: List[float] = []
+    sentencias: List[int] = []
+    errores = 0
+    for _ in range(repeticiones):
+        contador = [0]
+        token = sentencias_peticion.set(contador)
+        try:
+            inicio = time.perf_counter()
+            codigo = await llamar()
+            latencias.append(time.perf_counter() - inicio)
+        finally:
+            sentencias_peticion.reset(token)
+        sentencias.append(contador[0])
+        errores += codigo != esperado
+    latencias.sort()
+    return {
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p95_ms": round(percentil(latencias, 95) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+        "sentencias_por_peticion": round(sum(sentencias) / len(sentencias), 2),
+        "errores": errores,
+    }
+
+
+async def medir(app, ausencias: List[dict], desde: date, hasta: date, repeticiones: int,
+                calentamiento: int, semilla: int) -> Dict[str, dict]:
+    import httpx
+
+    rng = random.Random(semilla)
+    rango = {"desde": desde.isoformat(), "hasta": hasta.isoformat()}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        async def disponibilidad() -> int:
+            response = await client.get(f"/api/programadores/{PROGRAMADOR}/disponibilidad", params=rango)
+            return response.status_code
+
+        async def conflicto() -> int:
+            response = await client.post("/api/asesorias", json=_asesoria_en_conflicto(rng.choice(ausencias)))
+            return response.status_code
+
+        series: List[Tuple[str, Callable[[], Awaitable[int]], int]] = [
+            ("GET /api/programadores/{uid}/disponibilidad", disponibilidad, 200),
+            ("POST /api/asesorias (409)", conflicto, 409),
+        ]
+        return {nombre: await _serie(llamar, esperado, repeticiones, calentamiento)
+                for nombre, llamar, esperado in series}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Disponibilidad y cruces de un programador con miles de ausencias")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--sembrar", action="store_true", help="Recrear las tablas con datos de fondo")
+    parser.add_argument("--async", dest="modo_async", action="store_true", help="DB_ASYNC=1")
+    parser.add_argument("--ausencias-programador", type=int, default=5_000,
+                        help="Ausencias del programador con la agenda llena")
+    parser.add_argument("--aprobadas-programador", type=int, default=500,
+                        help="Asesorías aprobadas del programador con la agenda llena")
+    parser.add_argument("--desde", default=datos_mod.FECHA_INICIO.isoformat(), help="Primer día de la vista")
+    parser.add_argument("--dias-vista", type=int, default=30,
+                        help="Días de la vista (máximo 93); la agenda se reparte en ellos")
+    parser.add_argument("--repeticiones", type=int, default=100)
+    parser.add_argument("--calentamiento", type=int, default=5)
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    datos_mod.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    os.environ.setdefault("QUERY_CACHE_TTL", "0")
+    config = datos_mod.config_desde_args(args)
+    engine = crear_engine(args.database_url)
+    desde = date.fromisoformat(args.desde)
+    hasta = desde + timedelta(days=args.dias_vista - 1)
+
+    from .entorno import preparar_app
+
+    # Antes de sembrar: la siembra ya importa app (y con ella DB_ASYNC)
+    app, _ = preparar_app(args.database_url, args.modo_async)
+
+    inicio = time.perf_counter()
+    if args.sembrar:
+        datos_mod.sembrar(engine, config)
+    ausencias = sembrar_agenda(engine, args.semilla, desde, args.dias_vista,
+                               args.ausencias_programador, args.aprobadas_programador)
+    print(f"Datos sembrados en {time.perf_counter() - inicio:.1f}s: {args.ausencias_programador} ausencias y "
+          f"{args.aprobadas_programador} aprobadas de {PROGRAMADOR} del {desde.isoformat()} al {hasta.isoformat()}")
+
+    resultados = asyncio.run(medir(app, ausencias, desde, hasta, args.repeticiones, args.calentamiento,
+                                   args.semilla))
+    for nombre, res in resultados.items():
+        print(f"{nombre:<45} p50={res['p50_ms']:>8.2f}ms p95={res['p95_ms']:>8.2f}ms "
+              f"p99={res['p99_ms']:>8.2f}ms sql/pet={res['sentencias_por_peticion']:>5.1f} "
+              f"errores={res['errores']}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"base_de_datos": engine.dialect.name, "parametros": vars(args),
+                       "resultados": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Prepara la app contra una base de benchmark (Postgres local o SQLite) con Firebase simulado."""
+
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from sqlalchemy import BigInteger, create_engine, event
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.engine import Engine
+
+# Base por defecto: archivo SQLite temporal en el directorio actual
+DEFAULT_DATABASE_URL = "sqlite:///./benchmark.db"
+
+# UID con el que se simula el usuario autenticado
+UID_BENCHMARK = "benchmark"
+
+# Contador de sentencias SQL de la petición en curso (lo fija el driver de carga)
+sentencias_peticion: ContextVar[Optional[List[int]]] = ContextVar("sentencias_peticion", default=None)
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # En SQLite solo INTEGER PRIMARY KEY es autoincremental
+    return "INTEGER"
+
+
+def url_async(database_url: str) -> str:
+    """URL equivalente con el driver asíncrono (asyncpg / aiosqlite)."""
+    if database_url.startswith("postgresql://"):
+        return database_url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if database_url.startswith("sqlite://"):
+        return database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return database_url
+
+
+def _opciones_engine(database_url: str) -> dict:
+    if database_url.startswith("sqlite"):
+        # Varios hilos/corutinas escriben: esperar el lock en lugar de fallar
+        return {"connect_args": {"check_same_thread": False, "timeout": 30}}
+    return {"pool_size": 10, "max_overflow": 20}
+
+
+def _contar_sentencia(conn, cursor, statement, parameters, context, executemany):
+    contador = sentencias_peticion.get()
+    if contador is not None:
+        contador[0] += 1
+
+
+class RetardoRed:
+    """Latencia de red simulada: espera `segundos` antes de cada sentencia SQL (0 = sin espera)."""
+
+    def __init__(self, segundos: float = 0.0):
+        self.segundos = segundos
+
+    def instalar(self, engine: Engine) -> "RetardoRed":
+        event.listen(engine, "before_cursor_execute", self._esperar)
+        return self
+
+    def _esperar(self, conn, cursor, statement, parameters, context, executemany):
+        if self.segundos:
+            time.sleep(self.segundos)
+
+
+def crear_engine(database_url: str) -> Engine:
+    engine = create_engine(database_url, **_opciones_engine(database_url))
+    event.listen(engine, "before_cursor_execute", _contar_sentencia)
+    return engine
+
+
+def preparar_app(database_url: str = DEFAULT_DATABASE_URL, modo_async: bool = False):
+    """
+    Importa `app.main` apuntando a `database_url` y devuelve (app, engine).
+
+    Debe llamarse antes de cualquier otro import de `app`: el modo (DB_ASYNC)
+    se resuelve al importar los módulos. Los engines quedan configurados antes
+    del lifespan, que por eso no crea los de DATABASE_URL. La autenticación se
+    reemplaza por un usuario fijo.
+    """
+    os.environ["DB_ASYNC"] = "1" if modo_async else "0"
+    # Los eventos siguen a la base del benchmark y no a DATABASE_URL
+    os.environ.setdefault("EVENTOS_BACKEND", "postgres" if database_url.startswith("postgresql") else "memoria")
+
+    from app import database
+
+    if database.DB_ASYNC != modo_async:
+        raise RuntimeError("app.database ya se importó con otro valor de DB_ASYNC")
+
+    engine = crear_engine(database_url)
+    database.engine = engine
+    database.SessionLocal.configure(bind=engine)
+
+    if modo_async:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_engine = create_async_engine(url_async(database_url), **_opciones_engine(database_url))
+        event.listen(async_engine.sync_engine, "before_cursor_execute", _contar_sentencia)
+        database.async_engine = async_engine
+        database.AsyncSessionLocal.configure(bind=async_engine)
+
+    from app import main
+    from app.auth import verify_firebase_token
+
+    main.app.dependency_overrides[verify_firebase_token] = lambda: {"uid": UID_BENCHMARK}
+    return main.app, engine
@@ -0,0 +1,150 @@
+"""
+Memoria pico de /api/asesorias/exportar según el tamaño de la tabla.
+
+Para cada tamaño siembra la tabla de asesorías y lanza un proceso nuevo
+que descarga la exportación completa (descartando los bytes, como un
+cliente que escribe a disco) y reporta su RSS pico. La exportación debe
+usar la misma memoria con 10k que con 1M filas: si el pico crece más que
+--tolerancia-mb entre el tamaño menor y el mayor, termina con código 1.
+
+Con --listado se mide además GET /api/asesorias sin límite (la forma
+anterior de exportar, que materializa todas las filas) como referencia.
+
+Uso:
+    python -m benchmarks.exportacion --tamanos 10000 100000 1000000
+    python -m benchmarks.exportacion --database-url postgresql://... --formato csv
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+from . import datos as datos_mod
+from .entorno import crear_engine
+
+DEFAULT_DATABASE_URL = "sqlite:///./exportacion.db"
+
+
+async def _descargar(app, ruta: str, query: str) -> dict:
+    # Driver ASGI mínimo: a diferencia de httpx.ASGITransport no acumula el cuerpo
+    recibido = {"bytes": 0, "status": None}
+    fin = asyncio.Event()
+    peticion_enviada = False
+
+    async def receive():
+        nonlocal peticion_enviada
+        if not peticion_enviada:
+            peticion_enviada = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await fin.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            recibido["status"] = mensaje["status"]
+        elif mensaje["type"] == "http.response.body":
+            recibido["bytes"] += len(mensaje.get("body", b""))
+            if not mensaje.get("more_body", False):
+                fin.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": ruta, "raw_path": ruta.encode(), "query_string": query.encode(),
+        "headers": [(b"host", b"exportacion")], "client": ("127.0.0.1", 0), "server": ("exportacion", 80),
+    }
+    await app(scope, receive, send)
+    return recibido
+
+
+def _rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def hijo(database_url: str, ruta: str, query: str):
+    """Se ejecuta en el proceso nuevo: imprime el resultado en JSON por stdout."""
+    from .entorno import preparar_app
+
+    app, _ = preparar_app(database_url)
+    base_mb = _rss_mb()
+    inicio = time.perf_counter()
+    recibido = asyncio.run(_descargar(app, ruta, query))
+    segundos = time.perf_counter() - inicio
+    print(json.dumps({
+        "status": recibido["status"],
+        "bytes": recibido["bytes"],
+        "segundos": round(segundos, 3),
+        "rss_base_mb": round(base_mb, 1),
+        "rss_pico_mb": round(_rss_mb(), 1),
+    }))
+
+
+def _lanzar(database_url: str, ruta: str, query: str) -> dict:
+    env = dict(os.environ, FIREBASE_PROJECT_ID=os.getenv("FIREBASE_PROJECT_ID", "benchmark"))
+    salida = subprocess.run(
+        [sys.executable, "-m", "benchmarks.exportacion", "--hijo", database_url, ruta, query],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def sembrar(engine, config: datos_mod.ConfigDatos):
+    from app import models
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    datos_mod._insertar(engine, models.Asesoria, datos_mod.filas_asesorias(config, datos_mod.random.Random(config.semilla)))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--hijo":
+        hijo(*sys.argv[2:5])
+        return
+
+    parser = argparse.ArgumentParser(description="Memoria pico de la exportación por tamaño de tabla")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--formato", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--tolerancia-mb", type=float, default=20.0,
+                        help="Crecimiento máximo del RSS pico entre el tamaño menor y el mayor")
+    parser.add_argument("--listado", action="store_true", help="Medir también GET /api/asesorias sin límite")
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    engine = crear_engine(args.database_url)
+    resultados = {}
+    for tamano in sorted(args.tamanos):
+        inicio = time.perf_counter()
+        sembrar(engine, datos_mod.ConfigDatos(asesorias=tamano))
+        print(f"Sembradas {tamano} asesorías en {time.perf_counter() - inicio:.1f}s")
+
+        rutas = [("exportar", "/api/asesorias/exportar", f"formato={args.formato}")]
+        if args.listado:
+            rutas.append(("listado", "/api/asesorias", ""))
+        for nombre, ruta, query in rutas:
+            res = _lanzar(args.database_url, ruta, query)
+            resultados.setdefault(nombre, {})[tamano] = res
+            print(f"  {nombre:<9} {tamano:>9} filas: {res['bytes'] / 1e6:>8.1f} MB en {res['segundos']:>6.1f}s  "
+                  f"RSS pico {res['rss_pico_mb']:>7.1f} MB (tras importar {res['rss_base_mb']:.1f} MB)")
+
+    picos = [res["rss_pico_mb"] for res in resultados["exportar"].values()]
+    crecimiento = picos[-1] - picos[0]
+    ok = crecimiento <= args.tolerancia_mb
+    print(f"{'✅' if ok else '❌'} Crecimiento del RSS pico de la exportación: {crecimiento:+.1f} MB "
+          f"(tolerancia {args.tolerancia_mb:.0f} MB)")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"base_de_datos": engine.dialect.name, "formato": args.formato,
+                       "resultados": resultados, "crecimiento_mb": crecimiento}, f, indent=2)
+        print(f"Resultados guardados en {args.salida}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
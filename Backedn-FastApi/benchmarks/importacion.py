@@ -0,0 +1,149 @@
+"""
+Importación desde Firestore: un POST por documento contra app.importacion.
+
+Genera un export JSON sintético (mismo formato que firestore-export-import:
+asesorías como colección y ausencias dentro de cada usuario) con los datos
+con semilla de benchmarks.datos y mide:
+
+- por documento: lo que hace migrate-firebase-to-apis.ts, un POST a la API
+  por documento, sobre una muestra (--muestra) y extrapolado al total
+- importación: python -m app.importacion sobre el archivo completo
+- reimportación: el mismo archivo otra vez (no debe escribir ninguna fila)
+
+Uso:
+    python -m benchmarks.importacion --asesorias 100000 --ausencias 10000
+    python -m benchmarks.importacion --database-url postgresql://... --asesorias 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from datetime import date, datetime, time as hora
+from typing import Dict, List
+
+from . import datos as datos_mod
+from .entorno import DEFAULT_DATABASE_URL
+
+
+def _camel(campo: str) -> str:
+    primera, *resto = campo.split("_")
+    return primera + "".join(p.capitalize() for p in resto)
+
+
+def _firestore(valor):
+    # Como los exporta firestore-export-import: timestamps con _seconds, fechas y horas como texto
+    if isinstance(valor, datetime):
+        return {"_seconds": int(valor.timestamp()), "_nanoseconds": 0}
+    if isinstance(valor, date):
+        return valor.isoformat()
+    if isinstance(valor, hora):
+        return valor.strftime("%H:%M")
+    return valor
+
+
+def _documento(fila: dict) -> dict:
+    renombrar = {"fecha_creacion": "fecha"}
+    return {_camel(renombrar.get(k, k)): _firestore(v) for k, v in fila.items() if v is not None}
+
+
+def escribir_export(ruta: str, config: datos_mod.ConfigDatos):
+    """Escribe el export documento a documento (no arma el JSON completo en memoria)"""
+    rng = datos_mod.random.Random(config.semilla)
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write('{"asesorias": {')
+        for i, fila in enumerate(datos_mod.filas_asesorias(config, rng)):
+            f.write(("," if i else "") + f'\n"doc{i:08d}": ' + json.dumps(_documento(fila), ensure_ascii=False))
+        f.write('\n}, "usuarios": {')
+        ausencias: Dict[str, List[dict]] = {}
+        for i, fila in enumerate(datos_mod.filas_ausencias(config, rng)):
+            uid = fila.pop("programador_uid")
+            ausencias.setdefault(uid, []).append({"id": f"aus{i:08d}", **_documento(fila)})
+        for i, (uid, lista) in enumerate(sorted(ausencias.items())):
+            f.write(("," if i else "") + f'\n"{uid}": ' + json.dumps({"role": "programador", "ausencias": lista}))
+        f.write("\n}}\n")
+
+
+async def _por_documento(app, ruta: str, muestra: int) -> dict:
+    """Reproduce el script de migración: un POST por documento, uno detrás de otro"""
+    import httpx
+
+    from app import importacion, schemas
+
+    codigos = Counter()
+    endpoints = {"asesorias": ("/api/asesorias", schemas.AsesoriaCreate),
+                 "ausencias": ("/api/ausencias", schemas.AusenciaCreate)}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        with open(ruta, encoding="utf-8") as archivo:
+            inicio = time.perf_counter()
+            for n, (tipo, origen_id, datos) in enumerate(importacion.documentos(archivo)):
+                if n >= muestra:
+                    break
+                url, schema = endpoints[tipo]
+                fila = importacion.TIPOS[tipo][1](origen_id, datos)
+                response = await client.post(url, json={k: fila[k] for k in schema.model_fields})
+                codigos[response.status_code] += 1
+            segundos = time.perf_counter() - inicio
+    return {"documentos": sum(codigos.values()), "segundos": round(segundos, 3),
+            "docs_por_segundo": round(sum(codigos.values()) / segundos, 1), "codigos": dict(codigos)}
+
+
+def _reiniciar(engine):
+    from app import models
+
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación desde Firestore: POST por documento contra COPY/upsert")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--archivo", default="firestore-export.json", help="Export sintético (se regenera)")
+    parser.add_argument("--muestra", type=int, default=2000, help="Documentos importados con un POST cada uno")
+    parser.add_argument("--lote", type=int, default=5000)
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    datos_mod.agregar_argumentos(parser)
+    parser.set_defaults(asesorias=100_000, ausencias=10_000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("FIREBASE_PROJECT_ID", "benchmark")
+    config = datos_mod.config_desde_args(args)
+    inicio = time.perf_counter()
+    escribir_export(args.archivo, config)
+    total = config.asesorias + config.ausencias
+    print(f"Export de {total:,} documentos ({os.path.getsize(args.archivo) / 1e6:.1f} MB) "
+          f"generado en {time.perf_counter() - inicio:.1f}s")
+
+    from app import importacion
+
+    from .entorno import preparar_app
+
+    app, engine = preparar_app(args.database_url)
+    resultados = {}
+
+    _reiniciar(engine)
+    res = resultados["por_documento"] = asyncio.run(_por_documento(app, args.archivo, args.muestra))
+    print(f"por documento  {res['documentos']:>9,} docs  {res['docs_por_segundo']:>9,.0f} docs/s  "
+          f"(códigos {res['codigos']}) -> {total / res['docs_por_segundo'] / 60:,.1f} min para {total:,}")
+
+    _reiniciar(engine)
+    for nombre in ("importacion", "reimportacion"):
+        with open(args.archivo, encoding="utf-8") as archivo:
+            res = resultados[nombre] = importacion.importar(engine, archivo, args.lote, mostrar=False)
+        nuevos = sum(res[tipo]["nuevos"] for tipo in importacion.TIPOS)
+        actualizados = sum(res[tipo]["actualizados"] for tipo in importacion.TIPOS)
+        print(f"{nombre:<14} {total:>9,} docs  {res['docs_por_segundo']:>9,.0f} docs/s  "
+              f"{res['segundos']:>7.1f}s  nuevos {nuevos:,}  actualizados {actualizados:,}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"base_de_datos": engine.dialect.name, "parametros": vars(args),
+                       "resultados": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Planes de ejecución de las consultas de lectura principales.
+
+Ejecuta los métodos de los servicios con un programador/usuario
+representativo (el de más carga según el sesgo de los datos), captura
+las sentencias SQL que generan y muestra el plan de cada una
+(EXPLAIN QUERY PLAN en SQLite, EXPLAIN (ANALYZE, BUFFERS) en Postgres) y
+su latencia mediana. Así los planes corresponden siempre al SQL que emite
+el código actual.
+
+Con --comparar muestra también el plan y la latencia de cada sentencia
+"antes" de la migración 001: dentro de una transacción que se revierte al
+terminar, las fechas y horas vuelven a ser texto (solo en PostgreSQL; en
+SQLite ya se guardan como texto), se quitan los índices compuestos y se
+ejecuta el mismo SQL con los parámetros como texto.
+
+Uso (1M de asesorías):
+    python -m benchmarks.planes --database-url postgresql://... --sembrar --asesorias 1000000
+    python -m benchmarks.planes --database-url postgresql://... --comparar
+"""
+
+import argparse
+import statistics
+import time as reloj
+from datetime import date, datetime, time, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import datos as datos_mod
+from .entorno import DEFAULT_DATABASE_URL, crear_engine
+
+
+def capturar(engine, fn) -> List[Tuple[str, object]]:
+    """Sentencias (SQL, parámetros) ejecutadas por `fn(session)`."""
+    sentencias = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        with Session(engine) as session:
+            fn(session)
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+    return sentencias
+
+
+def explicar(conn, statement: str, parameters) -> List[str]:
+    sqlite = conn.dialect.name == "sqlite"
+    prefijo = "EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN (ANALYZE, BUFFERS) "
+    filas = conn.exec_driver_sql(prefijo + statement, parameters).all()
+    return [fila[-1] if sqlite else fila[0] for fila in filas]
+
+
+def latencia_ms(conn, statement: str, parameters, repeticiones: int) -> float:
+    """Mediana de `repeticiones` ejecuciones (leyendo todas las filas)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = reloj.perf_counter()
+        conn.exec_driver_sql(statement, parameters).all()
+        tiempos.append(reloj.perf_counter() - inicio)
+    return statistics.median(tiempos) * 1000
+
+
+# ========== Esquema anterior a la migración 001 ==========
+
+_INDICES_001 = [
+    "DROP INDEX IF EXISTS ix_asesorias_usuario_id",
+    "DROP INDEX IF EXISTS ix_asesorias_programador_estado_fecha",
+    "DROP INDEX IF EXISTS ix_ausencias_programador_fecha",
+    "CREATE INDEX IF NOT EXISTS ix_ausencias_programador_uid ON ausencias (programador_uid)",
+]
+
+# Migración 001 al revés (se ejecuta dentro de un SAVEPOINT que se revierte)
+DESHACER_001 = {
+    "postgresql": _INDICES_001 + [
+        "ALTER TABLE asesorias"
+        " ALTER COLUMN fecha_solicitada TYPE VARCHAR(20) USING to_char(fecha_solicitada, 'YYYY-MM-DD'),"
+        " ALTER COLUMN hora_solicitada TYPE VARCHAR(10) USING to_char(hora_solicitada, 'HH24:MI')",
+        "ALTER TABLE ausencias"
+        " ALTER COLUMN fecha TYPE VARCHAR(20) USING to_char(fecha, 'YYYY-MM-DD'),"
+        " ALTER COLUMN hora_inicio TYPE VARCHAR(10) USING to_char(hora_inicio, 'HH24:MI'),"
+        " ALTER COLUMN hora_fin TYPE VARCHAR(10) USING to_char(hora_fin, 'HH24:MI')",
+        "ANALYZE asesorias",
+        "ANALYZE ausencias",
+    ],
+    "sqlite": _INDICES_001 + ["ANALYZE"],
+}
+
+
+def _como_texto(valor):
+    """Parámetro como lo enviaba la API antes de la migración 001"""
+    if isinstance(valor, date) and not isinstance(valor, datetime):
+        return valor.isoformat()
+    if isinstance(valor, time):
+        return valor.strftime("%H:%M")
+    return valor
+
+
+def parametros_texto(parameters):
+    if isinstance(parameters, dict):
+        return {clave: _como_texto(valor) for clave, valor in parameters.items()}
+    return tuple(_como_texto(valor) for valor in parameters)
+
+
+def medir(engine, sentencias: List[Tuple[str, object]], repeticiones: int, antes: bool = False):
+    """(plan, latencia) de cada sentencia, con el esquema actual o con el anterior a la 001"""
+    resultados = []
+    with engine.connect() as conn:
+        if antes:
+            conn.exec_driver_sql("SAVEPOINT planes_antes")
+            for ddl in DESHACER_001[engine.dialect.name]:
+                conn.exec_driver_sql(ddl)
+        try:
+            for statement, parameters in sentencias:
+                if antes:
+                    parameters = parametros_texto(parameters)
+                resultados.append((explicar(conn, statement, parameters),
+                                   latencia_ms(conn, statement, parameters, repeticiones)))
+        finally:
+            if antes:
+                conn.exec_driver_sql("ROLLBACK TO SAVEPOINT planes_antes")
+            conn.rollback()
+    return resultados
+
+
+def consultas(programador: str, usuario: str, fecha: date):
+    from app import service
+
+    desde = fecha
+    hasta = fecha + timedelta(days=13)
+    return [
+        ("asesorias por usuario", lambda db: service.AsesoriaService(db).get_by_usuario(usuario, limit=50)),
+        ("asesorias por programador", lambda db: service.AsesoriaService(db).get_by_programador(programador, limit=50)),
+        ("asesorias pendientes", lambda db: service.AsesoriaService(db).get_pendientes_by_programador(programador, limit=50)),
+        ("asesorias por programador y estado (rango)", lambda db: service.AsesoriaService(db).get_all(
+            programador_uid=programador, estado="aprobada", desde=desde, hasta=hasta, limit=50)),
+        ("ausencias por programador", lambda db: service.AusenciaService(db).get_by_programador(programador, limit=50)),
+        ("ausencias por programador y fecha", lambda db: service.AusenciaService(db).get_by_programador_y_fecha(
+            programador, fecha)),
+        ("disponibilidad (14 días)", lambda db: service.DisponibilidadService(db).get_slots_libres(
+            programador, desde, hasta, 60, time(8), time(18))),
+        ("etag", lambda db: service.VersionService(db).get_versiones(
+            ["asesorias", f"asesorias:usuario:{usuario}"])),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Planes de ejecución de las consultas principales")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--sembrar", action="store_true", help="Sembrar datos antes de consultar")
+    parser.add_argument("--comparar", action="store_true",
+                        help="Comparar con el esquema anterior a la migración 001 (texto, sin índices compuestos)")
+    parser.add_argument("--repeticiones", type=int, default=20, help="Ejecuciones por sentencia para la latencia")
+    datos_mod.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    from app.cache import query_cache
+
+    # Sin caché: se quiere ver el SQL de cada consulta
+    query_cache.ttl = 0
+
+    engine = crear_engine(args.database_url)
+    config = datos_mod.config_desde_args(args)
+    datos = datos_mod.sembrar(engine, config) if args.sembrar else datos_mod.describir(engine, config)
+    programador, usuario = datos.programadores[0], datos.usuarios[0]
+
+    for nombre, fn in consultas(programador, usuario, date.fromisoformat(datos.fechas[0])):
+        print(f"===== {nombre} =====")
+        sentencias = capturar(engine, fn)
+        medidas = {"después": medir(engine, sentencias, args.repeticiones)}
+        if args.comparar:
+            medidas["antes"] = medir(engine, sentencias, args.repeticiones, antes=True)
+        for i, (statement, _) in enumerate(sentencias):
+            print(" ".join(statement.split()))
+            for etiqueta in sorted(medidas):
+                plan, ms = medidas[etiqueta][i]
+                print(f"  {etiqueta} ({ms:.2f} ms):" if args.comparar else f"  ({ms:.2f} ms)")
+                for linea in plan:
+                    print(f"      {linea}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
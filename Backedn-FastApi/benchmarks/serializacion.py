@@ -0,0 +1,63 @@
+"""
+Filas/segundo al serializar un listado de asesorías.
+
+Compara la ruta anterior (objetos ORM validados con el response_model de
+Pydantic y serializados a JSON) con la actual (filas proyectadas
+convertidas a dict y codificadas con orjson).
+
+Uso:
+    python -m benchmarks.serializacion --filas 50000
+"""
+
+import argparse
+import random
+import time
+from collections import namedtuple
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+from .datos import ConfigDatos, filas_asesorias
+
+
+def _medir(nombre: str, fn, filas: int, repeticiones: int):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        fn()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    print(f"{nombre:<35} {filas / mejor:>12,.0f} filas/s  ({mejor * 1000:.1f} ms)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de serialización de listados")
+    parser.add_argument("--filas", type=int, default=50_000)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+
+    from app import models, schemas, service
+
+    config = ConfigDatos(asesorias=args.filas)
+    filas = []
+    for id, fila in enumerate(filas_asesorias(config, random.Random(config.semilla)), start=1):
+        # Mismo formato de texto que devuelven los TypeDecorator de fecha/hora
+        fila.update(id=id, fecha_solicitada=fila["fecha_solicitada"].isoformat(),
+                    hora_solicitada=fila["hora_solicitada"].strftime("%H:%M"))
+        filas.append(fila)
+
+    objetos = [models.Asesoria(**fila) for fila in filas]
+    Fila = namedtuple("Fila", [columna.key for columna in service.COLUMNAS_ASESORIA])
+    tuplas = [Fila(**{campo: fila[campo] for campo in Fila._fields}) for fila in filas]
+    adapter = TypeAdapter(List[schemas.AsesoriaOut])
+
+    _medir("ORM + response_model (pydantic)",
+           lambda: adapter.dump_json(adapter.validate_python(objetos, from_attributes=True)),
+           args.filas, args.repeticiones)
+    _medir("proyección + orjson",
+           lambda: orjson.dumps([service._fila_a_dict(t) for t in tuplas]),
+           args.filas, args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
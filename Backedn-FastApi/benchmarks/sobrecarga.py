@@ -0,0 +1,152 @@
+"""
+Latencia bajo sobrecarga, con y sin control de admisión.
+
+Envía peticiones a ritmo fijo (lazo abierto: llegan aunque las anteriores
+no hayan terminado, como clientes reales) por encima de lo que el pool
+puede atender. Para que la base sea el cuello de botella sin depender de
+la máquina, el pool es pequeño (--pool) y cada sentencia SQL tarda
+--retardo-ms más.
+
+Sin admisión las peticiones se acumulan esperando conexión y la latencia
+crece durante toda la prueba: las que esperan conexión ocupan los hilos
+del threadpool que necesitan las que ya tienen una para terminar, y solo
+DB_POOL_TIMEOUT (--pool-timeout) deshace el bloqueo. Con admisión las que
+no entran en la cola a tiempo reciben 503 enseguida y la latencia de las
+atendidas queda acotada por ADMISION_ESPERA_MAX_S.
+
+Cada modo corre en un proceso nuevo (la configuración se lee al importar la app).
+
+Uso:
+    python -m benchmarks.sobrecarga --rps 150 --duracion 5 --pool 4 --retardo-ms 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from . import datos as datos_mod
+from .carga import percentil
+from .entorno import RetardoRed, crear_engine
+
+DEFAULT_DATABASE_URL = "sqlite:///./sobrecarga.db"
+
+MODOS = {
+    "sin admisión": {"ADMISION_ACTIVA": "0"},
+    "con admisión": {"ADMISION_ACTIVA": "1"},
+}
+
+
+def _engine_lento(database_url: str, retardo_s: float):
+    """Engine de la app (pool instrumentado, tamaño de DB_POOL_SIZE) con cada sentencia más lenta"""
+    from app import database
+
+    engine = database.crear_engine(database_url, "primary")
+    RetardoRed(retardo_s).instalar(engine)
+    database.engine = engine
+    database.SessionLocal.configure(bind=engine)
+    return engine
+
+
+async def _lazo_abierto(app, ruta: str, rps: float, duracion: float) -> List[Tuple[float, int]]:
+    import httpx
+
+    resultados: List[Tuple[float, int]] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://sobrecarga", timeout=None) as client:
+        async def una():
+            inicio = time.perf_counter()
+            response = await client.get(ruta)
+            resultados.append((time.perf_counter() - inicio, response.status_code))
+
+        tareas = []
+        inicio = time.perf_counter()
+        for i in range(int(rps * duracion)):
+            # Cada petición sale en su momento, sin esperar a las anteriores
+            await asyncio.sleep(max(0.0, inicio + i / rps - time.perf_counter()))
+            tareas.append(asyncio.create_task(una()))
+        await asyncio.gather(*tareas)
+    return resultados
+
+
+def _resumen(resultados: List[Tuple[float, int]]) -> Dict:
+    def ms(valores: List[float], p: float) -> float:
+        return round(percentil(valores, p) * 1000, 1)
+
+    ok = sorted(latencia for latencia, codigo in resultados if codigo == 200)
+    rechazadas = sorted(latencia for latencia, codigo in resultados if codigo in (429, 503))
+    todas = sorted(latencia for latencia, _ in resultados)
+    return {
+        "peticiones": len(resultados),
+        "codigos": dict(Counter(str(codigo) for _, codigo in resultados)),
+        "ok_p50_ms": ms(ok, 50), "ok_p99_ms": ms(ok, 99), "ok_max_ms": ms(ok, 100),
+        "rechazo_p99_ms": ms(rechazadas, 99),
+        "todas_p99_ms": ms(todas, 99),
+    }
+
+
+def hijo(database_url: str, ruta: str, rps: str, duracion: str, retardo_ms: str):
+    """Se ejecuta en el proceso nuevo: imprime el resumen en JSON por stdout."""
+    from .entorno import preparar_app
+
+    app, _ = preparar_app(database_url)
+    _engine_lento(database_url, float(retardo_ms) / 1000)
+    resultados = asyncio.run(_lazo_abierto(app, ruta, float(rps), float(duracion)))
+    print(json.dumps(_resumen(resultados)))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--hijo":
+        hijo(*sys.argv[2:7])
+        return
+
+    parser = argparse.ArgumentParser(description="Latencia bajo sobrecarga con y sin control de admisión")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--ruta", default="/api/asesorias?limit=20")
+    parser.add_argument("--rps", type=float, default=150, help="Peticiones por segundo ofrecidas")
+    parser.add_argument("--duracion", type=float, default=5, help="Segundos de carga")
+    parser.add_argument("--pool", type=int, default=4, help="Conexiones del pool (sin overflow)")
+    parser.add_argument("--retardo-ms", type=float, default=20, help="Tiempo extra por sentencia SQL")
+    parser.add_argument("--pool-timeout", type=float, default=5, help="DB_POOL_TIMEOUT (segundos)")
+    parser.add_argument("--espera-max-s", type=float, default=1, help="ADMISION_ESPERA_MAX_S")
+    parser.add_argument("--cola", type=int, default=50, help="ADMISION_COLA")
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    datos_mod.agregar_argumentos(parser)
+    parser.set_defaults(asesorias=2_000, ausencias=200)
+    args = parser.parse_args()
+
+    datos_mod.sembrar(crear_engine(args.database_url), datos_mod.config_desde_args(args))
+    print(f"Ruta {args.ruta}: {args.rps:.0f} peticiones/s durante {args.duracion:.0f}s, "
+          f"pool de {args.pool}, +{args.retardo_ms:.0f} ms por sentencia")
+
+    resultados = {}
+    for nombre, entorno_modo in MODOS.items():
+        env = dict(
+            os.environ, **entorno_modo,
+            FIREBASE_PROJECT_ID=os.getenv("FIREBASE_PROJECT_ID", "benchmark"),
+            DB_POOL_SIZE=str(args.pool), DB_MAX_OVERFLOW="0", DB_POOL_TIMEOUT=str(args.pool_timeout),
+            ADMISION_ESPERA_MAX_S=str(args.espera_max_s), ADMISION_COLA=str(args.cola),
+        )
+        salida = subprocess.run(
+            [sys.executable, "-m", "benchmarks.sobrecarga", "--hijo", args.database_url, args.ruta,
+             str(args.rps), str(args.duracion), str(args.retardo_ms)],
+            capture_output=True, text=True, env=env, check=True,
+        )
+        resultados[nombre] = res = json.loads(salida.stdout.strip().splitlines()[-1])
+        print(f"{nombre:<13} códigos={res['codigos']}  200: p50={res['ok_p50_ms']:>8.1f}ms "
+              f"p99={res['ok_p99_ms']:>8.1f}ms max={res['ok_max_ms']:>8.1f}ms  "
+              f"rechazos p99={res['rechazo_p99_ms']:>6.1f}ms  todas p99={res['todas_p99_ms']:>8.1f}ms")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"parametros": vars(args), "modos": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
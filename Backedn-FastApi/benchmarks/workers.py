@@ -0,0 +1,251 @@
+"""
+Servidor con 1, 2, 4 y 8 workers: throughput y conexiones abiertas a la base.
+
+Para cada cantidad de workers lanza `python -m app.servidor` (gunicorn con
+preload, o uvicorn si no está instalado) con la app real y la autenticación
+reemplazada, le aplica carga en lazo cerrado por TCP (--concurrencia
+clientes durante --duracion segundos) y muestrea las conexiones a la base:
+
+- PostgreSQL: filas de pg_stat_activity de la base del benchmark
+- SQLite: descriptores abiertos sobre el archivo en los procesos del servidor
+
+Con --presupuesto se fija DB_CONEXIONES_MAX: el pico de conexiones no debe
+superarlo con ninguna cantidad de workers. Sin presupuesto cada worker usa
+DB_POOL_SIZE + DB_MAX_OVERFLOW y el total crece con los workers.
+
+Uso:
+    python -m benchmarks.workers --sembrar
+    python -m benchmarks.workers --database-url postgresql://... --sembrar --presupuesto 40
+    python -m benchmarks.workers --workers 1 4 --concurrencia 64 --duracion 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from typing import List, Optional
+
+from . import datos as datos_mod
+from .carga import percentil
+from .entorno import DEFAULT_DATABASE_URL, UID_BENCHMARK, crear_engine
+
+
+def app_benchmark():
+    """Factory que usa cada servidor: la app real con un usuario fijo"""
+    from app import main
+    from app.auth import verify_firebase_token
+
+    main.app.dependency_overrides[verify_firebase_token] = lambda: {"uid": UID_BENCHMARK}
+    return main.app
+
+
+# ========== Conexiones abiertas ==========
+
+def _procesos(pid: int) -> List[int]:
+    """El proceso y todos sus descendientes (Linux, /proc)"""
+    hijos = {}
+    for entrada in os.listdir("/proc"):
+        if not entrada.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entrada}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        hijos.setdefault(ppid, []).append(int(entrada))
+    resultado, pendientes = [], [pid]
+    while pendientes:
+        actual = pendientes.pop()
+        resultado.append(actual)
+        pendientes.extend(hijos.get(actual, []))
+    return resultado
+
+
+def _conexiones_sqlite(pid: int, archivo: str) -> int:
+    total = 0
+    for proceso in _procesos(pid):
+        try:
+            descriptores = os.listdir(f"/proc/{proceso}/fd")
+        except OSError:
+            continue
+        for fd in descriptores:
+            try:
+                total += os.readlink(f"/proc/{proceso}/fd/{fd}") == archivo
+            except OSError:
+                pass
+    return total
+
+
+def contador_conexiones(database_url: str, engine):
+    """Función sin argumentos (salvo el pid del servidor) que cuenta las conexiones a la base"""
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy import text
+
+        consulta = text("SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() "
+                        "AND pid <> pg_backend_pid()")
+
+        def contar(_pid: int) -> int:
+            with engine.connect() as conn:
+                return conn.execute(consulta).scalar_one()
+        return contar
+
+    archivo = os.path.realpath(engine.url.database)
+    return lambda pid: _conexiones_sqlite(pid, archivo)
+
+
+# ========== Servidor y carga ==========
+
+def lanzar_servidor(database_url: str, workers: int, puerto: int, presupuesto: Optional[int],
+                    modo_async: bool, log) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url, DB_ASYNC="1" if modo_async else "0",
+               FIREBASE_PROJECT_ID=os.getenv("FIREBASE_PROJECT_ID", "benchmark"))
+    env.setdefault("QUERY_CACHE_TTL", "0")
+    env.setdefault("EVENTOS_BACKEND", "postgres" if database_url.startswith("postgresql") else "memoria")
+    if presupuesto:
+        env["DB_CONEXIONES_MAX"] = str(presupuesto)
+    return subprocess.Popen(
+        [sys.executable, "-m", "app.servidor", "--host", "127.0.0.1", "--port", str(puerto),
+         "--workers", str(workers), "--app", "benchmarks.workers:app_benchmark", "--factory"],
+        env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True,
+    )
+
+
+def detener_servidor(proceso: subprocess.Popen):
+    if proceso.poll() is None:
+        os.killpg(proceso.pid, signal.SIGTERM)
+        try:
+            proceso.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(proceso.pid, signal.SIGKILL)
+            proceso.wait()
+
+
+async def _esperar(client, proceso: subprocess.Popen, limite: float = 60):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"El servidor terminó con código {proceso.returncode}")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a /health")
+
+
+def _peticion(rng: random.Random, programadores: List[str]):
+    uid = rng.choice(programadores)
+    return rng.choice((
+        ("/api/asesorias", {"limit": 20}),
+        (f"/api/asesorias/programador/{uid}", {"limit": 20}),
+        (f"/api/ausencias/programador/{uid}", {}),
+    ))
+
+
+async def medir(base_url: str, proceso: subprocess.Popen, contar, programadores: List[str],
+                concurrencia: int, duracion: float, semilla: int) -> dict:
+    import httpx
+
+    latencias: List[float] = []
+    errores = [0]
+    muestras: List[int] = []
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limites) as client:
+        await _esperar(client, proceso)
+        fin = time.perf_counter() + duracion
+
+        async def cliente(n: int):
+            rng = random.Random(semilla + n)
+            while time.perf_counter() < fin:
+                ruta, params = _peticion(rng, programadores)
+                inicio = time.perf_counter()
+                try:
+                    ok = (await client.get(ruta, params=params)).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencias.append(time.perf_counter() - inicio)
+                errores[0] += not ok
+
+        async def muestrear():
+            while time.perf_counter() < fin:
+                muestras.append(await asyncio.to_thread(contar, proceso.pid))
+                await asyncio.sleep(0.2)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(muestrear(), *(cliente(n) for n in range(concurrencia)))
+        segundos = time.perf_counter() - inicio
+
+    latencias.sort()
+    return {
+        "peticiones": len(latencias),
+        "rps": round(len(latencias) / segundos, 1),
+        "p50_ms": round(percentil(latencias, 50) * 1000, 2),
+        "p99_ms": round(percentil(latencias, 99) * 1000, 2),
+        "errores": errores[0],
+        "conexiones_max": max(muestras, default=0),
+        "conexiones_media": round(sum(muestras) / len(muestras), 1) if muestras else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput y conexiones a la base con 1, 2, 4 y 8 workers")
+    parser.add_argument("--database-url", default=DEFAULT_DATABASE_URL)
+    parser.add_argument("--sembrar", action="store_true", help="Recrear las tablas con datos de benchmark")
+    parser.add_argument("--async", dest="modo_async", action="store_true", help="DB_ASYNC=1")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--presupuesto", type=int, help="DB_CONEXIONES_MAX entre todos los workers")
+    parser.add_argument("--concurrencia", type=int, default=32, help="Clientes simultáneos")
+    parser.add_argument("--duracion", type=float, default=15, help="Segundos de carga por cantidad de workers")
+    parser.add_argument("--puerto", type=int, default=5099)
+    parser.add_argument("--log", default="workers.log", help="Salida de los servidores")
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    datos_mod.agregar_argumentos(parser)
+    args = parser.parse_args()
+
+    config = datos_mod.config_desde_args(args)
+    engine = crear_engine(args.database_url)
+    if args.sembrar:
+        inicio = time.perf_counter()
+        datos_mod.sembrar(engine, config)
+        print(f"Datos sembrados en {time.perf_counter() - inicio:.1f}s")
+
+    contar = contador_conexiones(args.database_url, engine)
+    programadores = datos_mod.uids("prog", config.programadores)
+    print(f"{os.cpu_count()} CPU, {args.concurrencia} clientes, {args.duracion:.0f}s por medida"
+          + (f", presupuesto de {args.presupuesto} conexiones" if args.presupuesto else ""))
+
+    resultados = {}
+    with open(args.log, "w") as log:
+        for workers in args.workers:
+            proceso = lanzar_servidor(args.database_url, workers, args.puerto, args.presupuesto,
+                                      args.modo_async, log)
+            try:
+                res = asyncio.run(medir(f"http://127.0.0.1:{args.puerto}", proceso, contar, programadores,
+                                        args.concurrencia, args.duracion, config.semilla))
+            finally:
+                detener_servidor(proceso)
+            resultados[str(workers)] = res
+            print(f"{workers:>2} workers  {res['rps']:>8.1f} req/s  p50={res['p50_ms']:>8.1f}ms  "
+                  f"p99={res['p99_ms']:>8.1f}ms  errores={res['errores']:<4} "
+                  f"conexiones máx={res['conexiones_max']:>3} media={res['conexiones_media']:>5.1f}")
+
+    if args.presupuesto:
+        excedidos = [w for w, res in resultados.items() if res["conexiones_max"] > args.presupuesto]
+        print("Presupuesto respetado con todas las cantidades de workers" if not excedidos
+              else f"⚠️ Presupuesto excedido con {', '.join(excedidos)} workers")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"base_de_datos": engine.dialect.name, "cpus": os.cpu_count(), "parametros": vars(args),
+                       "resultados": resultados}, f, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Fixtures comunes: base SQLite temporal con el esquema de los modelos."""
+
+import pytest
+from sqlalchemy import BigInteger, create_engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import database, main, models
+from app.auth import verify_firebase_token
+
+
+@compiles(BigInteger, "sqlite")
+def _bigint_sqlite(type_, compiler, **kw):
+    # En SQLite solo INTEGER PRIMARY KEY es autoincremental
+    return "INTEGER"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    # Archivo y no memoria: las pruebas concurrentes abren varias conexiones
+    engine = create_engine(f"sqlite:///{tmp_path / 'pruebas.db'}",
+                           connect_args={"check_same_thread": False, "timeout": 30})
+    models.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def api(engine, monkeypatch):
+    """La app apuntando a la base de pruebas, con un usuario autenticado fijo (sin lifespan)"""
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "replica_engine", None)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine, autoflush=False))
+    monkeypatch.setitem(main.app.dependency_overrides, verify_firebase_token, lambda: {"uid": "usuario-1"})
+    return main.app
+
+
+def asesoria(programador_uid: str = "prog-1", fecha: str = "2025-03-10", hora: str = "10:00",
+             estado: str = "aprobada", **campos) -> dict:
+    """Datos válidos de AsesoriaCreate"""
+    return {
+        "usuario_uid": "usuario-1", "usuario_nombre": "Usuario", "usuario_email": "usuario@example.com",
+        "programador_uid": programador_uid, "programador_nombre": "Programador",
+        "tema": "Tema", "descripcion": "Descripción",
+        "fecha_solicitada": fecha, "hora_solicitada": hora, "estado": estado,
+        **campos,
+    }
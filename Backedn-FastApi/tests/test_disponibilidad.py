@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import disponibilidad, models, schemas
+from app.disponibilidad import ConflictoHorarioError
+from app.service import AsesoriaService
+
+from .conftest import asesoria
+
+
+def crear(engine, **campos):
+    with Session(engine) as db:
+        return AsesoriaService(db).create(schemas.AsesoriaCreate(**asesoria(**campos)))
+
+
+def test_rechaza_cruce_con_asesoria_aprobada(engine):
+    crear(engine, hora="10:00")
+    with pytest.raises(ConflictoHorarioError):
+        crear(engine, hora="10:30")
+    crear(engine, hora="11:00")
+
+
+def test_asesoria_del_dia_anterior_ocupa_despues_de_medianoche(engine):
+    crear(engine, fecha="2025-03-09", hora="23:30")
+    with pytest.raises(ConflictoHorarioError):
+        crear(engine, fecha="2025-03-10", hora="00:00")
+    crear(engine, fecha="2025-03-10", hora="00:30")
+
+
+def test_mover_asesoria_aprobada_verifica_cruces(engine):
+    crear(engine, fecha="2025-03-10", hora="10:00")
+    otra = crear(engine, fecha="2025-03-11", hora="10:15")
+    with Session(engine) as db:
+        with pytest.raises(ConflictoHorarioError):
+            AsesoriaService(db).update(otra["id"], schemas.AsesoriaUpdate(fecha_solicitada="2025-03-10"))
+
+
+def test_aprobaciones_concurrentes_no_reservan_el_mismo_horario(engine, monkeypatch):
+    """
+    Las dos transacciones leen la ocupación a la vez (sin bloqueo, las dos
+    la ven libre e insertan). Con el bloqueo de la agenda la segunda espera
+    al commit de la primera y encuentra el cruce.
+    """
+    leidas = threading.Barrier(2, timeout=1)
+    cargar = disponibilidad._intervalos_ocupados
+
+    def cargar_y_esperar(*args, **kwargs):
+        intervalos = cargar(*args, **kwargs)
+        try:
+            leidas.wait()
+        except threading.BrokenBarrierError:
+            pass  # la otra transacción está esperando el bloqueo
+        return intervalos
+
+    monkeypatch.setattr(disponibilidad, "_intervalos_ocupados", cargar_y_esperar)
+    resultados = []
+
+    def aprobar(hora):
+        try:
+            crear(engine, hora=hora)
+            resultados.append("creada")
+        except ConflictoHorarioError:
+            resultados.append("conflicto")
+
+    hilos = [threading.Thread(target=aprobar, args=(hora,)) for hora in ("10:00", "10:30")]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert sorted(resultados) == ["conflicto", "creada"]
+    with Session(engine) as db:
+        assert db.query(models.Asesoria).filter(models.Asesoria.estado == "aprobada").count() == 1
@@ -0,0 +1,82 @@
+import asyncio
+import sys
+import threading
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.eventos import MemoryBroker, crear_evento
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def cambios_de_hilo_frecuentes():
+    """Cambios de hilo mucho más frecuentes: las carreras aparecen en pocas vueltas"""
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(intervalo)
+
+
+async def test_publicar_y_contar_desde_hilos_mientras_el_loop_suscribe_y_cancela(cambios_de_hilo_frecuentes):
+    """Los hilos publican (threadpool) y cuentan suscriptores (scrape de /metrics)"""
+    broker = MemoryBroker()
+    fija = broker.suscribir(["asesorias:programador:prog-0"])
+    errores = []
+    terminar = threading.Event()
+
+    def en_hilo(fn):
+        def bucle():
+            try:
+                while not terminar.is_set():
+                    fn()
+            except Exception as e:
+                errores.append(e)
+        return threading.Thread(target=bucle)
+
+    canales = [f"asesorias:programador:prog-{i}" for i in range(20)]
+    hilos = [
+        en_hilo(lambda: broker.publicar(crear_evento("asesoria", "creada", [1], canales))),
+        en_hilo(lambda: broker.suscriptores),
+    ]
+    for hilo in hilos:
+        hilo.start()
+    try:
+        for i in range(5000):
+            # Canales nuevos en cada vuelta: el índice agrega y borra claves
+            broker.cancelar(broker.suscribir([f"asesorias:usuario:usuario-{i}-{j}" for j in range(20)]))
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+    finally:
+        terminar.set()
+        for hilo in hilos:
+            hilo.join()
+
+    assert errores == []
+    assert broker.suscriptores == 1
+    assert await fija.siguiente(timeout=1) is not None
+
+
+async def test_gauge_de_suscriptores_sigue_suscripciones_y_cancelaciones():
+    def suscriptores():
+        return REGISTRY.get_sample_value("events_subscribers")
+
+    broker = MemoryBroker()
+    antes = suscriptores()
+    primera = broker.suscribir(["asesorias:programador:prog-0"])
+    segunda = broker.suscribir(["asesorias:programador:prog-0", "ausencias:programador:prog-0"])
+    assert suscriptores() == antes + 2
+
+    broker.cancelar(primera)
+    broker.cancelar(primera)
+    assert suscriptores() == antes + 1
+    assert broker.suscriptores == 1
+
+    broker.cancelar(segunda)
+    assert suscriptores() == antes
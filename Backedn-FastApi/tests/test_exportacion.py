@@ -0,0 +1,107 @@
+import anyio
+import orjson
+import pytest
+from sqlalchemy import insert
+
+from app import exportacion, main, models, settings
+
+from .conftest import asesoria
+
+pytestmark = pytest.mark.anyio
+
+LOTE = settings.EXPORTACION_LOTE
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def sembrar(engine, api):
+    """Función que inserta n asesorías en la base de la app"""
+    def sembrar(n: int):
+        with engine.begin() as conn:
+            conn.execute(insert(models.Asesoria), [asesoria(estado="pendiente", tema=f"Tema {i}")
+                                                   for i in range(n)])
+    return sembrar
+
+
+@pytest.fixture
+def lotes_leidos(monkeypatch):
+    """Tamaño de cada lote que la exportación leyó de la base"""
+    leidos = []
+    leer = exportacion._lotes
+
+    def contar(engine, consulta, lote):
+        lotes = leer(engine, consulta, lote)
+        try:
+            for filas in lotes:
+                leidos.append(len(filas))
+                yield filas
+        finally:
+            lotes.close()
+
+    monkeypatch.setattr(exportacion, "_lotes", contar)
+    return leidos
+
+
+async def exportar(ruta: str, cortar_tras: int = None) -> list:
+    """
+    Petición ASGI que devuelve los fragmentos del cuerpo recibidos.
+
+    Con `cortar_tras`, el cliente se desconecta después de recibir esa
+    cantidad de fragmentos.
+    """
+    fragmentos = []
+    desconectado = anyio.Event()
+    pedida = False
+
+    async def receive():
+        nonlocal pedida
+        if not pedida:
+            pedida = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await desconectado.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(mensaje):
+        if mensaje["type"] == "http.response.start":
+            assert mensaje["status"] == 200
+        elif mensaje["type"] == "http.response.body" and mensaje.get("body"):
+            fragmentos.append(mensaje["body"])
+            if cortar_tras is not None and len(fragmentos) >= cortar_tras:
+                desconectado.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": ruta, "raw_path": ruta.encode(), "root_path": "", "query_string": b"",
+        "headers": [(b"host", b"pruebas")], "server": ("pruebas", 80), "client": ("127.0.0.1", 50000),
+    }
+    with anyio.fail_after(30):
+        await main.app(scope, receive, send)
+    return fragmentos
+
+
+async def test_exporta_la_tabla_en_lotes(engine, sembrar, lotes_leidos):
+    sembrar(2 * LOTE + LOTE // 2)
+
+    fragmentos = await exportar("/api/asesorias/exportar")
+
+    # Un fragmento por lote leído: la respuesta no se arma entera en memoria
+    assert lotes_leidos == [LOTE, LOTE, LOTE // 2]
+    assert [fragmento.count(b"\n") for fragmento in fragmentos] == lotes_leidos
+    filas = [orjson.loads(linea) for fragmento in fragmentos for linea in fragmento.splitlines()]
+    assert [fila["tema"] for fila in filas] == [f"Tema {i}" for i in range(len(filas))]
+    assert engine.pool.checkedout() == 0
+
+
+async def test_desconexion_detiene_la_consulta(engine, sembrar, lotes_leidos):
+    sembrar(10 * LOTE)
+
+    fragmentos = await exportar("/api/asesorias/exportar", cortar_tras=1)
+
+    # Como mucho el lote en curso y el que ya se estaba leyendo al cortar
+    assert len(fragmentos) < 10
+    assert len(lotes_leidos) <= 3
+    assert engine.pool.checkedout() == 0
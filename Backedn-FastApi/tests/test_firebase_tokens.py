@@ -0,0 +1,205 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+from app.firebase_tokens import (
+    MIN_REFETCH_INTERVAL,
+    FirebaseTokenVerifier,
+    InvalidTokenError,
+    PublicKeyCache,
+    VerifiedTokenCache,
+)
+
+pytestmark = pytest.mark.anyio
+
+PROYECTO = "proyecto-pruebas"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class Reloj:
+    """Reloj manual para las cachés (jwt.decode sigue usando la hora real)"""
+
+    def __init__(self):
+        self.ahora = time.time()
+
+    def __call__(self) -> float:
+        return self.ahora
+
+    def avanzar(self, segundos: float):
+        self.ahora += segundos
+
+
+class Claves(PublicKeyCache):
+    """Certificados generados en memoria en lugar de descargarlos de Google"""
+
+    def __init__(self, clock, max_age: int = 3600):
+        super().__init__(clock=clock)
+        self.privadas = {}
+        self.certificados = {}
+        self.max_age = max_age
+        self.descargas = 0
+
+    def agregar(self, kid: str):
+        privada = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        nombre = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, kid)])
+        ahora = datetime.now(timezone.utc)
+        certificado = (
+            x509.CertificateBuilder()
+            .subject_name(nombre).issuer_name(nombre)
+            .public_key(privada.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(ahora - timedelta(days=1)).not_valid_after(ahora + timedelta(days=1))
+            .sign(privada, hashes.SHA256())
+        )
+        self.privadas[kid] = privada
+        self.certificados[kid] = certificado.public_bytes(serialization.Encoding.PEM).decode()
+
+    async def fetch(self):
+        self.descargas += 1
+        return dict(self.certificados), self.max_age
+
+
+@pytest.fixture
+def reloj():
+    return Reloj()
+
+
+@pytest.fixture
+def claves(reloj):
+    claves = Claves(reloj)
+    claves.agregar("kid-1")
+    return claves
+
+
+@pytest.fixture
+def verificador(reloj, claves):
+    return FirebaseTokenVerifier(project_id=lambda: PROYECTO, keys=claves, clock=reloj)
+
+
+def firmar(claves: Claves, kid: str = "kid-1", **claims) -> str:
+    ahora = int(time.time())
+    # iat y auth_time en el pasado: el reloj de las cachés arranca antes de firmar
+    payload = {
+        "aud": PROYECTO, "iss": f"https://securetoken.google.com/{PROYECTO}",
+        "sub": "usuario-1", "iat": ahora - 60, "exp": ahora + 3600, "auth_time": ahora - 60,
+        **claims,
+    }
+    return jwt.encode(payload, claves.privadas[kid], algorithm="RS256", headers={"kid": kid})
+
+
+async def test_token_valido(verificador, claves):
+    claims = await verificador.verify(firmar(claves))
+    assert claims["uid"] == "usuario-1"
+    assert claves.descargas == 1
+
+
+async def test_token_expirado(verificador, claves):
+    ahora = int(time.time())
+    with pytest.raises(InvalidTokenError):
+        await verificador.verify(firmar(claves, iat=ahora - 7200, exp=ahora - 3600))
+
+
+@pytest.mark.parametrize("claims", [
+    {"aud": "otro-proyecto"},
+    {"iss": "https://securetoken.google.com/otro-proyecto"},
+    {"iss": "https://accounts.google.com"},
+    {"sub": ""},
+])
+async def test_audiencia_issuer_o_sub_incorrectos(verificador, claves, claims):
+    with pytest.raises(InvalidTokenError):
+        await verificador.verify(firmar(claves, **claims))
+
+
+async def test_firma_con_otra_clave(verificador, claves):
+    claves.agregar("kid-2")
+    token = jwt.encode(jwt.decode(firmar(claves), options={"verify_signature": False}),
+                       claves.privadas["kid-2"], algorithm="RS256", headers={"kid": "kid-1"})
+    with pytest.raises(InvalidTokenError):
+        await verificador.verify(token)
+
+
+async def test_kid_desconocido(verificador, claves):
+    await verificador.verify(firmar(claves))
+    claves.agregar("kid-2")
+    token = firmar(claves, kid="kid-2")
+    del claves.certificados["kid-2"]
+    with pytest.raises(InvalidTokenError, match="Unknown key id"):
+        await verificador.verify(token)
+
+
+async def test_kid_desconocido_descarga_como_mucho_una_vez_por_intervalo(verificador, claves, reloj):
+    await verificador.verify(firmar(claves))
+    assert claves.descargas == 1
+
+    # Rotación: Google publica kid-2 con las claves en caché aún vigentes
+    claves.agregar("kid-2")
+    token = firmar(claves, kid="kid-2")
+    reloj.avanzar(MIN_REFETCH_INTERVAL - 1)
+    for _ in range(5):
+        with pytest.raises(InvalidTokenError, match="Unknown key id"):
+            await verificador.verify(token)
+    assert claves.descargas == 1
+
+    reloj.avanzar(1)
+    assert (await verificador.verify(token))["uid"] == "usuario-1"
+    assert claves.descargas == 2
+
+    # Un kid que no existe tampoco descarga más de una vez por intervalo
+    reloj.avanzar(MIN_REFETCH_INTERVAL)
+    claves.agregar("kid-falso")
+    falso = firmar(claves, kid="kid-falso")
+    del claves.certificados["kid-falso"]
+    for _ in range(5):
+        with pytest.raises(InvalidTokenError, match="Unknown key id"):
+            await verificador.verify(falso)
+    assert claves.descargas == 3
+
+
+async def test_token_verificado_queda_en_cache_hasta_exp(verificador, claves, reloj, monkeypatch):
+    # int(reloj()) + 600 está entre reloj() + 599 y reloj() + 600
+    token = firmar(claves, exp=int(reloj()) + 600)
+    await verificador.verify(token)
+
+    decodificados = []
+    decodificar = verificador._decode
+    monkeypatch.setattr(verificador, "_decode", lambda *args: decodificados.append(1) or decodificar(*args))
+
+    reloj.avanzar(599)
+    await verificador.verify(token)
+    assert decodificados == []
+
+    reloj.avanzar(1)
+    await verificador.verify(token)
+    assert decodificados == [1]
+
+
+def test_cache_expulsa_en_exp(reloj):
+    cache = VerifiedTokenCache(clock=reloj)
+    cache.put("token", {"uid": "usuario-1", "exp": reloj() + 10})
+    reloj.avanzar(9)
+    assert cache.get("token")["uid"] == "usuario-1"
+    reloj.avanzar(1)
+    assert cache.get("token") is None
+    assert len(cache) == 0
+
+
+def test_cache_lru_acotada(reloj):
+    cache = VerifiedTokenCache(max_entries=2, clock=reloj)
+    exp = reloj() + 60
+    for token in ("a", "b"):
+        cache.put(token, {"exp": exp})
+    cache.get("a")
+    cache.put("c", {"exp": exp})
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.service import AsesoriaService, AusenciaService
+
+from .conftest import asesoria
+
+# Sentencias de un lote de un solo programador, sin importar cuántos elementos tenga
+SENTENCIAS_MAX = 8
+
+
+@pytest.fixture
+def sentencias(engine):
+    contador = [0]
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        contador[0] += 1
+
+    event.listen(engine, "before_cursor_execute", contar)
+    yield contador
+    event.remove(engine, "before_cursor_execute", contar)
+
+
+def asesorias(n: int):
+    return [
+        schemas.AsesoriaCreate(**asesoria(fecha=f"2025-03-{i // 10 + 1:02d}", hora=f"{i % 10 + 8:02d}:00",
+                                          estado="pendiente", tema=f"Tema {i}"))
+        for i in range(n)
+    ]
+
+
+def ausencias(n: int):
+    return [
+        schemas.AusenciaCreate(programador_uid="prog-1", fecha=f"2025-04-{i % 28 + 1:02d}",
+                               hora_inicio="08:00", hora_fin="09:00", motivo=f"Motivo {i}")
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("n", [5, 250])
+def test_crear_asesorias_en_lote_con_sentencias_acotadas(engine, sentencias, n):
+    items = asesorias(n)
+    with Session(engine) as db:
+        sentencias[0] = 0
+        resumen = AsesoriaService(db).create_bulk(items)
+        assert sentencias[0] <= SENTENCIAS_MAX
+        # Cada resultado lleva el id de la fila creada con ese elemento
+        for item, resultado in zip(items, resumen["resultados"]):
+            assert AsesoriaService(db).get_by_id(resultado["id"]).tema == item.tema
+
+
+@pytest.mark.parametrize("n", [5, 250])
+def test_crear_ausencias_en_lote_con_sentencias_acotadas(engine, sentencias, n):
+    items = ausencias(n)
+    with Session(engine) as db:
+        sentencias[0] = 0
+        resumen = AusenciaService(db).create_bulk(items)
+        assert sentencias[0] <= SENTENCIAS_MAX
+        for item, resultado in zip(items, resumen["resultados"]):
+            assert AusenciaService(db).get_by_id(resultado["id"]).motivo == item.motivo
+
+
+def test_borrar_asesorias_en_lote_informa_las_que_no_existen(engine):
+    with Session(engine) as db:
+        creadas = [r["id"] for r in AsesoriaService(db).create_bulk(asesorias(2))["resultados"]]
+        resumen = AsesoriaService(db).delete_bulk([77, creadas[0], 78, creadas[1]])
+    assert resumen["procesados"] == 2 and resumen["errores"] == 2
+    assert [(r["indice"], r["id"], r["ok"]) for r in resumen["resultados"]] == [
+        (0, 77, False), (1, creadas[0], True), (2, 78, False), (3, creadas[1], True),
+    ]
+    assert resumen["resultados"][0]["error"] == "Asesoría no encontrada"
+
+
+def test_borrar_ausencias_en_lote_informa_las_que_no_existen(engine):
+    with Session(engine) as db:
+        creadas = [r["id"] for r in AusenciaService(db).create_bulk(ausencias(1))["resultados"]]
+        resumen = AusenciaService(db).delete_bulk([77, creadas[0]])
+    assert resumen["procesados"] == 1 and resumen["errores"] == 1
+    assert [(r["indice"], r["id"], r["ok"]) for r in resumen["resultados"]] == [(0, 77, False), (1, creadas[0], True)]
+    assert resumen["resultados"][0]["error"] == "Ausencia no encontrada"
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import metrics
+
+
+class Histograma:
+    def __init__(self):
+        self.medidas = []
+
+    def labels(self, *labels):
+        return self
+
+    def observe(self, valor):
+        self.medidas.append(valor)
+
+
+def test_sentencia_fallida_no_deja_tiempos_en_la_conexion(engine, monkeypatch):
+    duracion = Histograma()
+    monkeypatch.setattr(metrics, "SQL_DURACION", duracion)
+    monkeypatch.setattr(metrics, "_ruta_actual", lambda: ("GET", "/pruebas"))
+    metrics.instrumentar_engine(engine)
+
+    with engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM tabla_inexistente"))
+            conn.rollback()
+        conn.execute(text("SELECT 1"))
+        assert not any(isinstance(valor, list) for valor in conn.info.values())
+
+    # Solo se mide la sentencia que terminó, con su propio tiempo de inicio
+    assert len(duracion.medidas) == 1
+    assert 0 <= duracion.medidas[0] < 1
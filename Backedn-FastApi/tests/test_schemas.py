@@ -0,0 +1,38 @@
+import pytest
+from pydantic import ValidationError
+
+from app import schemas
+
+from .conftest import asesoria
+
+
+@pytest.mark.parametrize("fecha", ["2024-01-02", "2024-02-29"])
+def test_fecha_valida(fecha):
+    assert schemas.AsesoriaCreate(**asesoria(fecha=fecha)).fecha_solicitada == fecha
+
+
+@pytest.mark.parametrize("fecha", ["20240102", "2024-1-2", "2024-01-02T10:00", "2024-02-30", "2024-01-02\n",
+                                   "２０２４-01-02", ""])
+def test_fecha_invalida(fecha):
+    with pytest.raises(ValidationError):
+        schemas.AsesoriaCreate(**asesoria(fecha=fecha))
+
+
+@pytest.mark.parametrize("hora", ["00:00", "09:30", "23:59"])
+def test_hora_valida(hora):
+    assert schemas.AsesoriaCreate(**asesoria(hora=hora)).hora_solicitada == hora
+
+
+@pytest.mark.parametrize("hora", ["10:00:30", "1000", "9:30", "24:00", "10:60", "10:00Z", ""])
+def test_hora_invalida(hora):
+    with pytest.raises(ValidationError):
+        schemas.AsesoriaCreate(**asesoria(hora=hora))
+
+
+def test_ausencia_valida_horas_y_fecha():
+    datos = {"programador_uid": "prog-1", "fecha": "2024-01-02", "hora_inicio": "08:00", "hora_fin": "09:00",
+             "motivo": "Motivo"}
+    schemas.AusenciaCreate(**datos)
+    for campo, valor in [("fecha", "20240102"), ("hora_inicio", "08:00:00"), ("hora_fin", "0900")]:
+        with pytest.raises(ValidationError, match=campo):
+            schemas.AusenciaCreate(**{**datos, campo: valor})
@@ -0,0 +1,87 @@
+"""
+Sentencias SQL por petición de escritura (SQLite, eventos en memoria).
+
+Los números están fijados: un SELECT de refresh o una lectura previa a la
+escritura que vuelva a aparecer hace fallar la prueba. En todas las
+escrituras, las dos últimas sentencias son las versiones: por elemento,
+usuario y programador en la transacción, y las globales después del commit.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from .conftest import asesoria
+
+AUSENCIA = {"programador_uid": "prog-1", "fecha": "2025-03-10", "hora_inicio": "08:00", "hora_fin": "09:00",
+            "motivo": "Motivo"}
+
+
+@pytest.fixture
+def cliente(engine, api):
+    """Cliente HTTP que anota cuántas sentencias ejecutó la última petición"""
+    cliente = TestClient(api)
+    cliente.sentencias = 0
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        cliente.sentencias += 1
+
+    def peticion(metodo, url, **kwargs):
+        cliente.sentencias = 0
+        return TestClient.request(cliente, metodo, url, **kwargs)
+
+    cliente.request = peticion
+    event.listen(engine, "before_cursor_execute", contar)
+    yield cliente
+    event.remove(engine, "before_cursor_execute", contar)
+
+
+def crear_asesoria(cliente, **campos) -> int:
+    respuesta = cliente.post("/api/asesorias", json=asesoria(**campos))
+    assert respuesta.status_code == 201
+    return respuesta.json()["id"]
+
+
+def test_crear_asesoria(cliente):
+    crear_asesoria(cliente, estado="pendiente")
+    # bloqueo de la agenda, ausencias y asesorías del horario, INSERT ... RETURNING, estadísticas, versiones
+    assert cliente.sentencias == 7
+
+
+@pytest.mark.parametrize("cambios, sentencias", [
+    # UPDATE ... RETURNING y versiones: sin leer la fila antes
+    ({"comentario": "Nuevo comentario"}, 3),
+    # fila (FOR UPDATE), verificación de cruces (bloqueo + 2 SELECT), UPDATE, versiones
+    ({"hora_solicitada": "12:00"}, 7),
+    # además, la fila anterior para restar su aporte y el delta de estadísticas
+    ({"estado": "aprobada"}, 9),
+])
+def test_actualizar_asesoria(cliente, cambios, sentencias):
+    asesoria_id = crear_asesoria(cliente, estado="pendiente")
+    assert cliente.put(f"/api/asesorias/{asesoria_id}", json=cambios).status_code == 200
+    assert cliente.sentencias == sentencias
+
+
+def test_borrar_asesoria(cliente):
+    asesoria_id = crear_asesoria(cliente, estado="pendiente")
+    assert cliente.delete(f"/api/asesorias/{asesoria_id}").status_code == 204
+    # DELETE ... RETURNING, estadísticas, versiones
+    assert cliente.sentencias == 4
+    assert cliente.delete(f"/api/asesorias/{asesoria_id}").status_code == 404
+    assert cliente.sentencias == 1
+
+
+def test_escrituras_de_ausencias(cliente):
+    respuesta = cliente.post("/api/ausencias", json=AUSENCIA)
+    assert respuesta.status_code == 201
+    # INSERT ... RETURNING y versiones
+    assert cliente.sentencias == 3
+    ausencia_id = respuesta.json()["id"]
+
+    assert cliente.put(f"/api/ausencias/{ausencia_id}", json={"motivo": "Otro"}).status_code == 200
+    assert cliente.sentencias == 3
+
+    assert cliente.delete(f"/api/ausencias/{ausencia_id}").status_code == 204
+    assert cliente.sentencias == 3
+    assert cliente.delete(f"/api/ausencias/{ausencia_id}").status_code == 404
+    assert cliente.sentencias == 1